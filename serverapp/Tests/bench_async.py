@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+import argparse
+import asyncio
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import bench_utils
+
+# Cada servidor roda em um processo uvicorn próprio, então o banco precisa ser um
+# arquivo: as configurações do benchmark apontam DATABASES para um SQLite temporário
+SETTINGS_MODULE = 'bench_async_settings'
+
+SETTINGS_TEMPLATE = """from todolist_project.settings import *  # noqa: F401,F403
+
+DEBUG = False
+DATABASES = {{'default': dict(DATABASES['default'], NAME={database!r})}}
+"""
+
+SERVERS = [
+    ('WSGI (views síncronas, 10 threads)', ['--interface', 'wsgi', 'todolist_project.wsgi:application'], False),
+    ('ASGI, views síncronas', ['todolist_project.asgi:application'], False),
+    ('ASGI, views assíncronas', ['todolist_project.asgi:application'], True),
+]
+
+
+def seed(users_total, tasks_per_user, shared_per_user):
+    from django.contrib.auth.hashers import make_password
+    from django.contrib.auth.models import User
+    from rest_framework_simplejwt.tokens import AccessToken
+    from tasks.models import Task
+    password = make_password('benchpass123')
+    User.objects.bulk_create([
+        User(username=f'async{i}@example.com', email=f'async{i}@example.com', password=password)
+        for i in range(users_total)
+    ])
+    users = list(User.objects.order_by('id'))
+    bench_utils.seed_tasks(users, users_total * tasks_per_user)
+    owned = {user.id: list(Task.objects.filter(owner=user).values_list('id', flat=True)) for user in users}
+    # Cada usuário compartilha algumas tarefas com o próximo
+    for index, user in enumerate(users):
+        Task.objects.filter(id__in=owned[user.id][:shared_per_user]).share_with_users([users[(index + 1) % len(users)]])
+    return [(str(AccessToken.for_user(user)), owned[user.id]) for user in users]
+
+
+def request_mix(task_ids):
+    # Proporção aproximada do webapp: listagens, detalhes, alternâncias e compartilhamento
+    task_id = random.choice(task_ids)
+    return random.choices([
+        ('GET', f'/api/tasks/?page={random.randint(1, 5)}'),
+        ('GET', '/api/tasks/?pagination=cursor&fields=compact'),
+        ('GET', f'/api/tasks/{task_id}/'),
+        ('PATCH', f'/api/tasks/{task_id}/toggle/'),
+        ('GET', f'/api/tasks/{task_id}/shared-users/'),
+    ], weights=[35, 15, 25, 10, 15])[0]
+
+
+async def client(port, token, task_ids, deadline, warmup_until, latencies, errors):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        while time.perf_counter() < deadline:
+            method, path = request_mix(task_ids)
+            started = time.perf_counter()
+            writer.write(
+                f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nAuthorization: Bearer {token}\r\n"
+                "Content-Length: 0\r\n\r\n".encode()
+            )
+            status = await bench_utils.read_response(reader)
+            if started < warmup_until:
+                continue
+            latencies.append((time.perf_counter() - started) * 1000)
+            if status >= 400:
+                errors.append(status)
+    finally:
+        writer.close()
+
+
+async def load(port, clients, concurrency, duration, warmup):
+    latencies, errors = [], []
+    started = time.perf_counter()
+    warmup_until = started + warmup
+    deadline = warmup_until + duration
+    await asyncio.gather(*(
+        client(port, token, task_ids, deadline, warmup_until, latencies, errors)
+        for token, task_ids in (clients[i % len(clients)] for i in range(concurrency))
+    ))
+    return latencies, errors
+
+
+def start_server(arguments, async_views, env):
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    env = dict(env, TASK_ASYNC_VIEWS='true' if async_views else 'false')
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', *arguments, '--port', str(port),
+         '--log-level', 'warning', '--no-access-log', '--backlog', '4096'],
+        cwd=bench_utils.PROJECT_ROOT, env=env,
+    )
+    for _ in range(300):
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return process, port
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError('O servidor não subiu')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vazão e p99 das views síncronas (WSGI/ASGI) vs. assíncronas (ASGI)")
+    parser.add_argument('--concurrency', default='50,200', help='Conexões simultâneas, separadas por vírgula')
+    parser.add_argument('--duration', type=float, default=10, help='Segundos medidos em cada cenário')
+    parser.add_argument('--warmup', type=float, default=2)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--tasks-per-user', type=int, default=100)
+    parser.add_argument('--shared-per-user', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        with open(os.path.join(directory, f'{SETTINGS_MODULE}.py'), 'w') as settings_file:
+            settings_file.write(SETTINGS_TEMPLATE.format(database=os.path.join(directory, 'bench.sqlite3')))
+        sys.path.insert(0, directory)
+        os.environ['DJANGO_SETTINGS_MODULE'] = SETTINGS_MODULE
+        bench_utils.setup_django()
+        from django.core.management import call_command
+        call_command('migrate', verbosity=0)
+        clients = seed(args.users, args.tasks_per_user, args.shared_per_user)
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join([directory, bench_utils.PROJECT_ROOT]))
+
+        print(f"📊 {args.users} usuários, {args.users * args.tasks_per_user} tarefas, um processo por servidor:")
+        for concurrency in (int(value) for value in args.concurrency.split(',')):
+            for label, arguments, async_views in SERVERS:
+                process, port = start_server(arguments, async_views, env)
+                try:
+                    latencies, errors = asyncio.run(load(port, clients, concurrency, args.duration, args.warmup))
+                finally:
+                    process.terminate()
+                    process.wait()
+                latencies.sort()
+                print(f"   {f'{label}, {concurrency} conexões':<48} {len(latencies) / args.duration:7.0f} req/s   "
+                      f"p50 {statistics.median(latencies):7.1f} ms   "
+                      f"p99 {latencies[int(len(latencies) * 0.99)]:7.1f} ms   erros {len(errors)}")
+
+
+if __name__ == "__main__":
+    main()
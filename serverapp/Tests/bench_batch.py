@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+import argparse
+import time
+
+import bench_utils
+
+if __name__ == "__main__":
+    bench_utils.setup_django()
+
+
+def client_for(user):
+    from rest_framework.test import APIClient
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+def individual_requests(client, operations):
+    for operation in operations:
+        if operation['op'] == 'create':
+            response = client.post('/api/tasks/', operation['data'], format='json')
+        elif operation['op'] == 'update':
+            response = client.patch(f"/api/tasks/{operation['id']}/", operation['data'], format='json')
+        else:
+            response = client.delete(f"/api/tasks/{operation['id']}/")
+        assert response.status_code < 300, response.content
+
+
+def batch_request(client, operations, size):
+    for start in range(0, len(operations), size):
+        response = client.post('/api/tasks/batch/', {'operations': operations[start:start + size]}, format='json')
+        assert response.status_code == 200 and response.data['applied'], response.content
+
+
+def run(label, user, operations, func):
+    from django.db import transaction
+    # Cada cenário roda e é desfeito, para que todos partam do mesmo estado
+    sid = transaction.savepoint()
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    transaction.savepoint_rollback(sid)
+    print(f"   {label:<40} {elapsed * 1000:9.1f} ms   {len(operations) / elapsed:9.0f} ops/s")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do endpoint de lote vs. requisições individuais")
+    parser.add_argument('--operations', type=int, default=500)
+    parser.add_argument('--batch-size', type=int, default=500)
+    args = parser.parse_args()
+
+    from django.db import transaction
+    from tasks.models import Task
+    old_name = bench_utils.create_benchmark_db()
+    try:
+        user = bench_utils.create_user('bench@example.com')
+        client = client_for(user)
+        bench_utils.seed_tasks(user, args.operations * 2)
+        task_ids = list(Task.objects.order_by('id').values_list('id', flat=True))
+        third = args.operations // 3
+        scenarios = {
+            'create': [{'op': 'create', 'data': {'title': f'Nova {i}', 'tags': 'lote, bench'}}
+                       for i in range(args.operations)],
+            'update': [{'op': 'update', 'id': task_id, 'data': {'status': 'completed', 'priority': 'high'}}
+                       for task_id in task_ids[:args.operations]],
+            'update (valores distintos)': [{'op': 'update', 'id': task_id, 'data': {'title': f'Alterada {i}'}}
+                                           for i, task_id in enumerate(task_ids[:args.operations])],
+            'misto': [{'op': 'create', 'data': {'title': f'Nova {i}'}} for i in range(third)]
+                     + [{'op': 'update', 'id': task_id, 'data': {'title': 'Alterada'}}
+                        for task_id in task_ids[:third]]
+                     + [{'op': 'delete', 'id': task_id}
+                        for task_id in task_ids[args.operations:args.operations + args.operations - 2 * third]],
+        }
+        with transaction.atomic():
+            for name, operations in scenarios.items():
+                print(f"📊 {name}: {len(operations)} operações")
+                single = run('requisições individuais', user, operations,
+                             lambda: individual_requests(client, operations))
+                batch = run(f'/api/tasks/batch/ (lotes de {args.batch_size})', user, operations,
+                            lambda: batch_request(client, operations, args.batch_size))
+                print(f"   {'ganho':<40} {single / batch:9.1f}x")
+    finally:
+        bench_utils.destroy_benchmark_db(old_name)
+
+
+if __name__ == "__main__":
+    main()
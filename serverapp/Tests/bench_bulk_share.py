@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+import argparse
+import time
+
+import bench_utils
+
+if __name__ == "__main__":
+    bench_utils.setup_django()
+
+
+def individual_requests(client, task_ids, emails):
+    for task_id in task_ids:
+        for email in emails:
+            response = client.post(f'/api/tasks/{task_id}/shared-users/', {'email': email}, format='json')
+            assert response.status_code == 200, response.content
+
+
+def bulk_request(client, task_ids, emails):
+    response = client.post('/api/tasks/bulk-share/', {'task_ids': task_ids, 'emails': emails}, format='json')
+    assert response.status_code == 200 and response.data['summary']['shared'] == len(task_ids) * len(emails)
+
+
+def run(label, pairs, func):
+    from django.db import transaction
+    # Cada cenário roda e é desfeito, para que ambos partam do mesmo estado
+    sid = transaction.savepoint()
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    transaction.savepoint_rollback(sid)
+    print(f"   {label:<40} {elapsed * 1000:9.1f} ms   {pairs / elapsed:9.0f} pares/s")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do compartilhamento em lote vs. um POST por par")
+    parser.add_argument('--tasks', type=int, default=200)
+    parser.add_argument('--users', type=int, default=5)
+    args = parser.parse_args()
+
+    from django.db import transaction
+    from rest_framework.test import APIClient
+    from tasks.models import Task
+    old_name = bench_utils.create_benchmark_db()
+    try:
+        owner = bench_utils.create_user('owner@example.com')
+        emails = [bench_utils.create_user(f'member{i}@example.com').email for i in range(args.users)]
+        bench_utils.seed_tasks(owner, args.tasks)
+        task_ids = list(Task.objects.order_by('id').values_list('id', flat=True))
+        client = APIClient()
+        client.force_authenticate(user=owner)
+        pairs = len(task_ids) * len(emails)
+        print(f"📊 Compartilhar {len(task_ids)} tarefas com {len(emails)} usuários ({pairs} pares):")
+        with transaction.atomic():
+            single = run('POST /shared-users/ por par', pairs, lambda: individual_requests(client, task_ids, emails))
+            bulk = run('POST /bulk-share/', pairs, lambda: bulk_request(client, task_ids, emails))
+        print(f"   {'ganho':<40} {single / bulk:9.1f}x")
+    finally:
+        bench_utils.destroy_benchmark_db(old_name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+import argparse
+
+import bench_utils
+
+if __name__ == "__main__":
+    bench_utils.setup_django()
+
+
+def client_for(user):
+    from rest_framework.test import APIClient
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+def full_refetch(client):
+    # O que o webapp faz hoje: percorre a listagem inteira (cursor, páginas de 1000)
+    from django.core.cache import cache
+    cache.clear()
+    received = 0
+    params = {'pagination': 'cursor', 'page_size': 1000}
+    while True:
+        response = client.get('/api/tasks/', params)
+        assert response.status_code == 200, response.content
+        received += len(response.content)
+        if not response.data['next_cursor']:
+            return received
+        params['cursor'] = response.data['next_cursor']
+
+
+def poll_changes(client, since):
+    received = 0
+    while True:
+        response = client.get('/api/tasks/changes/', {'since': since})
+        assert response.status_code == 200, response.content
+        received += len(response.content)
+        since = response.data['next_since']
+        if not response.data['has_more']:
+            return received
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do feed de alterações vs. rebaixar a listagem inteira")
+    parser.add_argument('--steps', default='10000,100000', help='Totais de tarefas do usuário, separados por vírgula')
+    parser.add_argument('--changed', type=int, default=20, help='Tarefas alteradas entre duas sincronizações')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    from django.db import connection, transaction
+    from django.db.models import Max
+    from tasks.changes import DROP_CHANGE_TRIGGERS_SQL
+    from tasks.models import Task, TaskChange
+    old_name = bench_utils.create_benchmark_db()
+    try:
+        user = bench_utils.create_user('bench@example.com')
+        client = client_for(user)
+        seeded = 0
+        for step in sorted(int(value) for value in args.steps.split(',')):
+            bench_utils.seed_tasks(user, step - seeded)
+            seeded = step
+            # Token de um cliente já sincronizado: o fim atual do feed
+            since = TaskChange.objects.aggregate(last=Max('id'))['last']
+            changed = list(Task.objects.order_by('?').values_list('id', flat=True)[:args.changed])
+            for task_id in changed[:-1]:
+                Task.objects.filter(id=task_id).update(title='Alterada')
+            Task.objects.filter(id=changed[-1]).delete()
+
+            print(f"📊 {step} tarefas, {args.changed} alteradas desde a última sincronização:")
+            size, samples = bench_utils.timed(lambda: full_refetch(client), args.repeat)
+            bench_utils.report(f'listagem inteira ({size // 1024} KiB)', samples)
+            size, samples = bench_utils.timed(lambda: poll_changes(client, since), args.repeat)
+            bench_utils.report(f'/api/tasks/changes/ ({size} bytes)', samples)
+
+            # Custo dos triggers na escrita: UPDATE de 1000 tarefas com e sem eles (o
+            # rollback do savepoint recria os triggers removidos)
+            ids = list(Task.objects.order_by('id').values_list('id', flat=True)[:1000])
+            for label, statements in (('update() de 1000 tarefas', []),
+                                      ('update() de 1000 tarefas, sem triggers', DROP_CHANGE_TRIGGERS_SQL)):
+                with transaction.atomic():
+                    sid = transaction.savepoint()
+                    with connection.cursor() as cursor:
+                        for statement in statements:
+                            cursor.execute(statement)
+                    _, samples = bench_utils.timed(
+                        lambda: Task.objects.filter(id__in=ids).update(title='Bench'), args.repeat
+                    )
+                    transaction.savepoint_rollback(sid)
+                bench_utils.report(label, samples)
+    finally:
+        bench_utils.destroy_benchmark_db(old_name)
+
+
+if __name__ == "__main__":
+    main()
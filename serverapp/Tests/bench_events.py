@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+import argparse
+import asyncio
+import resource
+import socket
+import statistics
+import time
+
+import bench_utils
+
+if __name__ == "__main__":
+    bench_utils.setup_django()
+
+
+def rss_mb():
+    with open('/proc/self/status') as status:
+        for line in status:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def create_users(total):
+    from django.contrib.auth.hashers import make_password
+    from django.contrib.auth.models import User
+    password = make_password('benchpass123')
+    User.objects.bulk_create([
+        User(username=f'sse{i}@example.com', email=f'sse{i}@example.com', password=password)
+        for i in range(total)
+    ], batch_size=1000)
+    return list(User.objects.filter(username__startswith='sse').order_by('id'))
+
+
+async def open_stream(port, token, receive_buffer=None):
+    sock = socket.socket()
+    if receive_buffer:
+        # Cliente lento (ex.: rede móvel): janela TCP pequena, o servidor sente a pressão logo
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, receive_buffer)
+    sock.setblocking(False)
+    await asyncio.get_running_loop().sock_connect(sock, ('127.0.0.1', port))
+    reader, writer = await asyncio.open_connection(sock=sock, limit=4096 if receive_buffer else 2 ** 16)
+    writer.write(
+        f"GET /api/tasks/events/?token={token} HTTP/1.1\r\nHost: localhost\r\n"
+        "Accept: text/event-stream\r\n\r\n".encode()
+    )
+    await writer.drain()
+    head = await reader.readuntil(b'\r\n\r\n')
+    assert b' 200 ' in head.split(b'\r\n', 1)[0], head
+    return reader, writer
+
+
+async def drain(reader, arrivals):
+    # Cliente rápido: lê tudo e anota quando cada evento chegou
+    while True:
+        chunk = await reader.read(65536)
+        if not chunk:
+            return
+        now = time.perf_counter()
+        arrivals.extend([now] * chunk.count(b'event: '))
+
+
+async def main_async(args):
+    import uvicorn
+    from asgiref.sync import sync_to_async
+    from django.conf import settings
+    from rest_framework_simplejwt.tokens import AccessToken
+    from authentication.tokens import StreamToken
+    from tasks.events import encode_event, get_broker
+    from tasks.models import Task
+    from todolist_project.asgi import application
+
+    settings.TASK_EVENTS_QUEUE_SIZE = args.queue_size
+    users = await sync_to_async(create_users)(args.connections)
+    tokens = [str(StreamToken.for_access_token(user, AccessToken.for_user(user))) for user in users]
+
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(
+        application, log_level='warning', lifespan='off', backlog=args.connections,
+    ))
+    serving = asyncio.ensure_future(server.serve(sockets=[sock]))
+    while not server.started:
+        await asyncio.sleep(0.01)
+
+    print(f"📊 {args.connections} conexões SSE ociosas em um processo (cliente e servidor no mesmo processo):")
+    before = rss_mb()
+    started = time.perf_counter()
+    limit = asyncio.Semaphore(200)
+
+    async def connect(index, token):
+        async with limit:
+            return await open_stream(port, token, 4096 if index < args.slow else None)
+    streams = await asyncio.gather(*(connect(index, token) for index, token in enumerate(tokens)))
+    print(f"   {'abrir conexões':<40} {(time.perf_counter() - started) * 1000:9.1f} ms")
+    print(f"   {'memória (RSS) por conexão':<40} {(rss_mb() - before) * 1024 / len(streams):9.1f} KiB")
+
+    cpu = time.process_time()
+    await asyncio.sleep(args.idle)
+    print(f"   {f'CPU ociosa em {args.idle:g} s':<40} {(time.process_time() - cpu) * 1000:9.1f} ms")
+
+    # Uma tarefa compartilhada com todos: uma edição notifica todas as conexões
+    arrivals = [[] for _ in streams]
+    readers = [asyncio.ensure_future(drain(reader, arrived)) for (reader, _), arrived in zip(streams, arrivals)]
+
+    def share_task():
+        task = Task.objects.create(owner=users[0], title='Compartilhada com todos')
+        Task.objects.filter(pk=task.pk).share_with_users(users[1:])
+        return task
+    task = await sync_to_async(share_task)()
+    while sum(map(len, arrivals)) < len(streams):
+        await asyncio.sleep(0.01)
+    for arrived in arrivals:
+        arrived.clear()
+    # A publicação é o último passo de update() (on_commit roda na hora em autocommit),
+    # então o tempo até ele retornar é o da escrita e o resto é a entrega
+    samples = []
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        await sync_to_async(lambda: Task.objects.filter(pk=task.pk).update(title='Editada'))()
+        committed = time.perf_counter()
+        while sum(map(len, arrivals)) < len(streams):
+            await asyncio.sleep(0.001)
+        latencies = sorted((arrived[0] - committed) * 1000 for arrived in arrivals)
+        samples.append(((committed - started) * 1000, latencies[len(latencies) // 2], latencies[-1]))
+        for arrived in arrivals:
+            arrived.clear()
+    print(f"   {'update() da tarefa compartilhada':<40} {statistics.median(s[0] for s in samples):9.1f} ms")
+    print(f"   {'entrega após o commit (mediana)':<40} {statistics.median(s[1] for s in samples):9.1f} ms")
+    print(f"   {'entrega após o commit (última conexão)':<40} {statistics.median(s[2] for s in samples):9.1f} ms")
+
+    # Polling equivalente: cada cliente consultando /api/tasks/changes/ a cada intervalo
+    from rest_framework.test import APIClient
+    client = APIClient()
+    client.force_authenticate(user=users[1])
+    _, polls = await sync_to_async(bench_utils.timed)(lambda: client.get('/api/tasks/changes/', {'since': 10 ** 9}), 20)
+    per_second = len(streams) / args.poll_interval
+    print(f"   {f'polling equivalente (a cada {args.poll_interval:g} s)':<40} "
+          f"{per_second:9.0f} req/s  ~{per_second * statistics.median(polls) / 10:.0f}% de um núcleo")
+
+    # Clientes lentos param de ler: a fila limitada troca o excedente por `resync`,
+    # enquanto os rápidos (o mesmo número) recebem tudo
+    for reader in readers[:args.slow]:
+        reader.cancel()
+    slow_ids = [user.id for user in users[:args.slow]]
+    fast_ids = [user.id for user in users[args.slow:args.slow * 2]]
+    fast_arrivals = arrivals[args.slow:args.slow * 2]
+    for arrived in fast_arrivals:
+        arrived.clear()
+    broker = get_broker()
+    message = encode_event('updated', {'task_ids': list(range(1, 1000))})
+    longest = 0
+    for _ in range(args.burst):
+        broker.publish(slow_ids + fast_ids, message)
+        await asyncio.sleep(0)
+        longest = max(longest, max(len(s.messages) for user_id in slow_ids for s in broker.subscribers[user_id]))
+
+    def dropped(user_id):
+        return any(s.dropped for s in broker.subscribers[user_id])
+    while any(len(arrived) < args.burst and not dropped(user_id) for user_id, arrived in zip(fast_ids, fast_arrivals)):
+        await asyncio.sleep(0.01)
+    resynced = sum(1 for user_id in slow_ids if dropped(user_id))
+    complete = sum(1 for arrived in fast_arrivals if len(arrived) == args.burst)
+    print(f"📊 {args.burst} eventos de {len(message)} bytes para {args.slow} clientes lentos e {args.slow} rápidos:")
+    print(f"   {'maior fila de um cliente lento':<40} {longest:9d} mensagens (limite {args.queue_size})")
+    print(f"   {'clientes lentos com resync':<40} {resynced:9d} de {len(slow_ids)}")
+    print(f"   {'clientes rápidos com todos os eventos':<40} {complete:9d} de {len(fast_ids)}")
+
+    for reader in readers:
+        reader.cancel()
+    for _, writer in streams:
+        writer.close()
+    server.should_exit = True
+    await serving
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga do canal SSE: conexões ociosas, fan-out e clientes lentos")
+    parser.add_argument('--connections', type=int, default=5000)
+    parser.add_argument('--idle', type=float, default=5, help='Segundos medindo a CPU com as conexões ociosas')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--poll-interval', type=float, default=30, help='Intervalo do polling usado na comparação')
+    parser.add_argument('--burst', type=int, default=2000, help='Eventos publicados no cenário de clientes lentos')
+    parser.add_argument('--slow', type=int, default=100, help='Clientes lentos (e o mesmo número de rápidos)')
+    parser.add_argument('--queue-size', type=int, default=100)
+    args = parser.parse_args()
+    # Cliente e servidor no mesmo processo: dois descritores por conexão
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < args.connections * 2 + 100:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (min(hard, args.connections * 2 + 100), hard))
+    old_name = bench_utils.create_benchmark_db()
+    try:
+        asyncio.run(main_async(args))
+    finally:
+        bench_utils.destroy_benchmark_db(old_name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+import argparse
+import resource
+import time
+
+import bench_utils
+
+if __name__ == "__main__":
+    bench_utils.setup_django()
+
+
+def current_rss_mb():
+    # RSS atual (Linux); em outros sistemas usa o pico informado pelo resource
+    try:
+        with open('/proc/self/statm') as statm:
+            pages = int(statm.read().split()[1])
+        return pages * resource.getpagesize() / 1024 / 1024
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_export(user, export_format):
+    from rest_framework.test import APIRequestFactory, force_authenticate
+    from tasks.views import task_export
+    request = APIRequestFactory().get('/api/tasks/export/', {'export_format': export_format})
+    force_authenticate(request, user=user)
+    response = task_export(request)
+    start_rss = peak_rss = current_rss_mb()
+    start = time.perf_counter()
+    lines = 0
+    size = 0
+    for number, chunk in enumerate(response.streaming_content):
+        lines += chunk.count(b'\n')
+        size += len(chunk)
+        if number % 100 == 0:
+            peak_rss = max(peak_rss, current_rss_mb())
+    elapsed = time.perf_counter() - start
+    return lines, size, elapsed, start_rss, max(peak_rss, current_rss_mb())
+
+
+def run_export_asgi(user, export_format):
+    # A requisição passa pelo ASGIHandler, como sob uvicorn: o tempo até o primeiro
+    # bloco e o pico de memória mostram se a resposta é lida inteira antes do envio
+    import asyncio
+    from django.core.handlers.asgi import ASGIHandler
+    from django.test import AsyncRequestFactory
+    from rest_framework_simplejwt.tokens import AccessToken
+    scope = AsyncRequestFactory()._base_scope(
+        path='/api/tasks/export/', query_string=f'export_format={export_format}'.encode(),
+        headers=[(b'authorization', f'Bearer {AccessToken.for_user(user)}'.encode())],
+    )
+    stats = {'lines': 0, 'size': 0, 'chunks': 0, 'first': None}
+    start_rss = current_rss_mb()
+    peaks = [start_rss]
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        if message['type'] != 'http.response.body':
+            return
+        body = message.get('body', b'')
+        if body and stats['first'] is None:
+            stats['first'] = time.perf_counter() - start
+            peaks.append(current_rss_mb())
+        stats['lines'] += body.count(b'\n')
+        stats['size'] += len(body)
+        stats['chunks'] += 1
+        if stats['chunks'] % 100 == 0:
+            peaks.append(current_rss_mb())
+    start = time.perf_counter()
+    asyncio.run(ASGIHandler()(scope, receive, send))
+    elapsed = time.perf_counter() - start
+    peaks.append(current_rss_mb())
+    return stats['lines'], stats['size'], elapsed, start_rss, max(peaks), stats['first']
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da exportação em streaming (NDJSON/CSV)")
+    parser.add_argument('--steps', default='100000,1000000',
+                        help='Totais de tarefas do usuário a cada medição')
+    parser.add_argument('--export-format', default='ndjson', choices=['ndjson', 'csv'])
+    parser.add_argument('--asgi', action='store_true',
+                        help='Exporta pelo ASGIHandler (uvicorn) em vez de chamar a view direto (WSGI)')
+    args = parser.parse_args()
+
+    old_name = bench_utils.create_benchmark_db()
+    try:
+        user = bench_utils.create_user('bench@example.com')
+        total = 0
+        for step in [int(value) for value in args.steps.split(',')]:
+            print(f"📦 Populando até {step} tarefas do usuário...")
+            bench_utils.seed_tasks(user, step - total, text=True)
+            total = step
+            if args.asgi:
+                lines, size, elapsed, start_rss, peak_rss, first = run_export_asgi(user, args.export_format)
+            else:
+                lines, size, elapsed, start_rss, peak_rss = run_export(user, args.export_format)
+                first = None
+            print(f"📊 Exportação {args.export_format}{' (ASGI)' if args.asgi else ''}: {lines} linhas, "
+                  f"{size / 1024 / 1024:.1f} MB em {elapsed:.1f}s ({lines / elapsed:,.0f} linhas/s)")
+            if first is not None:
+                print(f"   primeiro bloco em {first * 1000:.0f} ms")
+            print(f"   RSS no início {start_rss:8.1f} MB   pico durante o streaming {peak_rss:8.1f} MB   "
+                  f"(+{peak_rss - start_rss:.1f} MB)")
+    finally:
+        bench_utils.destroy_benchmark_db(old_name)
+
+
+if __name__ == "__main__":
+    main()
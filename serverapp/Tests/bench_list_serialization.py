@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+import argparse
+
+import bench_utils
+
+if __name__ == "__main__":
+    bench_utils.setup_django()
+
+
+def serializer_path(user, task_ids, request):
+    from tasks.models import Task
+    from tasks.serializers import TaskListSerializer
+    tasks = Task.objects.with_related().in_bulk(task_ids)
+    return TaskListSerializer([tasks[task_id] for task_id in task_ids], many=True, context={'request': request}).data
+
+
+def fast_path(user, task_ids, fields):
+    from tasks.serializers import load_task_rows, serialize_task_rows
+    return serialize_task_rows(load_task_rows(task_ids, fields), fields, user)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da serialização da listagem (DRF vs .values())")
+    parser.add_argument('--rows', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    from rest_framework.renderers import JSONRenderer
+    from rest_framework.test import APIRequestFactory
+    from tasks.models import Task
+    from tasks.serializers import TASK_LIST_FIELDS, TASK_LIST_PRESETS
+    old_name = bench_utils.create_benchmark_db()
+    try:
+        user = bench_utils.create_user('bench@example.com')
+        print(f"📦 Criando {args.rows} tarefas...")
+        bench_utils.seed_tasks(user, args.rows, text=True)
+        task_ids = list(Task.objects.order_by('-created_at').values_list('id', flat=True))
+        request = APIRequestFactory().get('/api/tasks/')
+        request.user = user
+        renderer = JSONRenderer()
+        expected = renderer.render(serializer_path(user, task_ids, request))
+        assert renderer.render(fast_path(user, task_ids, TASK_LIST_FIELDS)) == expected, "Saídas diferentes"
+        print(f"📊 Carregar + serializar + renderizar {args.rows} tarefas:")
+        _, samples = bench_utils.timed(lambda: renderer.render(serializer_path(user, task_ids, request)), args.repeat)
+        bench_utils.report('TaskListSerializer', samples)
+        _, samples = bench_utils.timed(lambda: renderer.render(fast_path(user, task_ids, TASK_LIST_FIELDS)), args.repeat)
+        bench_utils.report('.values() (todos os campos)', samples)
+        compact = TASK_LIST_PRESETS['compact']
+        _, samples = bench_utils.timed(lambda: renderer.render(fast_path(user, task_ids, compact)), args.repeat)
+        bench_utils.report('.values() (fields=compact)', samples)
+    finally:
+        bench_utils.destroy_benchmark_db(old_name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import bench_utils
+
+# O servidor é o de produção (manage.py serve, gunicorn gthread) em processos próprios,
+# então o banco precisa ser um arquivo: as configurações do benchmark apontam
+# DATABASES para um SQLite temporário
+SETTINGS_MODULE = 'bench_login_settings'
+
+SETTINGS_TEMPLATE = """from todolist_project.settings import *  # noqa: F401,F403
+
+DEBUG = False
+DATABASES = {{'default': dict(DATABASES['default'], NAME={database!r})}}
+"""
+
+SCENARIOS = [
+    ('sem logins (referência)', {}, False),
+    ('logins, sem limite de hashes', {'PASSWORD_HASHING_CONCURRENCY': '0'}, True),
+    ('logins, limite de hashes simultâneos', {}, True),
+]
+
+
+def seed(users_total, tasks_per_user):
+    from django.contrib.auth.hashers import make_password
+    from django.contrib.auth.models import User
+    from rest_framework_simplejwt.tokens import AccessToken
+    # Um único hash para todos: criar milhares de senhas levaria minutos
+    password = make_password('benchpass123')
+    User.objects.bulk_create([
+        User(username=f'login{i}@example.com', email=f'login{i}@example.com', password=password)
+        for i in range(users_total)
+    ])
+    users = list(User.objects.order_by('id'))
+    bench_utils.seed_tasks(users, users_total * tasks_per_user)
+    return [(user.email, str(AccessToken.for_user(user))) for user in users]
+
+
+async def request(reader, writer, method, path, headers=(), body=b''):
+    lines = [f"{method} {path} HTTP/1.1", "Host: localhost", f"Content-Length: {len(body)}", *headers]
+    writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode() + body)
+    return await bench_utils.read_response(reader)
+
+
+async def task_client(port, token, deadline, warmup_until, latencies, errors):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            status = await request(reader, writer, 'GET', '/api/tasks/stats/', [f'Authorization: Bearer {token}'])
+            if started < warmup_until:
+                continue
+            latencies.append((time.perf_counter() - started) * 1000)
+            if status >= 400:
+                errors.append(status)
+    finally:
+        writer.close()
+
+
+async def login_client(port, email, deadline, logins):
+    body = json.dumps({'email': email, 'password': 'benchpass123'}).encode()
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        while time.perf_counter() < deadline:
+            status = await request(reader, writer, 'POST', '/api/auth/login/', ['Content-Type: application/json'], body)
+            logins.append(status)
+            if status == 503:
+                # Como um cliente que respeita o Retry-After, encurtado para o benchmark
+                await asyncio.sleep(0.2)
+    finally:
+        writer.close()
+
+
+async def load(port, clients, task_clients, login_clients, duration, warmup):
+    latencies, errors, logins = [], [], []
+    warmup_until = time.perf_counter() + warmup
+    deadline = warmup_until + duration
+    await asyncio.gather(
+        *(task_client(port, clients[i % len(clients)][1], deadline, warmup_until, latencies, errors)
+          for i in range(task_clients)),
+        *(login_client(port, clients[-1 - i % len(clients)][0], deadline, logins) for i in range(login_clients)),
+    )
+    return latencies, errors, logins
+
+
+def start_server(env, workers, threads):
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    process = subprocess.Popen(
+        [sys.executable, 'manage.py', 'serve', '--bind', f'127.0.0.1:{port}', '--worker-class', 'gthread',
+         '--workers', str(workers), '--threads', str(threads), '--max-requests', '0'],
+        cwd=bench_utils.PROJECT_ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    for _ in range(300):
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return process, port
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError('O servidor não subiu')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latência das rotas de tarefas durante uma onda de logins")
+    parser.add_argument('--task-clients', type=int, default=8, help='Conexões consultando /api/tasks/stats/')
+    parser.add_argument('--login-clients', type=int, default=16, help='Conexões fazendo login sem parar')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=10, help='Segundos medidos em cada cenário')
+    parser.add_argument('--warmup', type=float, default=2)
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--tasks-per-user', type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        with open(os.path.join(directory, f'{SETTINGS_MODULE}.py'), 'w') as settings_file:
+            settings_file.write(SETTINGS_TEMPLATE.format(database=os.path.join(directory, 'bench.sqlite3')))
+        sys.path.insert(0, directory)
+        os.environ['DJANGO_SETTINGS_MODULE'] = SETTINGS_MODULE
+        bench_utils.setup_django()
+        from django.conf import settings
+        from django.core.management import call_command
+        call_command('migrate', verbosity=0)
+        clients = seed(args.users, args.tasks_per_user)
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join([directory, bench_utils.PROJECT_ROOT]))
+
+        print(f"📊 {args.workers} workers x {args.threads} threads, {args.task_clients} clientes de tarefas, "
+              f"{args.login_clients} de login, PBKDF2 com {settings.PASSWORD_HASH_ITERATIONS} iterações:")
+        for label, overrides, storm in SCENARIOS:
+            process, port = start_server(dict(env, **overrides), args.workers, args.threads)
+            try:
+                latencies, errors, logins = asyncio.run(load(
+                    port, clients, args.task_clients, args.login_clients if storm else 0, args.duration, args.warmup
+                ))
+            finally:
+                process.terminate()
+                process.wait()
+            latencies.sort()
+            print(f"   {label:<38} tarefas {len(latencies) / args.duration:6.0f} req/s   "
+                  f"p50 {statistics.median(latencies):7.1f} ms   p99 {latencies[int(len(latencies) * 0.99)]:7.1f} ms   "
+                  f"erros {len(errors)}   logins {logins.count(200) / args.duration:5.1f}/s   503 {logins.count(503)}")
+
+
+if __name__ == "__main__":
+    main()
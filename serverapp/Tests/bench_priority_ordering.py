@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+import argparse
+
+import bench_utils
+
+if __name__ == "__main__":
+    bench_utils.setup_django()
+
+from django.core.paginator import Paginator
+from django.db import OperationalError, models
+from django.db.models import Q
+
+
+def legacy_priority_page(user, page_size, descending):
+    # Reprodução da ordenação antiga: ordena tudo em Python e monta um CASE gigante
+    from tasks.models import Task
+    queryset = Task.objects.filter(Q(owner=user) | Q(shared_with=user)).distinct()
+    priority_order = {'urgent': 4, 'high': 3, 'medium': 2, 'low': 1}
+    queryset = sorted(queryset, key=lambda x: priority_order.get(x.priority, 2), reverse=descending)
+    task_ids = [task.id for task in queryset]
+    queryset = Task.objects.filter(id__in=task_ids)
+    preserved = models.Case(*[models.When(pk=pk, then=pos) for pos, pk in enumerate(task_ids)])
+    page = Paginator(queryset.order_by(preserved), page_size).get_page(1)
+    return [task.id for task in page]
+
+
+def rank_priority_page(user, page_size, descending):
+    from tasks.models import Task
+    queryset = Task.objects.filter(Q(owner=user) | Q(shared_with=user)).distinct()
+    if descending:
+        queryset = queryset.order_by('-priority_rank', '-created_at')
+    else:
+        queryset = queryset.order_by('priority_rank', 'created_at')
+    page = Paginator(queryset, page_size).get_page(1)
+    return [task.id for task in page]
+
+
+def created_at_page(user, page_size):
+    from tasks.models import Task
+    queryset = Task.objects.filter(Q(owner=user) | Q(shared_with=user)).distinct().order_by('-created_at')
+    page = Paginator(queryset, page_size).get_page(1)
+    return [task.id for task in page]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da ordenação por prioridade")
+    parser.add_argument('--tasks', type=int, default=100000)
+    parser.add_argument('--page-size', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    old_name = bench_utils.create_benchmark_db()
+    try:
+        user = bench_utils.create_user('bench@example.com')
+        print(f"📦 Criando {args.tasks} tarefas para um usuário...")
+        bench_utils.seed_tasks(user, args.tasks)
+        print(f"📊 Primeira página (page_size={args.page_size}):")
+        _, samples = bench_utils.timed(lambda: created_at_page(user, args.page_size), args.repeat)
+        bench_utils.report('-created_at (referência)', samples)
+        _, samples = bench_utils.timed(lambda: rank_priority_page(user, args.page_size, True), args.repeat)
+        bench_utils.report('-priority via priority_rank', samples)
+        try:
+            _, samples = bench_utils.timed(lambda: legacy_priority_page(user, args.page_size, True), args.repeat)
+            bench_utils.report('-priority legado (sorted + CASE)', samples)
+        except OperationalError as e:
+            # O CASE com um WHEN por tarefa estoura o limite de variáveis do SQLite
+            print(f"   {'-priority legado (sorted + CASE)':<40} falhou: {e}")
+    finally:
+        bench_utils.destroy_benchmark_db(old_name)
+
+
+if __name__ == "__main__":
+    main()
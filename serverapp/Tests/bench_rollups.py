@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+import argparse
+import time
+
+import bench_utils
+
+if __name__ == "__main__":
+    bench_utils.setup_django()
+
+
+def spread_over_year(user):
+    # Distribui criação/conclusão/cancelamento pelos últimos 365 dias direto no
+    # SQL (os triggers mantêm os rollups a cada linha alterada)
+    from django.db import connection
+    with connection.cursor() as cursor:
+        cursor.execute("""
+            UPDATE tasks_task SET
+                created_at = datetime('now', '-' || (abs(random()) %% 365) || ' days', '-' || (abs(random()) %% 86400) || ' seconds')
+            WHERE owner_id = %s
+        """, [user.pk])
+        cursor.execute("""
+            UPDATE tasks_task SET completed_at = datetime(created_at, '+' || (abs(random()) %% 20) || ' days')
+            WHERE owner_id = %s AND status = 'completed'
+        """, [user.pk])
+        cursor.execute("""
+            UPDATE tasks_task SET cancelled_at = datetime(created_at, '+' || (abs(random()) %% 20) || ' days')
+            WHERE owner_id = %s AND status = 'cancelled'
+        """, [user.pk])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da série diária: rollups vs. agregação sobre Task")
+    parser.add_argument('--steps', default='10000,100000', help='Totais de tarefas do usuário, separados por vírgula')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    from datetime import timedelta
+    from django.db import transaction
+    from django.utils import timezone
+    from tasks import rollups
+    old_name = bench_utils.create_benchmark_db()
+    try:
+        user = bench_utils.create_user('bench@example.com')
+        end = timezone.localdate()
+        start = end - timedelta(days=364)
+        seeded = 0
+        for step in sorted(int(value) for value in args.steps.split(',')):
+            bench_utils.seed_tasks(user, step - seeded)
+            seeded = step
+            spread_over_year(user)
+            live = rollups._live_deltas
+            print(f"📊 {step} tarefas, série de 365 dias:")
+            _, samples = bench_utils.timed(lambda: rollups.daily_series(user, start, end), args.repeat)
+            bench_utils.report('TaskDailyRollup', samples)
+            expected = rollups.daily_series(user, start, end)
+            rollups._rollup_deltas, original = live, rollups._rollup_deltas
+            try:
+                result, samples = bench_utils.timed(lambda: rollups.daily_series(user, start, end), args.repeat)
+            finally:
+                rollups._rollup_deltas = original
+            assert result == expected, "Séries diferentes"
+            bench_utils.report('Agregação sobre Task', samples)
+            started = time.perf_counter()
+            with transaction.atomic():
+                rows = rollups.rebuild_rollups()
+            print(f"   {'backfill_task_rollups':<40} {(time.perf_counter() - started) * 1000:9.1f} ms   ({rows} linhas)")
+    finally:
+        bench_utils.destroy_benchmark_db(old_name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+import argparse
+
+import bench_utils
+
+if __name__ == "__main__":
+    bench_utils.setup_django()
+
+
+def fts_search(user, query):
+    from tasks.models import TaskAccess
+    from tasks.search import search_tasks
+    queryset = search_tasks(TaskAccess.objects.filter(user=user), query, user, task_column='task_id')
+    page = list(queryset.order_by('search_rank', '-created_at')[:20])
+    return len(page), queryset.count()
+
+
+def icontains_search(user, query):
+    from tasks.models import TaskAccess
+    queryset = TaskAccess.objects.filter(user=user, title__icontains=query)
+    page = list(queryset.order_by('-created_at')[:20])
+    return len(page), queryset.count()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da busca textual (FTS5 vs LIKE)")
+    parser.add_argument('--steps', default='250000,1000000,2000000',
+                        help='Totais de tarefas no banco a cada medição')
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--user-tasks', type=int, default=2000,
+                        help='Tarefas do usuário que faz a busca')
+    parser.add_argument('--query', default='reuniao orçam')
+    parser.add_argument('--like', default='reunião', help='Termo do LIKE de referência')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    from tasks.search import fts_available
+    old_name = bench_utils.create_benchmark_db()
+    try:
+        if not fts_available():
+            print("⚠️  SQLite sem FTS5: a busca usa title__icontains")
+        user = bench_utils.create_user('bench@example.com')
+        others = [bench_utils.create_user(f'bench{i}@example.com') for i in range(args.users)]
+        bench_utils.seed_tasks(user, args.user_tasks, text=True)
+        total = args.user_tasks
+        for step in [int(value) for value in args.steps.split(',')]:
+            print(f"📦 Populando até {step} tarefas ({args.users} usuários)...")
+            bench_utils.seed_tasks(others, step - total, text=True)
+            total = step
+            print(f"📊 Busca '{args.query}' para um usuário com {args.user_tasks} tarefas:")
+            (found, count), samples = bench_utils.timed(lambda: fts_search(user, args.query), args.repeat)
+            bench_utils.report(f'FTS5 ({count} resultados)', samples)
+            (found, count), samples = bench_utils.timed(lambda: icontains_search(user, args.like), args.repeat)
+            bench_utils.report(f"LIKE '%{args.like}%' ({count} resultados)", samples)
+    finally:
+        bench_utils.destroy_benchmark_db(old_name)
+
+
+if __name__ == "__main__":
+    main()
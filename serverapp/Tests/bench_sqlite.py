@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+import argparse
+import logging
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import bench_utils
+
+# Cada perfil roda em um processo próprio, com um módulo de configurações gerado
+# apontando para um SQLite temporário em arquivo (WAL não se aplica ao banco em memória)
+PROFILES = {
+    'padrão': """from todolist_project.settings import *  # noqa: F401,F403
+
+DATABASES = {{'default': {{'ENGINE': 'django.db.backends.sqlite3', 'NAME': {database!r}}}}}
+""",
+    'ajustado': """from todolist_project.settings import *  # noqa: F401,F403
+
+DATABASES = {{'default': dict(DATABASES['default'], NAME={database!r})}}
+""",
+}
+
+
+def list_page(user_id):
+    # O que a listagem lê em uma requisição: a página de TaskAccess e as linhas das tarefas
+    from tasks.models import TaskAccess
+    from tasks.serializers import TASK_LIST_FIELDS, load_task_rows
+    task_ids = list(
+        TaskAccess.objects.filter(user_id=user_id).order_by('-created_at').values_list('task_id', flat=True)[:20]
+    )
+    return load_task_rows(task_ids, TASK_LIST_FIELDS)
+
+
+def write_request(task):
+    # Uma requisição de escrita pelas views reais (middlewares, verificações e a
+    # manutenção de TaskAccess): alternar, editar, compartilhar/remover ou criar e excluir
+    from rest_framework.test import APIClient
+    task_id, owner, other = task
+    client = APIClient()
+    client.force_authenticate(user=owner)
+    operation = random.choice(('toggle', 'edit', 'share', 'create'))
+    if operation == 'toggle':
+        responses = [client.patch(f'/api/tasks/{task_id}/toggle/')]
+    elif operation == 'edit':
+        responses = [client.patch(f'/api/tasks/{task_id}/', {'title': f'Editada {random.random()}'}, format='json')]
+    elif operation == 'share':
+        responses = [
+            client.post(f'/api/tasks/{task_id}/shared-users/', {'email': other.email}, format='json'),
+            client.post(f'/api/tasks/{task_id}/remove-user/', {'user_id': other.id}, format='json'),
+        ]
+    else:
+        created = client.post('/api/tasks/', {'title': 'Temporária'}, format='json')
+        responses = [created]
+        if created.status_code == 201:
+            responses.append(client.delete(f"/api/tasks/{created.data['id']}/"))
+    for response in responses:
+        if response.status_code >= 500:
+            raise RuntimeError(response.content.decode())
+
+
+def worker(operation, choices, deadline, latencies, errors):
+    from django.db import close_old_connections
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            operation(random.choice(choices))
+            latencies.append((time.perf_counter() - started) * 1000)
+        except Exception as error:
+            errors.append(str(error))
+        # Fim de uma "requisição": com CONN_MAX_AGE = 0 a conexão é fechada aqui
+        close_old_connections()
+
+
+def run_profile(args):
+    bench_utils.setup_django()
+    # Os 500 são contados no relatório; o traceback de cada um só polui a saída
+    logging.getLogger('django.request').setLevel(logging.CRITICAL)
+    from django.contrib.auth.models import User
+    from django.core.management import call_command
+    from django.db import connection
+    from tasks.models import Task
+    call_command('migrate', verbosity=0)
+    users = [bench_utils.create_user(f'sqlite{i}@example.com') for i in range(args.users)]
+    bench_utils.seed_tasks(users, args.tasks)
+    user_ids = list(User.objects.values_list('id', flat=True))
+    # (tarefa, dono, outro usuário para compartilhar), sempre agindo como o dono
+    position = {user.id: index for index, user in enumerate(users)}
+    tasks = [
+        (task_id, users[position[owner_id]], users[(position[owner_id] + 1) % len(users)])
+        for task_id, owner_id in Task.objects.values_list('id', 'owner_id')
+    ]
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA journal_mode')
+        journal_mode = cursor.fetchone()[0]
+    connection.close()
+
+    deadline = time.perf_counter() + args.duration
+    reads, read_errors, writes, write_errors = [], [], [], []
+    threads = [
+        threading.Thread(target=worker, args=(list_page, user_ids, deadline, reads, read_errors))
+        for _ in range(args.readers)
+    ] + [
+        threading.Thread(target=worker, args=(write_request, tasks, deadline, writes, write_errors))
+        for _ in range(args.writers)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    reads.sort()
+    writes.sort()
+    print(f"   {args.run} (journal_mode={journal_mode}):")
+    for label, samples, errors in (('leituras', reads, read_errors), ('escritas', writes, write_errors)):
+        p99 = samples[int(len(samples) * 0.99)] if samples else float('nan')
+        median = statistics.median(samples) if samples else float('nan')
+        print(f"      {label:<10} {len(samples) / args.duration:8.0f} ops/s   p50 {median:8.2f} ms   "
+              f"p99 {p99:8.2f} ms   erros {len(errors)} ('database is locked' {sum('locked' in error for error in errors)})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Leituras e escritas concorrentes no SQLite: configuração padrão vs. ajustada")
+    parser.add_argument('--readers', type=int, default=8, help='Threads lendo páginas da listagem')
+    parser.add_argument('--writers', type=int, default=4, help='Threads fazendo requisições de escrita pelas views (alternar, editar, compartilhar, criar/excluir)')
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--tasks', type=int, default=20000)
+    parser.add_argument('--run', choices=sorted(PROFILES), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.run:
+        run_profile(args)
+        return
+
+    print(f"📊 {args.readers} leitores e {args.writers} escritores por {args.duration:g} s, {args.tasks} tarefas:")
+    for profile, template in PROFILES.items():
+        with tempfile.TemporaryDirectory() as directory:
+            with open(os.path.join(directory, 'bench_sqlite_settings.py'), 'w') as settings_file:
+                settings_file.write(template.format(database=os.path.join(directory, 'bench.sqlite3')))
+            env = dict(
+                os.environ, DJANGO_SETTINGS_MODULE='bench_sqlite_settings',
+                PYTHONPATH=os.pathsep.join([directory, bench_utils.PROJECT_ROOT]),
+            )
+            subprocess.run([sys.executable, __file__, '--run', profile] + sys.argv[1:], env=env, check=True)
+
+
+if __name__ == "__main__":
+    main()
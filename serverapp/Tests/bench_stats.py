@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+import argparse
+
+import bench_utils
+
+if __name__ == "__main__":
+    bench_utils.setup_django()
+
+
+def legacy_stats(user):
+    # Implementação anterior: ~11 COUNTs e um loop em Python para as atrasadas
+    from tasks.models import Task
+    user_tasks = Task.objects.visible_to(user)
+    total_tasks = user_tasks.count()
+    completed_tasks = user_tasks.filter(is_completed=True).count()
+    return {
+        'total_tasks': total_tasks,
+        'completed_tasks': completed_tasks,
+        'pending_tasks': user_tasks.filter(status='pending').count(),
+        'in_progress_tasks': user_tasks.filter(status='in_progress').count(),
+        'overdue_tasks': sum(1 for task in user_tasks if task.is_overdue),
+        'owned_tasks': user_tasks.filter(owner=user).count(),
+        'shared_tasks': user_tasks.filter(shared_with=user).exclude(owner=user).count(),
+        'priority_breakdown': {
+            priority: user_tasks.filter(priority=priority).count()
+            for priority in ('urgent', 'high', 'medium', 'low')
+        },
+    }
+
+
+def counter_stats(user):
+    from tasks.counters import count_overdue, get_task_counters
+    counters = get_task_counters(user)
+    return {
+        'total_tasks': counters['total'],
+        'completed_tasks': counters['completed'],
+        'pending_tasks': counters['status_pending'],
+        'in_progress_tasks': counters['status_in_progress'],
+        'overdue_tasks': count_overdue(user),
+        'owned_tasks': counters['owned'],
+        'shared_tasks': counters['shared'],
+        'priority_breakdown': {
+            priority: counters[f'priority_{priority}'] for priority in ('urgent', 'high', 'medium', 'low')
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark das estatísticas: COUNTs por chamada vs. TaskCounter")
+    parser.add_argument('--steps', default='1000,10000,100000',
+                        help='Totais de tarefas do usuário, separados por vírgula')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    old_name = bench_utils.create_benchmark_db()
+    try:
+        user = bench_utils.create_user('bench@example.com')
+        seeded = 0
+        for step in sorted(int(value) for value in args.steps.split(',')):
+            bench_utils.seed_tasks(user, step - seeded)
+            seeded = step
+            assert legacy_stats(user) == counter_stats(user), "Resultados diferentes"
+            print(f"📊 {step} tarefas:")
+            _, samples = bench_utils.timed(lambda: legacy_stats(user), args.repeat)
+            bench_utils.report('COUNTs + loop em Python', samples)
+            _, samples = bench_utils.timed(lambda: counter_stats(user), args.repeat)
+            bench_utils.report('TaskCounter + índice de atrasadas', samples)
+    finally:
+        bench_utils.destroy_benchmark_db(old_name)
+
+
+if __name__ == "__main__":
+    main()
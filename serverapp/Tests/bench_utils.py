@@ -0,0 +1,107 @@
+import os
+import sys
+import time
+import statistics
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def setup_django():
+    if PROJECT_ROOT not in sys.path:
+        sys.path.append(PROJECT_ROOT)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'todolist_project.settings')
+    import django
+    django.setup()
+
+
+def create_benchmark_db():
+    # Usa o banco de testes do Django para não tocar no banco de desenvolvimento
+    from django.db import connection
+    return connection.creation.create_test_db(verbosity=0, keepdb=False)
+
+
+def destroy_benchmark_db(old_name):
+    from django.db import connection
+    connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def create_user(username):
+    from django.contrib.auth.models import User
+    return User.objects.create_user(username=username, email=username, password='benchpass123')
+
+
+WORDS = [
+    'reunião', 'relatório', 'deploy', 'backup', 'revisão', 'código', 'cliente', 'orçamento',
+    'equipe', 'documentação', 'servidor', 'banco', 'migração', 'segurança', 'teste', 'produção',
+    'planejamento', 'sprint', 'integração', 'análise', 'suporte', 'contrato', 'apresentação', 'métrica',
+]
+
+
+def random_text(words):
+    import random
+    return ' '.join(random.choice(WORDS) for _ in range(words))
+
+
+def seed_tasks(owners, total, batch_size=5000, text=False):
+    import itertools
+    import random
+    from datetime import timedelta
+    from django.utils import timezone
+    from tasks.models import Task
+    if not isinstance(owners, (list, tuple)):
+        owners = [owners]
+    owner_cycle = itertools.cycle(owners)
+    priorities = ['low', 'medium', 'high', 'urgent']
+    statuses = ['pending', 'in_progress', 'completed', 'cancelled']
+    now = timezone.now()
+    created = 0
+    while created < total:
+        size = min(batch_size, total - created)
+        Task.objects.bulk_create([
+            Task(
+                owner=next(owner_cycle),
+                title=random_text(4) if text else f'Tarefa {created + i}',
+                description=random_text(12) if text else '',
+                priority=random.choice(priorities),
+                status=random.choice(statuses),
+                tags=', '.join(random.sample(WORDS, 2)) if text else '',
+                due_date=now + timedelta(days=random.randint(-30, 30)) if random.random() < 0.7 else None,
+            )
+            for i in range(size)
+        ])
+        created += size
+
+
+def timed(func, repeat=5):
+    samples = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return result, samples
+
+
+def report(label, samples):
+    print(f"   {label:<40} mediana {statistics.median(samples):9.2f} ms   "
+          f"min {min(samples):9.2f} ms   max {max(samples):9.2f} ms")
+
+
+async def read_response(reader):
+    # Lê uma resposta HTTP/1.1 (Content-Length ou chunked) e devolve o status
+    head = await reader.readuntil(b'\r\n\r\n')
+    status = int(head.split(b' ', 2)[1])
+    headers = {}
+    for line in head.split(b'\r\n')[1:]:
+        if b':' in line:
+            name, value = line.split(b':', 1)
+            headers[name.strip().lower()] = value.strip()
+    if b'content-length' in headers:
+        await reader.readexactly(int(headers[b'content-length']))
+    elif headers.get(b'transfer-encoding') == b'chunked':
+        while True:
+            size = int((await reader.readuntil(b'\r\n')).strip(), 16)
+            await reader.readexactly(size + 2)
+            if not size:
+                break
+    return status
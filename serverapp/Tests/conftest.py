@@ -1,8 +1,24 @@
 import os
 import django
+import pytest
 
 
 def pytest_configure(config):
     """Configuração do pytest para Django"""
     os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'todolist_project.settings')
     django.setup()
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    # O locmem sobrevive entre testes, mas o banco e os ids de usuário não
+    from django.core.cache import cache
+    from core.authentication import clear_auth_caches
+    from tasks.cache import clear_cache_stats
+    cache.clear()
+    clear_auth_caches()
+    clear_cache_stats()
+    yield
+    cache.clear()
+    clear_auth_caches()
+    clear_cache_stats()
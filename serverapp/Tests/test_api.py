@@ -1,3 +1,4 @@
+import json
 import pytest
 from django.contrib.auth.models import User
 from rest_framework.test import APIClient
@@ -492,6 +493,15 @@ class TestTaskOrdering:
         assert response.status_code == status.HTTP_200_OK
         assert len(response.data['results']) == 4
 
+    def test_ordering_by_priority_direction(self, authenticated_client, test_user):
+        Task.objects.create(owner=test_user, title='Baixa', priority='low')
+        Task.objects.create(owner=test_user, title='Urgente', priority='urgent')
+        Task.objects.create(owner=test_user, title='Média', priority='medium')
+        response = authenticated_client.get('/api/tasks/?ordering=priority')
+        assert [task['title'] for task in response.data['results']] == ['Baixa', 'Média', 'Urgente']
+        response = authenticated_client.get('/api/tasks/?ordering=-priority')
+        assert [task['title'] for task in response.data['results']] == ['Urgente', 'Média', 'Baixa']
+
 @pytest.mark.django_db
 class TestPagination:
     def test_pagination_structure(self, authenticated_client, test_user):
@@ -516,6 +526,1922 @@ class TestPagination:
         assert len(response.data['results']) <= 20
         assert response.data['previous'] is not None
 
+@pytest.mark.django_db
+class TestCursorPagination:
+    def _walk(self, client, ordering, page_size=3):
+        ids = []
+        response = client.get(f'/api/tasks/?pagination=cursor&ordering={ordering}&page_size={page_size}')
+        assert response.status_code == status.HTTP_200_OK
+        while True:
+            ids.extend(task['id'] for task in response.data['results'])
+            if not response.data['next_cursor']:
+                break
+            response = client.get(
+                f"/api/tasks/?ordering={ordering}&page_size={page_size}&cursor={response.data['next_cursor']}"
+            )
+            assert response.status_code == status.HTTP_200_OK
+        return ids
+
+    def test_cursor_walks_every_ordering(self, authenticated_client, test_user, second_test_user):
+        priorities = ['low', 'high', 'urgent', 'medium', 'high']
+        for i in range(10):
+            Task.objects.create(
+                owner=test_user,
+                title=f'Tarefa {i % 4}',
+                priority=priorities[i % len(priorities)],
+                due_date=(timezone.now() + timedelta(days=i % 3)) if i % 2 else None
+            )
+        shared = Task.objects.create(owner=second_test_user, title='Compartilhada')
+        shared.share_with_user(test_user)
+        Task.objects.create(owner=second_test_user, title='Privada')
+        visible_ids = set(Task.objects.exclude(title='Privada').values_list('id', flat=True))
+        for ordering in ['created_at', '-created_at', 'title', '-title',
+                         'due_date', '-due_date', 'priority', '-priority']:
+            ids = self._walk(authenticated_client, ordering)
+            assert len(ids) == len(visible_ids), ordering
+            assert set(ids) == visible_ids, ordering
+
+    def test_cursor_respects_order(self, authenticated_client, test_user):
+        Task.objects.create(owner=test_user, title='Baixa', priority='low')
+        Task.objects.create(owner=test_user, title='Urgente', priority='urgent')
+        Task.objects.create(owner=test_user, title='Média', priority='medium')
+        ids = self._walk(authenticated_client, '-priority', page_size=1)
+        titles = [Task.objects.get(id=task_id).title for task_id in ids]
+        assert titles == ['Urgente', 'Média', 'Baixa']
+
+    def test_cursor_count_is_opt_in(self, authenticated_client, test_user):
+        for i in range(5):
+            Task.objects.create(owner=test_user, title=f'Tarefa {i}')
+        response = authenticated_client.get('/api/tasks/?pagination=cursor&page_size=2')
+        assert 'count' not in response.data
+        assert len(response.data['results']) == 2
+        response = authenticated_client.get('/api/tasks/?pagination=cursor&page_size=2&include_count=true')
+        assert response.data['count'] == 5
+
+    def test_invalid_cursor(self, authenticated_client, test_user):
+        response = authenticated_client.get('/api/tasks/?cursor=invalido')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'error' in response.data
+
+@pytest.mark.django_db
+class TestQueryCount:
+    def _create_tasks(self, owner, other, total):
+        for i in range(total):
+            task = Task.objects.create(owner=other if i % 2 else owner, title=f'Tarefa {i}')
+            task.share_with_user(owner if i % 2 else other)
+
+    def _count_queries(self, client, url):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from core.authentication import clear_auth_caches
+        # Toda medição inclui a busca do usuário autenticado
+        clear_auth_caches()
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        assert response.status_code == status.HTTP_200_OK
+        return len(context.captured_queries), response
+
+    def test_list_query_count_is_constant(self, authenticated_client, test_user, second_test_user):
+        self._create_tasks(test_user, second_test_user, 4)
+        small, _ = self._count_queries(authenticated_client, '/api/tasks/?page_size=1000')
+        self._create_tasks(test_user, second_test_user, 40)
+        large, response = self._count_queries(authenticated_client, '/api/tasks/?page_size=1000')
+        assert len(response.data['results']) == 44
+        assert small == large
+
+    def test_cursor_query_count_is_constant(self, authenticated_client, test_user, second_test_user):
+        self._create_tasks(test_user, second_test_user, 4)
+        small, _ = self._count_queries(authenticated_client, '/api/tasks/?pagination=cursor&page_size=1000')
+        self._create_tasks(test_user, second_test_user, 40)
+        large, _ = self._count_queries(authenticated_client, '/api/tasks/?pagination=cursor&page_size=1000')
+        assert small == large
+
+    def test_list_uses_annotated_values(self, authenticated_client, test_user, second_test_user):
+        self._create_tasks(test_user, second_test_user, 3)
+        _, response = self._count_queries(authenticated_client, '/api/tasks/')
+        for task in response.data['results']:
+            assert task['shared_count'] == 1
+            assert task['owner_info']['id'] in (test_user.id, second_test_user.id)
+            assert task['is_shared'] == (task['owner_info']['id'] != test_user.id)
+
+    def test_detail_query_count(self, authenticated_client, shared_task):
+        queries, response = self._count_queries(authenticated_client, f'/api/tasks/{shared_task.id}/')
+        assert response.data['shared_count'] == 1
+        assert response.data['owner'] == shared_task.owner.username
+        # autenticação (usuário) + tarefa com owner e contagem de compartilhamentos
+        assert queries <= 2
+
+@pytest.mark.django_db
+class TestTaskAccess:
+    def _rows(self, task):
+        from tasks.models import TaskAccess
+        return {
+            (row.user_id, row.role): row
+            for row in TaskAccess.objects.filter(task=task)
+        }
+
+    def test_access_rows_follow_task_lifecycle(self, test_user, second_test_user):
+        task = Task.objects.create(owner=test_user, title='Original', priority='low')
+        assert set(self._rows(task)) == {(test_user.id, 'owner')}
+        task.share_with_user(second_test_user)
+        assert set(self._rows(task)) == {(test_user.id, 'owner'), (second_test_user.id, 'shared')}
+        task.title = 'Renomeada'
+        task.priority = 'urgent'
+        task.save()
+        for row in self._rows(task).values():
+            assert row.title == 'Renomeada'
+            assert row.priority_rank == 4
+        task.unshare_with_user(second_test_user)
+        assert set(self._rows(task)) == {(test_user.id, 'owner')}
+        task_id = task.id
+        task.delete()
+        from tasks.models import TaskAccess
+        assert not TaskAccess.objects.filter(task_id=task_id).exists()
+
+    def test_queryset_update_resyncs_access(self, shared_task):
+        Task.objects.filter(id=shared_task.id).update(status='in_progress')
+        assert {row.status for row in self._rows(shared_task).values()} == {'in_progress'}
+
+    def test_detail_with_multiple_shares(self, authenticated_client, shared_task):
+        third_user = User.objects.create_user(username='test3@example.com', email='test3@example.com', password='testpass123')
+        shared_task.share_with_user(third_user)
+        response = authenticated_client.get(f'/api/tasks/{shared_task.id}/')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['shared_count'] == 2
+
+    def test_list_query_has_no_distinct(self, authenticated_client, shared_task):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        with CaptureQueriesContext(connection) as context:
+            response = authenticated_client.get('/api/tasks/?status=pending')
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data['results']) == 1
+        for query in context.captured_queries:
+            assert 'DISTINCT' not in query['sql']
+            assert 'tasks_task_shared_with' not in query['sql'] or 'COUNT' in query['sql']
+
+    def test_check_command_detects_and_rebuilds(self, shared_task, second_test_user):
+        from io import StringIO
+        from django.core.management import call_command
+        from tasks.models import TaskAccess
+        TaskAccess.objects.filter(task=shared_task, user=second_test_user).delete()
+        TaskAccess.objects.filter(task=shared_task).update(title='Desatualizada')
+        output = StringIO()
+        call_command('check_task_access', stdout=output)
+        assert 'Ausentes: 1' in output.getvalue()
+        assert 'Desatualizadas: 1' in output.getvalue()
+        call_command('check_task_access', '--rebuild', stdout=StringIO())
+        output = StringIO()
+        call_command('check_task_access', stdout=output)
+        assert 'consistente' in output.getvalue()
+        assert self._rows(shared_task)[(second_test_user.id, 'shared')].title == shared_task.title
+
+    @pytest.mark.django_db(transaction=True)
+    def test_concurrent_writes_keep_access_consistent(self, tmp_path, test_user, second_test_user):
+        import random
+        import sqlite3
+        import threading
+        import time
+        from io import StringIO
+        from django.core.management import call_command
+        from django.db import connection, connections
+        # O banco de testes em memória não tem WAL nem busy_timeout: as threads usam
+        # uma cópia em arquivo, como em produção
+        tasks = [Task.objects.create(owner=test_user, title=f'Disputada {i}') for i in range(3)]
+        path = str(tmp_path / 'concurrent.sqlite3')
+        connection.ensure_connection()
+        target = sqlite3.connect(path)
+        connection.connection.backup(target)
+        target.close()
+        original = connections.settings['default']
+        connections.settings['default'] = dict(original, NAME=path)
+        deadline = time.monotonic() + 1.5
+        errors = []
+
+        def run(operation):
+            while time.monotonic() < deadline:
+                try:
+                    operation(Task.objects.get(pk=random.choice(tasks).pk))
+                except Exception as error:
+                    errors.append(error)
+            connections['default'].close()
+
+        def share(task):
+            if random.random() < 0.5:
+                task.share_with_user(second_test_user)
+            else:
+                task.unshare_with_user(second_test_user)
+
+        def toggle(task):
+            task.status = 'pending' if task.is_completed else 'completed'
+            task.save(update_fields=['status', 'is_completed', 'completed_at', 'cancelled_at'])
+
+        def rename(task):
+            task.title = f'Renomeada {random.random()}'
+            task.save()
+
+        def create_and_delete(task):
+            Task.objects.create(owner=test_user, title='Temporária').delete()
+
+        def check():
+            call_command('check_task_access', stdout=output)
+            connections['default'].close()
+        output = StringIO()
+        try:
+            threads = [threading.Thread(target=run, args=(operation,))
+                       for operation in (share, share, toggle, rename, create_and_delete)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            checker = threading.Thread(target=check)
+            checker.start()
+            checker.join()
+        finally:
+            connections.settings['default'] = original
+        assert errors == []
+        assert 'Ausentes: 0 | Sobrando: 0 | Desatualizadas: 0' in output.getvalue()
+
+@pytest.mark.django_db
+class TestTaskSearch:
+    def _titles(self, client, query):
+        response = client.get('/api/tasks/', {'search': query})
+        assert response.status_code == status.HTTP_200_OK
+        return [task['title'] for task in response.data['results']]
+
+    def test_search_uses_fts_index(self):
+        from tasks.search import fts_available
+        assert fts_available()
+
+    def test_search_description_and_tags(self, authenticated_client, test_user):
+        Task.objects.create(owner=test_user, title='Planejamento', description='Orçamento anual')
+        Task.objects.create(owner=test_user, title='Infra', tags='servidor, backup')
+        Task.objects.create(owner=test_user, title='Outra')
+        assert self._titles(authenticated_client, 'orçamento') == ['Planejamento']
+        assert self._titles(authenticated_client, 'backup') == ['Infra']
+
+    def test_search_prefix_and_accents(self, authenticated_client, test_user):
+        Task.objects.create(owner=test_user, title='Reunião de alinhamento')
+        Task.objects.create(owner=test_user, title='Codificação')
+        assert self._titles(authenticated_client, 'reuniao') == ['Reunião de alinhamento']
+        assert self._titles(authenticated_client, 'REUN') == ['Reunião de alinhamento']
+        assert self._titles(authenticated_client, 'codificacao') == ['Codificação']
+
+    def test_search_ranks_title_matches_first(self, authenticated_client, test_user):
+        Task.objects.create(owner=test_user, title='Revisar código', description='Relatório de deploy')
+        Task.objects.create(owner=test_user, title='Deploy em produção', description='Janela noturna')
+        assert self._titles(authenticated_client, 'deploy') == ['Deploy em produção', 'Revisar código']
+
+    def test_search_ranks_by_bm25_with_one_match(self, authenticated_client, test_user):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        Task.objects.create(owner=test_user, title='Rotina', description='Backup diário, backup semanal')
+        Task.objects.create(owner=test_user, title='Rede', description='Backup do servidor de arquivos e da rede interna')
+        Task.objects.create(owner=test_user, title='Servidor', tags='backup')
+        with CaptureQueriesContext(connection) as queries:
+            titles = self._titles(authenticated_client, 'backup')
+        # Tags pesam mais que a descrição e, na descrição, mais ocorrências pesam mais
+        assert titles == ['Servidor', 'Rotina', 'Rede']
+        assert max(query['sql'].count(' MATCH ') for query in queries.captured_queries) == 1
+
+    def test_search_index_follows_updates_and_deletes(self, authenticated_client, test_user):
+        task = Task.objects.create(owner=test_user, title='Antigo')
+        task.title = 'Novo título'
+        task.save()
+        assert self._titles(authenticated_client, 'antigo') == []
+        assert self._titles(authenticated_client, 'novo') == ['Novo título']
+        task.delete()
+        assert self._titles(authenticated_client, 'novo') == []
+
+    def test_search_respects_visibility(self, authenticated_client, test_user, second_test_user):
+        Task.objects.create(owner=second_test_user, title='Segredo do outro usuário')
+        assert self._titles(authenticated_client, 'segredo') == []
+
+    def test_search_terms_ignore_the_users_column(self, authenticated_client, test_user):
+        Task.objects.create(owner=test_user, title='Relatório')
+        # O token de acesso "u<id>" fica na coluna `users`, que não entra na busca
+        assert self._titles(authenticated_client, f'u{test_user.id}') == []
+        assert self._titles(authenticated_client, 'u') == []
+
+    def test_search_follows_sharing(self, api_client, test_user, second_test_user):
+        task = Task.objects.create(owner=test_user, title='Planilha compartilhada')
+        api_client.force_authenticate(user=second_test_user)
+        assert self._titles(api_client, 'planilha') == []
+        task.share_with_user(second_test_user)
+        assert self._titles(api_client, 'planilha') == ['Planilha compartilhada']
+        task.unshare_with_user(second_test_user)
+        assert self._titles(api_client, 'planilha') == []
+
+    def test_search_with_symbols_only(self, authenticated_client, test_user):
+        Task.objects.create(owner=test_user, title='C++ & Rust')
+        assert self._titles(authenticated_client, '++') == ['C++ & Rust']
+
+    def test_search_fallback_without_fts(self, authenticated_client, test_user, monkeypatch):
+        from tasks import search
+        monkeypatch.setattr(search, 'fts_available', lambda using='default': False)
+        Task.objects.create(owner=test_user, title='Reunião importante', description='backup')
+        assert self._titles(authenticated_client, 'Reunião') == ['Reunião importante']
+        assert self._titles(authenticated_client, 'backup') == []
+
+@pytest.mark.django_db
+class TestTaskTags:
+    def _titles(self, client, params):
+        response = client.get('/api/tasks/', params)
+        assert response.status_code == status.HTTP_200_OK
+        return sorted(task['title'] for task in response.data['results'])
+
+    def test_filter_by_tag_any_and_all(self, authenticated_client, test_user):
+        Task.objects.create(owner=test_user, title='A', tags='Trabalho, urgente')
+        Task.objects.create(owner=test_user, title='B', tags='trabalho')
+        Task.objects.create(owner=test_user, title='C', tags='casa')
+        assert self._titles(authenticated_client, {'tag': 'TRABALHO'}) == ['A', 'B']
+        assert self._titles(authenticated_client, {'tag': 'urgente,casa'}) == ['A', 'C']
+        assert self._titles(authenticated_client, {'tag': ['trabalho', 'urgente'], 'tag_mode': 'all'}) == ['A']
+        assert self._titles(authenticated_client, {'tag': 'trabalho,inexistente', 'tag_mode': 'all'}) == []
+        assert self._titles(authenticated_client, {'tag': 'inexistente'}) == []
+
+    def test_tag_filter_uses_index(self, authenticated_client, test_user):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        Task.objects.create(owner=test_user, title='A', tags='trabalho')
+        with CaptureQueriesContext(connection) as queries:
+            authenticated_client.get('/api/tasks/', {'tag': 'trabalho'})
+        assert not any('LIKE' in query['sql'] for query in queries.captured_queries)
+
+    def test_tags_follow_updates_and_bulk_paths(self, authenticated_client, test_user):
+        task = Task.objects.create(owner=test_user, title='A', tags='antiga')
+        response = authenticated_client.patch(f'/api/tasks/{task.id}/', {'tags': 'nova,  outra '}, format='json')
+        assert response.data['tags'] == 'nova, outra'
+        assert response.data['tags_list'] == ['nova', 'outra']
+        assert self._titles(authenticated_client, {'tag': 'antiga'}) == []
+        assert self._titles(authenticated_client, {'tag': 'nova'}) == ['A']
+        Task.objects.bulk_create([Task(owner=test_user, title='B', tags='lote')])
+        assert self._titles(authenticated_client, {'tag': 'lote'}) == ['B']
+        Task.objects.filter(title='B').update(tags='atualizada')
+        assert self._titles(authenticated_client, {'tag': 'lote'}) == []
+        assert self._titles(authenticated_client, {'tag': 'atualizada'}) == ['B']
+
+    def test_tag_counts(self, authenticated_client, test_user, second_test_user):
+        Task.objects.create(owner=test_user, title='A', tags='trabalho, urgente')
+        Task.objects.create(owner=test_user, title='B', tags='Trabalho')
+        shared = Task.objects.create(owner=second_test_user, title='C', tags='urgente')
+        Task.objects.create(owner=second_test_user, title='D', tags='privada')
+        shared.share_with_user(test_user)
+        response = authenticated_client.get('/api/tasks/tags/')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data == [{'name': 'trabalho', 'count': 2}, {'name': 'urgente', 'count': 2}]
+
+@pytest.mark.django_db
+class TestListCache:
+    def _get(self, client, params=None):
+        response = client.get('/api/tasks/', params or {})
+        assert response.status_code == status.HTTP_200_OK
+        return response
+
+    def test_repeated_request_hits_cache(self, authenticated_client, sample_task):
+        assert self._get(authenticated_client, {'status': 'pending', 'page': 1})['X-Cache'] == 'MISS'
+        response = authenticated_client.get('/api/tasks/?page=1&status=pending')
+        assert response['X-Cache'] == 'HIT'
+        assert response.data['results'][0]['id'] == sample_task.id
+        assert self._get(authenticated_client, {'status': 'completed'})['X-Cache'] == 'MISS'
+
+    def test_writes_invalidate_cache(self, authenticated_client, test_user, sample_task):
+        self._get(authenticated_client)
+        authenticated_client.post('/api/tasks/', {'title': 'Nova'}, format='json')
+        response = self._get(authenticated_client)
+        assert response['X-Cache'] == 'MISS'
+        assert response.data['count'] == 2
+        authenticated_client.patch(f'/api/tasks/{sample_task.id}/', {'title': 'Editada'}, format='json')
+        assert 'Editada' in [task['title'] for task in self._get(authenticated_client).data['results']]
+        authenticated_client.patch(f'/api/tasks/{sample_task.id}/toggle/')
+        assert self._get(authenticated_client)['X-Cache'] == 'MISS'
+        authenticated_client.delete(f'/api/tasks/{sample_task.id}/')
+        assert self._get(authenticated_client).data['count'] == 1
+        Task.objects.filter(owner=test_user).update(priority='urgent')
+        assert self._get(authenticated_client).data['results'][0]['priority'] == 'urgent'
+
+    def test_sharing_invalidates_other_users(self, api_client, test_user, second_test_user):
+        api_client.force_authenticate(user=second_test_user)
+        task = Task.objects.create(owner=test_user, title='Compartilhada')
+        assert self._get(api_client).data['count'] == 0
+        task.share_with_user(second_test_user)
+        assert self._get(api_client).data['count'] == 1
+        task.title = 'Renomeada'
+        task.save()
+        assert self._get(api_client).data['results'][0]['title'] == 'Renomeada'
+        task.unshare_with_user(second_test_user)
+        assert self._get(api_client).data['count'] == 0
+
+    def test_cache_is_per_user(self, api_client, test_user, second_test_user, sample_task):
+        api_client.force_authenticate(user=test_user)
+        self._get(api_client)
+        api_client.force_authenticate(user=second_test_user)
+        response = self._get(api_client)
+        assert response['X-Cache'] == 'MISS'
+        assert response.data['count'] == 0
+
+    def test_timeout_stops_before_due_date_changes(self, test_user):
+        from datetime import timedelta
+        from django.utils import timezone
+        from tasks.cache import list_cache_timeout, next_change_at
+        task = Task.objects.create(owner=test_user, title='Vence já', due_date=timezone.now() + timedelta(seconds=30))
+        assert list_cache_timeout(next_change_at([task.due_date])) <= 30
+
+    def test_local_cache_is_disabled_with_several_processes(self, settings, authenticated_client, test_user, sample_task):
+        # locmem não é visto pelos outros workers: nada de respostas nem versões em cache
+        settings.WEB_PROCESSES = 2
+        assert self._get(authenticated_client)['X-Cache'] == 'MISS'
+        etag = self._get(authenticated_client)['ETag']
+        assert self._get(authenticated_client)['X-Cache'] == 'MISS'
+        assert authenticated_client.get('/api/tasks/', HTTP_IF_NONE_MATCH=etag).status_code == status.HTTP_304_NOT_MODIFIED
+        Task.objects.filter(pk=sample_task.pk).update(title='Alterada em outro processo')
+        response = authenticated_client.get('/api/tasks/', HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['results'][0]['title'] == 'Alterada em outro processo'
+        settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'x'}}
+        from core.caches import shared_state_available
+        assert shared_state_available()
+
+    def test_owner_changes_invalidate_sharers(self, api_client, test_user, second_test_user, sample_task):
+        sample_task.share_with_user(second_test_user)
+        api_client.force_authenticate(user=second_test_user)
+        self._get(api_client)
+        test_user.last_login = timezone.now()
+        test_user.save(update_fields=['last_login'])
+        assert self._get(api_client)['X-Cache'] == 'HIT'
+        test_user.email = 'novo@example.com'
+        test_user.save()
+        response = self._get(api_client)
+        assert response['X-Cache'] == 'MISS'
+        assert response.data['results'][0]['owner_info']['email'] == 'novo@example.com'
+
+    def test_cache_stats_endpoint(self, api_client, test_user, sample_task):
+        api_client.force_authenticate(user=test_user)
+        assert api_client.get('/api/tasks/cache-stats/').status_code == status.HTTP_403_FORBIDDEN
+        self._get(api_client)
+        self._get(api_client)
+        test_user.is_staff = True
+        test_user.save()
+        response = api_client.get('/api/tasks/cache-stats/')
+        assert response.data['hits'] == 1
+        assert response.data['misses'] == 1
+        assert response.data['enabled'] is True
+
+    def test_cached_list_read_does_not_write_to_database_cache(self, settings, authenticated_client, sample_task):
+        from django.core.management import call_command
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from tasks.cache import get_cache_stats
+        # Com o cache no SQLite, um acerto não pode virar transação de escrita só para contar
+        settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'list_cache'}}
+        call_command('createcachetable', verbosity=0)
+        assert self._get(authenticated_client)['X-Cache'] == 'MISS'
+        with CaptureQueriesContext(connection) as context:
+            assert self._get(authenticated_client)['X-Cache'] == 'HIT'
+        writes = [query['sql'] for query in context.captured_queries
+                  if query['sql'].split(None, 1)[0].upper() in ('INSERT', 'UPDATE', 'DELETE', 'REPLACE', 'BEGIN')]
+        assert writes == []
+        assert (get_cache_stats()['hits'], get_cache_stats()['misses']) == (1, 1)
+
+@pytest.mark.django_db
+class TestConditionalRequests:
+    def test_detail_etag_and_not_modified(self, authenticated_client, sample_task):
+        response = authenticated_client.get(f'/api/tasks/{sample_task.id}/')
+        etag = response['ETag']
+        response = authenticated_client.get(f'/api/tasks/{sample_task.id}/', HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response['ETag'] == etag
+        assert not response.content
+
+    def test_detail_etag_changes_on_write(self, authenticated_client, sample_task, second_test_user):
+        etag = authenticated_client.get(f'/api/tasks/{sample_task.id}/')['ETag']
+        sample_task.share_with_user(second_test_user)
+        response = authenticated_client.get(f'/api/tasks/{sample_task.id}/', HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+        etag = response['ETag']
+        Task.objects.filter(pk=sample_task.pk).update(priority='urgent')
+        response = authenticated_client.get(f'/api/tasks/{sample_task.id}/', HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['priority'] == 'urgent'
+
+    def test_if_match_preconditions(self, authenticated_client, sample_task):
+        etag = authenticated_client.get(f'/api/tasks/{sample_task.id}/')['ETag']
+        response = authenticated_client.patch(
+            f'/api/tasks/{sample_task.id}/', {'title': 'Primeira'}, format='json', HTTP_IF_MATCH=etag
+        )
+        assert response.status_code == status.HTTP_200_OK
+        new_etag = response['ETag']
+        assert new_etag != etag
+        assert authenticated_client.get(f'/api/tasks/{sample_task.id}/')['ETag'] == new_etag
+        response = authenticated_client.patch(
+            f'/api/tasks/{sample_task.id}/', {'title': 'Segunda'}, format='json', HTTP_IF_MATCH=etag
+        )
+        assert response.status_code == status.HTTP_412_PRECONDITION_FAILED
+        response = authenticated_client.patch(f'/api/tasks/{sample_task.id}/toggle/', HTTP_IF_MATCH=etag)
+        assert response.status_code == status.HTTP_412_PRECONDITION_FAILED
+        response = authenticated_client.delete(f'/api/tasks/{sample_task.id}/', HTTP_IF_MATCH=etag)
+        assert response.status_code == status.HTTP_412_PRECONDITION_FAILED
+        response = authenticated_client.delete(f'/api/tasks/{sample_task.id}/', HTTP_IF_MATCH=new_etag)
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+
+    def test_list_etag(self, authenticated_client, test_user, sample_task):
+        response = authenticated_client.get('/api/tasks/')
+        etag = response['ETag']
+        from django.core.cache import cache
+        from django.http import QueryDict
+        from tasks.cache import list_cache_key
+        assert authenticated_client.get('/api/tasks/', HTTP_IF_NONE_MATCH=etag).status_code == status.HTTP_304_NOT_MODIFIED
+        # Sem a resposta em cache o ETag é recalculado igual, sem serializar
+        cache.delete(list_cache_key(test_user.id, QueryDict()))
+        assert authenticated_client.get('/api/tasks/', HTTP_IF_NONE_MATCH=etag).status_code == status.HTTP_304_NOT_MODIFIED
+        assert authenticated_client.get('/api/tasks/?status=pending', HTTP_IF_NONE_MATCH=etag).status_code == status.HTTP_200_OK
+        Task.objects.create(owner=test_user, title='Nova')
+        response = authenticated_client.get('/api/tasks/', HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == status.HTTP_200_OK
+        assert response['ETag'] != etag
+
+@pytest.mark.django_db
+class TestSparseFields:
+    def test_fast_path_matches_serializer(self, test_user, second_test_user):
+        from datetime import timedelta
+        from django.utils import timezone
+        from rest_framework.renderers import JSONRenderer
+        from rest_framework.test import APIRequestFactory
+        from tasks.serializers import TASK_LIST_FIELDS, TaskListSerializer, serialize_task_rows, task_list_columns
+        test_user.first_name = 'João'
+        test_user.save()
+        now = timezone.now()
+        Task.objects.create(owner=test_user, title='Simples')
+        Task.objects.create(owner=test_user, title='Vencida', description='Texto', tags='a, b ,', due_date=now - timedelta(days=2, hours=3))
+        Task.objects.create(owner=test_user, title='Concluída', status='completed', priority='urgent', due_date=now + timedelta(days=5))
+        shared = Task.objects.create(owner=second_test_user, title='Compartilhada', due_date=now + timedelta(hours=5))
+        shared.share_with_user(test_user)
+        request = APIRequestFactory().get('/api/tasks/')
+        request.user = test_user
+        tasks = list(Task.objects.with_related().visible_to(test_user).order_by('id'))
+        expected = JSONRenderer().render(TaskListSerializer(tasks, many=True, context={'request': request}).data)
+        rows = Task.objects.with_shared_count().visible_to(test_user).order_by('id').values(*task_list_columns(TASK_LIST_FIELDS))
+        assert JSONRenderer().render(serialize_task_rows(rows, TASK_LIST_FIELDS, test_user)) == expected
+
+    def test_fields_parameter(self, authenticated_client, sample_task):
+        response = authenticated_client.get('/api/tasks/', {'fields': 'title,id'})
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['results'] == [{'id': sample_task.id, 'title': sample_task.title}]
+        response = authenticated_client.get('/api/tasks/', {'fields': 'compact,owner'})
+        assert list(response.data['results'][0]) == [
+            'id', 'title', 'priority', 'status', 'due_date', 'is_completed', 'tags_list', 'owner', 'is_overdue'
+        ]
+        response = authenticated_client.get('/api/tasks/', {'fields': 'title,senha'})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'senha' in response.data['error']
+
+    def test_fields_restrict_sql_columns(self, authenticated_client, sample_task):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        with CaptureQueriesContext(connection) as queries:
+            authenticated_client.get('/api/tasks/', {'fields': 'id,title'})
+        task_queries = [query['sql'] for query in queries.captured_queries if 'FROM "tasks_task"' in query['sql']]
+        assert task_queries
+        assert not any('"description"' in sql or 'auth_user' in sql for sql in task_queries)
+
+@pytest.mark.django_db
+class TestTaskExport:
+    def _export(self, client, params):
+        response = client.get('/api/tasks/export/', params)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.streaming
+        return b''.join(response.streaming_content).decode()
+
+    def test_ndjson_export_matches_list(self, authenticated_client, test_user, second_test_user, monkeypatch):
+        import json
+        from tasks import export
+        monkeypatch.setattr(export, 'EXPORT_CHUNK_SIZE', 2)
+        for i in range(5):
+            Task.objects.create(owner=test_user, title=f'Tarefa {i}', tags='casa')
+        shared = Task.objects.create(owner=second_test_user, title='Compartilhada')
+        shared.share_with_user(test_user)
+        Task.objects.create(owner=second_test_user, title='Privada')
+        lines = self._export(authenticated_client, {}).splitlines()
+        exported = sorted((json.loads(line) for line in lines), key=lambda task: task['id'])
+        listed = authenticated_client.get('/api/tasks/', {'page_size': 100}).data['results']
+        assert exported == sorted((dict(task) for task in listed), key=lambda task: task['id'])
+
+    def test_csv_export_with_filters_and_fields(self, authenticated_client, test_user):
+        import csv
+        import io
+        Task.objects.create(owner=test_user, title='Casa, limpeza', tags='casa, fim de semana', status='completed')
+        Task.objects.create(owner=test_user, title='Trabalho', tags='trabalho')
+        content = self._export(authenticated_client, {'export_format': 'csv', 'tag': 'casa', 'fields': 'title,tags_list,is_completed'})
+        rows = list(csv.reader(io.StringIO(content)))
+        assert rows == [['title', 'is_completed', 'tags_list'], ['Casa, limpeza', 'true', '["casa", "fim de semana"]']]
+
+    def test_export_streams_asynchronously_under_asgi(self, test_user, monkeypatch):
+        from asgiref.sync import async_to_sync
+        from django.test import AsyncClient
+        from rest_framework_simplejwt.tokens import AccessToken
+        from tasks import export
+        monkeypatch.setattr(export, 'EXPORT_CHUNK_SIZE', 2)
+        monkeypatch.setattr(export, 'EXPORT_BUFFER_SIZE', 1)
+        for i in range(5):
+            Task.objects.create(owner=test_user, title=f'Tarefa {i}')
+        generated = []
+        original = export.serialize_task_rows
+        monkeypatch.setattr(export, 'serialize_task_rows', lambda *args: generated.append(1) or original(*args))
+
+        async def first_chunk_then_rest():
+            response = await AsyncClient().get(
+                '/api/tasks/export/', headers={'Authorization': f'Bearer {AccessToken.for_user(test_user)}'}
+            )
+            assert response.status_code == status.HTTP_200_OK, response.content
+            # Um iterador síncrono seria lido inteiro pelo Django (sync_to_async(list))
+            assert response.is_async
+            chunks = aiter(response.streaming_content)
+            first = await anext(chunks)
+            batches_before_first_chunk = len(generated)
+            return [first] + [chunk async for chunk in chunks], batches_before_first_chunk
+        chunks, batches_before_first_chunk = async_to_sync(first_chunk_then_rest)()
+        assert batches_before_first_chunk == 1
+        assert len(b''.join(chunks).decode().splitlines()) == 5
+
+    def test_export_invalid_parameters(self, authenticated_client):
+        response = authenticated_client.get('/api/tasks/export/', {'export_format': 'xml'})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        response = authenticated_client.get('/api/tasks/export/', {'fields': 'senha'})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+@pytest.mark.django_db
+class TestTaskBatch:
+    def test_batch_mixed_operations(self, authenticated_client, test_user):
+        from tasks.models import TaskAccess, TaskTag
+        to_update = Task.objects.create(owner=test_user, title='Atualizar', priority='low')
+        to_delete = Task.objects.create(owner=test_user, title='Excluir')
+        response = authenticated_client.post('/api/tasks/batch/', {'operations': [
+            {'op': 'create', 'data': {'title': 'Nova', 'tags': ' casa ,, trabalho', 'status': 'completed'}},
+            {'op': 'update', 'id': to_update.id, 'data': {'status': 'completed', 'priority': 'urgent'}},
+            {'op': 'delete', 'id': to_delete.id},
+        ]}, format='json')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['applied'] is True
+        created, updated, deleted = response.data['results']
+        assert created['status'] == status.HTTP_201_CREATED
+        assert created['data']['tags_list'] == ['casa', 'trabalho']
+        assert created['data']['is_completed'] is True
+        assert updated['status'] == status.HTTP_200_OK
+        assert deleted == {'index': 2, 'op': 'delete', 'status': status.HTTP_204_NO_CONTENT, 'id': to_delete.id}
+        task = Task.objects.get(id=created['data']['id'])
+        assert task.completed_at is not None
+        assert TaskAccess.objects.filter(task=task, user=test_user).exists()
+        assert set(TaskTag.objects.filter(task=task).values_list('tag__name', flat=True)) == {'casa', 'trabalho'}
+        to_update.refresh_from_db()
+        assert to_update.is_completed and to_update.completed_at is not None
+        assert to_update.priority_rank == 4
+        assert not Task.objects.filter(id=to_delete.id).exists()
+        listed = authenticated_client.get('/api/tasks/').data['results']
+        assert sorted(task['title'] for task in listed) == ['Atualizar', 'Nova']
+
+    def test_batch_reports_item_errors(self, authenticated_client, test_user, second_test_user, shared_task):
+        other = Task.objects.create(owner=second_test_user, title='Alheia')
+        response = authenticated_client.post('/api/tasks/batch/', {'operations': [
+            {'op': 'create', 'data': {'title': ''}},
+            {'op': 'update', 'id': other.id, 'data': {'title': 'X'}},
+            {'op': 'rename'},
+            {'op': 'create', 'data': {'title': 'Válida'}},
+        ]}, format='json')
+        assert response.status_code == status.HTTP_200_OK
+        results = response.data['results']
+        assert [result['status'] for result in results] == [400, 404, 400, 201]
+        assert 'title' in results[0]['errors']
+        assert Task.objects.filter(title='Válida').exists()
+
+    def test_atomic_batch_applies_nothing_on_error(self, authenticated_client, test_user):
+        task = Task.objects.create(owner=test_user, title='Original')
+        response = authenticated_client.post('/api/tasks/batch/', {'atomic': True, 'operations': [
+            {'op': 'update', 'id': task.id, 'data': {'title': 'Alterada'}},
+            {'op': 'update', 'id': task.id, 'data': {'title': 'De novo'}},
+            {'op': 'create', 'data': {'title': 'Nova'}},
+        ]}, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data['applied'] is False
+        assert [result['status'] for result in response.data['results']] == [424, 400, 424]
+        task.refresh_from_db()
+        assert task.title == 'Original'
+        assert not Task.objects.filter(title='Nova').exists()
+
+    def test_shared_user_cannot_modify_in_batch(self, second_authenticated_client, shared_task):
+        response = second_authenticated_client.post('/api/tasks/batch/', {'operations': [
+            {'op': 'delete', 'id': shared_task.id},
+        ]}, format='json')
+        assert response.data['results'][0]['status'] == status.HTTP_403_FORBIDDEN
+        assert Task.objects.filter(id=shared_task.id).exists()
+
+    def test_batch_envelope_validation(self, authenticated_client, monkeypatch):
+        from tasks import views
+        response = authenticated_client.post('/api/tasks/batch/', {'operations': []}, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        monkeypatch.setattr(views, 'BATCH_MAX_OPERATIONS', 2)
+        operations = [{'op': 'create', 'data': {'title': f'T{i}'}} for i in range(3)]
+        response = authenticated_client.post('/api/tasks/batch/', {'operations': operations}, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert not Task.objects.exists()
+
+@pytest.mark.django_db
+class TestBulkSharing:
+    def _third_user(self):
+        return User.objects.create_user(username='test3@example.com', email='test3@example.com', password='testpass123')
+
+    def test_bulk_share_reports_each_pair(self, authenticated_client, test_user, second_test_user, shared_task):
+        from tasks.models import TaskAccess
+        third_user = self._third_user()
+        task = Task.objects.create(owner=test_user, title='Nova')
+        response = authenticated_client.post('/api/tasks/bulk-share/', {
+            'task_ids': [shared_task.id, task.id],
+            'emails': [second_test_user.email, 'inexistente@example.com'],
+            'user_ids': [third_user.id, test_user.id],
+        }, format='json')
+        assert response.status_code == status.HTTP_200_OK
+        results = {(r['task_id'], r['user_id']): r['result'] for r in response.data['results']}
+        assert results == {
+            (shared_task.id, second_test_user.id): 'already_shared',
+            (shared_task.id, third_user.id): 'shared',
+            (shared_task.id, test_user.id): 'is_owner',
+            (task.id, second_test_user.id): 'shared',
+            (task.id, third_user.id): 'shared',
+            (task.id, test_user.id): 'is_owner',
+        }
+        assert response.data['summary'] == {'shared': 3, 'already_shared': 1, 'is_owner': 2}
+        assert response.data['user_errors'] == [{'email': 'inexistente@example.com', 'error': 'Usuário não encontrado com este email'}]
+        assert task.is_shared_with(second_test_user) and task.is_shared_with(third_user)
+        assert TaskAccess.objects.filter(task=task, role=TaskAccess.ROLE_SHARED).count() == 2
+
+    def test_bulk_unshare(self, authenticated_client, second_test_user, shared_task):
+        from tasks.models import TaskAccess
+        second_client = APIClient()
+        second_client.force_authenticate(user=second_test_user)
+        assert second_client.get('/api/tasks/').data['count'] == 1
+        response = authenticated_client.post('/api/tasks/bulk-share/', {
+            'action': 'unshare', 'task_ids': [shared_task.id, shared_task.id], 'user_ids': [second_test_user.id],
+        }, format='json')
+        assert response.status_code == status.HTTP_200_OK
+        assert [r['result'] for r in response.data['results']] == ['unshared']
+        assert not shared_task.is_shared_with(second_test_user)
+        assert not TaskAccess.objects.filter(task=shared_task, user=second_test_user).exists()
+        assert second_client.get('/api/tasks/').data['count'] == 0
+
+    def test_bulk_share_task_errors(self, second_authenticated_client, second_test_user, shared_task, test_user):
+        third_user = self._third_user()
+        private = Task.objects.create(owner=test_user, title='Privada')
+        response = second_authenticated_client.post('/api/tasks/bulk-share/', {
+            'task_ids': [shared_task.id, private.id], 'user_ids': [third_user.id],
+        }, format='json')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['results'] == []
+        assert [(e['task_id'], e['status']) for e in response.data['task_errors']] == [
+            (shared_task.id, status.HTTP_403_FORBIDDEN), (private.id, status.HTTP_404_NOT_FOUND)
+        ]
+        assert not shared_task.is_shared_with(third_user)
+
+    def test_bulk_share_invalid_payload(self, authenticated_client, sample_task, second_test_user):
+        for payload in (
+            {'task_ids': [sample_task.id]},
+            {'task_ids': [], 'user_ids': [second_test_user.id]},
+            {'task_ids': [sample_task.id], 'emails': 'test2@example.com'},
+            {'action': 'transfer', 'task_ids': [sample_task.id], 'user_ids': [second_test_user.id]},
+        ):
+            response = authenticated_client.post('/api/tasks/bulk-share/', payload, format='json')
+            assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+@pytest.mark.django_db
+class TestTaskStats:
+    def _assert_counters_consistent(self):
+        from tasks.counters import COUNTER_COLUMNS, expected_counters
+        from tasks.models import TaskCounter
+        zeros = dict.fromkeys(COUNTER_COLUMNS, 0)
+        current = {row.pop('user_id'): row for row in TaskCounter.objects.values('user_id', *COUNTER_COLUMNS)}
+        expected = expected_counters()
+        for user_id in set(current) | set(expected):
+            assert current.get(user_id, zeros) == expected.get(user_id, zeros)
+
+    def test_stats_endpoint(self, authenticated_client, test_user, second_test_user):
+        Task.objects.create(owner=test_user, title='Atrasada', priority='urgent', due_date=timezone.now() - timedelta(days=1))
+        Task.objects.create(owner=test_user, title='Concluída', status='completed', due_date=timezone.now() - timedelta(days=1))
+        Task.objects.create(owner=test_user, title='Em progresso', status='in_progress', priority='low')
+        shared = Task.objects.create(owner=second_test_user, title='Compartilhada', priority='high')
+        shared.share_with_user(test_user)
+        Task.objects.create(owner=second_test_user, title='Privada')
+        response = authenticated_client.get('/api/tasks/stats/')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data == {
+            'total_tasks': 4,
+            'completed_tasks': 1,
+            'pending_tasks': 2,
+            'in_progress_tasks': 1,
+            'overdue_tasks': 1,
+            'owned_tasks': 3,
+            'shared_tasks': 1,
+            'completion_rate': 25.0,
+            'priority_breakdown': {'urgent': 1, 'high': 1, 'medium': 1, 'low': 1},
+        }
+
+    def test_counters_follow_every_write_path(self, authenticated_client, test_user, second_test_user):
+        task = Task.objects.create(owner=test_user, title='Tarefa', priority='high')
+        task.share_with_user(second_test_user)
+        authenticated_client.patch(f'/api/tasks/{task.id}/toggle/')
+        Task.objects.bulk_create([Task(owner=test_user, title=f'Bulk {i}') for i in range(3)])
+        Task.objects.filter(title__startswith='Bulk').update(priority='urgent', status='cancelled')
+        bulk = list(Task.objects.filter(title__startswith='Bulk'))
+        for item in bulk:
+            item.status = 'completed'
+        Task.objects.bulk_update(bulk, ['status'])
+        self._assert_counters_consistent()
+        authenticated_client.post('/api/tasks/bulk-share/', {'task_ids': [item.id for item in bulk], 'user_ids': [second_test_user.id]}, format='json')
+        authenticated_client.post('/api/tasks/batch/', {'operations': [
+            {'op': 'create', 'data': {'title': 'Lote', 'status': 'completed'}},
+            {'op': 'update', 'id': bulk[0].id, 'data': {'priority': 'low'}},
+            {'op': 'delete', 'id': bulk[1].id},
+        ]}, format='json')
+        task.unshare_with_user(second_test_user)
+        task.delete()
+        self._assert_counters_consistent()
+        second_test_user.delete()
+        self._assert_counters_consistent()
+
+    def test_stats_query_count_is_constant(self, authenticated_client, test_user):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        Task.objects.create(owner=test_user, title='Uma')
+        # Depois da primeira requisição o usuário autenticado vem do cache
+        authenticated_client.get('/api/tasks/stats/')
+        with CaptureQueriesContext(connection) as small:
+            authenticated_client.get('/api/tasks/stats/')
+        Task.objects.bulk_create([Task(owner=test_user, title=f'T{i}') for i in range(50)])
+        with CaptureQueriesContext(connection) as large:
+            response = authenticated_client.get('/api/tasks/stats/')
+        assert response.data['total_tasks'] == 51
+        assert len(small.captured_queries) == len(large.captured_queries)
+
+    def test_recompute_task_counters_command(self, test_user, sample_task):
+        from io import StringIO
+        from django.core.management import call_command
+        from tasks.models import TaskCounter
+        TaskCounter.objects.filter(user=test_user).update(total=99)
+        output = StringIO()
+        call_command('recompute_task_counters', '--check', stdout=output)
+        assert 'Divergentes: 1' in output.getvalue()
+        assert TaskCounter.objects.get(user=test_user).total == 99
+        call_command('recompute_task_counters', stdout=StringIO())
+        assert TaskCounter.objects.get(user=test_user).total == 1
+        self._assert_counters_consistent()
+
+@pytest.mark.django_db
+class TestDailyRollups:
+    def _series(self, client, start, end):
+        response = client.get('/api/tasks/stats/daily/', {'start': start.isoformat(), 'end': end.isoformat()})
+        assert response.status_code == status.HTTP_200_OK
+        return response.data['series']
+
+    def test_daily_series(self, authenticated_client, test_user, second_test_user):
+        now = timezone.now()
+        today = timezone.localdate(now)
+        old = Task.objects.create(owner=test_user, title='Antiga')
+        Task.objects.filter(id=old.id).update(created_at=now - timedelta(days=5))
+        done = Task.objects.create(owner=test_user, title='Concluída', status='completed')
+        Task.objects.filter(id=done.id).update(created_at=now - timedelta(days=3), completed_at=now - timedelta(days=1))
+        open_task = Task.objects.create(owner=test_user, title='Aberta')
+        Task.objects.filter(id=open_task.id).update(created_at=now - timedelta(days=2))
+        Task.objects.create(owner=test_user, title='Cancelada', status='cancelled')
+        Task.objects.create(owner=second_test_user, title='De outro usuário')
+        series = self._series(authenticated_client, today - timedelta(days=3), today)
+        assert [(p['created'], p['completed'], p['cancelled'], p['backlog']) for p in series] == [
+            (1, 0, 0, 2), (1, 0, 0, 3), (0, 1, 0, 2), (1, 0, 1, 2),
+        ]
+        assert series[-1]['date'] == today.isoformat()
+
+    def test_rollups_match_live_aggregation(self, authenticated_client, test_user, second_test_user, monkeypatch):
+        from io import StringIO
+        from django.core.management import call_command
+        from tasks import rollups
+        from tasks.models import TaskDailyRollup
+        now = timezone.now()
+        today = timezone.localdate(now)
+        tasks = [Task.objects.create(owner=test_user, title=f'Tarefa {i}') for i in range(6)]
+        Task.objects.filter(id__in=[task.id for task in tasks[:3]]).update(created_at=now - timedelta(days=10))
+        authenticated_client.patch(f'/api/tasks/{tasks[0].id}/toggle/')
+        authenticated_client.patch(f'/api/tasks/{tasks[1].id}/toggle/')
+        authenticated_client.patch(f'/api/tasks/{tasks[1].id}/toggle/')
+        authenticated_client.post('/api/tasks/batch/', {'operations': [
+            {'op': 'update', 'id': tasks[2].id, 'data': {'status': 'cancelled'}},
+            {'op': 'update', 'id': tasks[3].id, 'data': {'status': 'completed'}},
+            {'op': 'delete', 'id': tasks[4].id},
+        ]}, format='json')
+        Task.objects.filter(id=tasks[3].id).update(completed_at=now - timedelta(days=4))
+        Task.objects.bulk_create([Task(owner=test_user, title='Bulk', status='completed', is_completed=True, completed_at=now)])
+        Task.objects.create(owner=second_test_user, title='Outro').share_with_user(test_user)
+        start, end = today - timedelta(days=12), today
+        from_rollups = self._series(authenticated_client, start, end)
+        monkeypatch.setattr(rollups, 'rollups_available', lambda using='default': False)
+        assert self._series(authenticated_client, start, end) == from_rollups
+        monkeypatch.undo()
+        TaskDailyRollup.objects.all().delete()
+        call_command('backfill_task_rollups', '--chunk-size', '2', stdout=StringIO())
+        assert self._series(authenticated_client, start, end) == from_rollups
+
+    def test_rollup_days_follow_django_time_zone(self, authenticated_client, test_user, monkeypatch):
+        import time
+        from datetime import datetime, timezone as dt_timezone
+        from tasks.models import TaskDailyRollup
+        # Fuso do processo diferente de TIME_ZONE: o dia vem do Django, não do SQLite
+        monkeypatch.setenv('TZ', 'UTC')
+        time.tzset()
+        try:
+            late = datetime(2026, 5, 10, 1, 30, tzinfo=dt_timezone.utc)
+            old = Task.objects.create(owner=test_user, title='Madrugada em UTC')
+            Task.objects.filter(id=old.id).update(created_at=late)
+            recent = Task.objects.create(owner=test_user, title='Recente')
+            Task.objects.filter(id=recent.id).update(created_at=late + timedelta(days=20))
+            # Editar a tarefa antiga só mexe no dia dela: as linhas guardam contagens do dia
+            Task.objects.filter(id=old.id).update(completed_at=late + timedelta(days=1))
+        finally:
+            monkeypatch.undo()
+            time.tzset()
+        rows = TaskDailyRollup.objects.filter(user=test_user).exclude(day=timezone.localdate())
+        assert sorted(rows.values_list('day', 'created', 'completed')) == [
+            (timezone.localdate(late), 1, 0),
+            (timezone.localdate(late + timedelta(days=1)), 0, 1),
+            (timezone.localdate(late + timedelta(days=20)), 1, 0),
+        ]
+        assert timezone.localdate(late).isoformat() == '2026-05-09'
+
+    def test_daily_series_over_a_year(self, authenticated_client, test_user):
+        from tasks.models import TaskDailyRollup
+        now = timezone.now()
+        for days in range(0, 400, 7):
+            task = Task.objects.create(owner=test_user, title=f'Dia {days}')
+            Task.objects.filter(id=task.id).update(created_at=now - timedelta(days=days))
+        today = timezone.localdate(now)
+        series = self._series(authenticated_client, today - timedelta(days=364), today)
+        assert len(series) == 365
+        assert series[-1]['backlog'] == Task.objects.filter(owner=test_user).count()
+        assert TaskDailyRollup.objects.filter(user=test_user).count() <= 400 // 7 + 1
+
+    def test_daily_series_invalid_range(self, authenticated_client):
+        for params in ({'start': '2026-13-01'}, {'start': '2026-05-02', 'end': '2026-05-01'}, {'start': '2024-01-01', 'end': '2026-01-01'}):
+            response = authenticated_client.get('/api/tasks/stats/daily/', params)
+            assert response.status_code == status.HTTP_400_BAD_REQUEST
+        response = authenticated_client.get('/api/tasks/stats/daily/')
+        assert len(response.data['series']) == 30
+
+@pytest.mark.django_db
+class TestChangesFeed:
+    def _poll(self, client, since=None, **params):
+        if since is not None:
+            params['since'] = since
+        response = client.get('/api/tasks/changes/', params)
+        assert response.status_code == status.HTTP_200_OK
+        return response.data
+
+    def test_changes_since_token(self, authenticated_client, test_user, second_test_user):
+        kept = Task.objects.create(owner=test_user, title='Mantida')
+        edited = Task.objects.create(owner=test_user, title='Editada')
+        removed = Task.objects.create(owner=test_user, title='Removida')
+        shared = Task.objects.create(owner=second_test_user, title='Compartilhada')
+        shared.share_with_user(test_user)
+        Task.objects.create(owner=second_test_user, title='Invisível')
+        Task.objects.create(owner=test_user, title='Excluída antes').delete()
+        initial = self._poll(authenticated_client)
+        assert sorted(task['id'] for task in initial['changes']) == sorted([kept.id, edited.id, removed.id, shared.id])
+        assert initial['deleted'] == []
+        assert not initial['has_more']
+        token = initial['next_since']
+
+        authenticated_client.put(f'/api/tasks/{edited.id}/', {'title': 'Editada de novo'}, format='json')
+        authenticated_client.delete(f'/api/tasks/{removed.id}/')
+        shared.unshare_with_user(test_user)
+        created = Task.objects.create(owner=test_user, title='Nova')
+        delta = self._poll(authenticated_client, token)
+        assert [task['id'] for task in delta['changes']] == [edited.id, created.id]
+        assert delta['changes'][0]['title'] == 'Editada de novo'
+        assert delta['deleted'] == [removed.id, shared.id]
+        assert delta['next_since'] > token
+        assert self._poll(authenticated_client, delta['next_since']) == {
+            'changes': [], 'deleted': [], 'next_since': delta['next_since'], 'has_more': False,
+        }
+
+    def test_changes_pages_in_sequence_order(self, authenticated_client, test_user):
+        tasks = [Task.objects.create(owner=test_user, title=f'Tarefa {i}') for i in range(5)]
+        Task.objects.filter(id=tasks[0].id).update(title='Alterada')
+        seen = []
+        token = 0
+        while True:
+            page = self._poll(authenticated_client, token, limit=2, fields='id,title')
+            assert len(page['changes']) <= 2
+            seen.extend(page['changes'])
+            token = page['next_since']
+            if not page['has_more']:
+                break
+        assert [task['id'] for task in seen] == [task.id for task in tasks[1:]] + [tasks[0].id]
+        assert seen[-1] == {'id': tasks[0].id, 'title': 'Alterada'}
+
+    def test_changes_follow_sharing_and_deletions(self, test_user, second_test_user):
+        from tasks.models import TaskChange
+        owner_client = APIClient()
+        owner_client.force_authenticate(user=test_user)
+        other_client = APIClient()
+        other_client.force_authenticate(user=second_test_user)
+        task = Task.objects.create(owner=test_user, title='Compartilhada')
+        owner_token = self._poll(owner_client)['next_since']
+        other_token = self._poll(other_client)['next_since']
+        owner_client.post('/api/tasks/bulk-share/', {
+            'action': 'share', 'task_ids': [task.id], 'emails': [second_test_user.email],
+        }, format='json')
+        delta = self._poll(owner_client, owner_token, fields='id,shared_count')
+        assert delta['changes'] == [{'id': task.id, 'shared_count': 1}]
+        assert [row['id'] for row in self._poll(other_client, other_token)['changes']] == [task.id]
+        other_token = self._poll(other_client)['next_since']
+        Task.objects.filter(id=task.id).delete()
+        assert self._poll(owner_client, owner_token)['deleted'] == [task.id]
+        assert self._poll(other_client, other_token)['deleted'] == [task.id]
+        Task.objects.create(owner=test_user, title='Outra').share_with_user(second_test_user)
+        second_test_user.delete()
+        assert not TaskChange.objects.filter(user_id=second_test_user.id).exists()
+        assert not TaskChange.objects.filter(user=test_user, deleted=False).exclude(
+            task_id__in=Task.objects.values('id')
+        ).exists()
+
+    def test_changes_invalid_params(self, authenticated_client):
+        for params in ({'since': 'abc'}, {'since': -1}, {'limit': 0}, {'limit': 5000}, {'fields': 'nope'}):
+            response = authenticated_client.get('/api/tasks/changes/', params)
+            assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+@pytest.mark.django_db
+class TestTaskEvents:
+    def _stream(self, user=None, token=None, headers=()):
+        # Conexão SSE simulada direto na aplicação ASGI, como o EventSource: token do stream em ?token=
+        import asyncio
+        from rest_framework_simplejwt.tokens import AccessToken
+        from authentication.tokens import StreamToken
+        from todolist_project.asgi import application
+        if user is not None:
+            token = str(StreamToken.for_access_token(user, AccessToken.for_user(user)))
+        query = f'token={token}'.encode() if token else b''
+        scope = {'type': 'http', 'method': 'GET', 'path': '/api/tasks/events/', 'query_string': query, 'headers': list(headers)}
+        connection = {'messages': [], 'disconnect': asyncio.Event()}
+
+        async def receive():
+            await connection['disconnect'].wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            connection['messages'].append(message)
+        connection['task'] = asyncio.ensure_future(application(scope, receive, send))
+        return connection
+
+    def _events(self, connection):
+        body = b''.join(m.get('body', b'') for m in connection['messages'] if m['type'] == 'http.response.body')
+        events = []
+        for block in body.decode().split('\n\n'):
+            lines = dict(line.split(': ', 1) for line in block.splitlines() if ': ' in line and not line.startswith(':'))
+            if 'event' in lines:
+                events.append((lines['event'], json.loads(lines['data']).get('task_ids')))
+        return events
+
+    def _run(self, scenario):
+        from asgiref.sync import async_to_sync
+        async_to_sync(scenario)()
+
+    def test_events_reach_users_who_see_the_task(self, test_user, second_test_user, django_capture_on_commit_callbacks):
+        import asyncio
+        from asgiref.sync import sync_to_async
+        from tasks.events import get_broker
+        third_user = User.objects.create_user(username='third@example.com', email='third@example.com', password='x')
+        task = Task.objects.create(owner=test_user, title='Compartilhada')
+        owner_client = APIClient()
+        owner_client.force_authenticate(user=test_user)
+
+        def writes():
+            with django_capture_on_commit_callbacks(execute=True):
+                task.share_with_user(second_test_user)
+                owner_client.patch(f'/api/tasks/{task.id}/toggle/')
+                own = Task.objects.create(owner=test_user, title='Só do dono')
+                task.unshare_with_user(second_test_user)
+                Task.objects.filter(id=own.id).delete()
+            return own.id
+
+        async def scenario():
+            owner, shared, other = self._stream(test_user), self._stream(second_test_user), self._stream(third_user)
+            while len(get_broker().subscribers) < 3:
+                await asyncio.sleep(0.01)
+            own_id = await sync_to_async(writes)()
+            for _ in range(200):
+                if len(self._events(owner)) == 5 and len(self._events(shared)) == 3:
+                    break
+                await asyncio.sleep(0.01)
+            assert self._events(owner) == [
+                ('shared', [task.id]), ('updated', [task.id]), ('created', [own_id]),
+                ('unshared', [task.id]), ('deleted', [own_id]),
+            ]
+            assert self._events(shared) == [('shared', [task.id]), ('updated', [task.id]), ('unshared', [task.id])]
+            assert self._events(other) == []
+            assert owner['messages'][0]['status'] == 200
+            for connection in (owner, shared, other):
+                connection['disconnect'].set()
+                await connection['task']
+            assert get_broker().subscribers == {}
+        self._run(scenario)
+
+    def test_change_feed_broker_reads_other_processes_writes(self, settings, test_user, second_test_user):
+        import asyncio
+        from asgiref.sync import sync_to_async
+        from tasks import events
+        settings.TASK_EVENTS_BROKER = 'tasks.events.ChangeFeedBroker'
+        settings.TASK_EVENTS_POLL_INTERVAL = 0.01
+        events.get_broker.cache_clear()
+        task = Task.objects.create(owner=test_user, title='Compartilhada')
+
+        async def wait_for(connection, count):
+            for _ in range(300):
+                if len(self._events(connection)) >= count:
+                    return self._events(connection)
+                await asyncio.sleep(0.01)
+            return self._events(connection)
+
+        async def scenario():
+            owner, shared = self._stream(test_user), self._stream(second_test_user)
+            broker = events.get_broker()
+            while len(broker.subscribers) < 2 or broker.last_id is None:
+                await asyncio.sleep(0.01)
+            # Nenhuma publicação neste processo: só o que os triggers gravaram em TaskChange
+            await sync_to_async(task.share_with_user)(second_test_user)
+            assert await wait_for(shared, 1) == [('updated', [task.id])]
+            own = await sync_to_async(Task.objects.create)(owner=test_user, title='Só do dono')
+            await sync_to_async(task.unshare_with_user)(second_test_user)
+            assert await wait_for(shared, 2) == [('updated', [task.id]), ('deleted', [task.id])]
+            # O dono continua enxergando as duas: só `updated`, em um ou mais lotes
+            owner_events = await wait_for(owner, 3)
+            assert {event for event, _ in owner_events} == {'updated'}
+            assert {task_id for _, task_ids in owner_events for task_id in task_ids} == {own.id, task.id}
+            for connection in (owner, shared):
+                connection['disconnect'].set()
+                await connection['task']
+            while not broker.poller.done():
+                await asyncio.sleep(0.01)
+            assert broker.last_id is None
+        try:
+            self._run(scenario)
+        finally:
+            events.get_broker.cache_clear()
+
+    def test_events_require_authentication(self, test_user):
+        from rest_framework_simplejwt.tokens import AccessToken
+        access = str(AccessToken.for_user(test_user))
+
+        async def scenario():
+            # O token de acesso só vale no cabeçalho: na URL ele iria para os logs
+            rejected = (self._stream(), self._stream(token='invalido'), self._stream(token=access))
+            for connection in rejected:
+                await connection['task']
+                assert connection['messages'][0]['status'] == status.HTTP_401_UNAUTHORIZED
+            connection = self._stream(headers=[(b'authorization', f'Bearer {access}'.encode())])
+            while not connection['messages']:
+                await asyncio.sleep(0.01)
+            assert connection['messages'][0]['status'] == status.HTTP_200_OK
+            connection['disconnect'].set()
+            await connection['task']
+        import asyncio
+        self._run(scenario)
+
+    def test_stream_token_endpoint(self, authenticated_client, settings):
+        from authentication.tokens import StreamToken
+        settings.TASK_EVENTS_TOKEN_SECONDS = 30
+        response = authenticated_client.post('/api/tasks/events/token/')
+        assert response.status_code == status.HTTP_200_OK
+        assert 0 < response.data['expires_in'] <= 30
+        token = StreamToken(response.data['token'])
+        assert token['token_type'] == 'stream'
+        assert token['session_exp'] > token['exp']
+        # Não serve como token de acesso
+        response = APIClient().get('/api/tasks/', HTTP_AUTHORIZATION=f"Bearer {response.data['token']}")
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert APIClient().post('/api/tasks/events/token/').status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_stream_closes_when_access_expires_or_user_is_deactivated(self, settings, test_user, second_test_user):
+        import asyncio
+        from asgiref.sync import sync_to_async
+        from rest_framework_simplejwt.tokens import AccessToken
+        from authentication.tokens import StreamToken
+        from tasks.events import EXPIRED
+        settings.TASK_EVENTS_HEARTBEAT = 0.05
+        access = AccessToken.for_user(test_user)
+        access.set_exp(lifetime=timedelta(seconds=1))
+        expiring = str(StreamToken.for_access_token(test_user, access))
+
+        async def closed(connection):
+            await asyncio.wait_for(connection['task'], 5)
+            last = connection['messages'][-1]
+            return last['body'] == EXPIRED and not last.get('more_body', False)
+
+        async def scenario():
+            connection = self._stream(token=expiring)
+            assert await closed(connection)
+            connection = self._stream(second_test_user)
+            while not connection['messages']:
+                await asyncio.sleep(0.01)
+            await sync_to_async(User.objects.filter(pk=second_test_user.pk).update)(is_active=False)
+            assert await closed(connection)
+        self._run(scenario)
+
+    def test_slow_client_gets_resync(self):
+        from tasks.events import RESYNC, Subscription, encode_event
+        subscription = Subscription(user_id=1, maxsize=3)
+        for task_id in range(3):
+            subscription.put(encode_event('updated', {'task_ids': [task_id]}))
+        assert len(subscription.messages) == 3
+        for task_id in range(3, 10):
+            subscription.put(encode_event('updated', {'task_ids': [task_id]}))
+        assert list(subscription.messages) == [RESYNC]
+        assert subscription.dropped == 10
+        subscription.messages.popleft()
+        subscription.put(encode_event('updated', {'task_ids': [10]}))
+        assert len(subscription.messages) == 1
+
+@pytest.mark.django_db
+class TestAsyncViews:
+    def _call(self, view, method, path, user=None, data=None, headers=None, **view_kwargs):
+        # Chama a view assíncrona direto, como o ASGIHandler faria depois do roteamento
+        from asgiref.sync import async_to_sync
+        from django.core.cache import cache
+        from django.test import AsyncRequestFactory
+        from rest_framework_simplejwt.tokens import AccessToken
+        headers = dict(headers or {})
+        if user is not None:
+            headers['Authorization'] = f'Bearer {AccessToken.for_user(user)}'
+        factory = AsyncRequestFactory()
+        if method == 'get':
+            request = factory.get(path, headers=headers)
+        else:
+            request = getattr(factory, method)(path, json.dumps(data or {}), content_type='application/json', headers=headers)
+        cache.clear()
+        return async_to_sync(view)(request, **view_kwargs)
+
+    def test_reads_match_sync_views(self, authenticated_client, test_user, second_test_user):
+        from django.core.cache import cache
+        from tasks import async_views
+        tasks = [
+            Task.objects.create(owner=test_user, title=f'Tarefa {i}', priority=['low', 'high'][i % 2], tags='casa')
+            for i in range(5)
+        ]
+        shared = Task.objects.create(owner=second_test_user, title='Compartilhada')
+        shared.share_with_user(test_user)
+        tasks[0].share_with_user(second_test_user)
+        reads = [
+            (async_views.task_list_create, '/api/tasks/?page_size=2&page=2&ordering=priority', {}),
+            (async_views.task_list_create, '/api/tasks/?pagination=cursor&page_size=3&fields=compact&include_count=true', {}),
+            (async_views.task_list_create, '/api/tasks/?search=Tarefa&tag=casa', {}),
+            (async_views.task_list_create, '/api/tasks/?fields=bogus', {}),
+            (async_views.task_detail, f'/api/tasks/{tasks[0].id}/', {'task_id': tasks[0].id}),
+            (async_views.task_detail, f'/api/tasks/{shared.id}/', {'task_id': shared.id}),
+            (async_views.task_shared_users, f'/api/tasks/{tasks[0].id}/shared-users/', {'task_id': tasks[0].id}),
+            (async_views.task_shared_users, f'/api/tasks/{shared.id}/shared-users/', {'task_id': shared.id}),
+        ]
+        for view, path, view_kwargs in reads:
+            cache.clear()
+            expected = authenticated_client.get(path)
+            response = self._call(view, 'get', path, test_user, **view_kwargs)
+            assert response.status_code == expected.status_code, path
+            assert json.loads(response.content) == json.loads(expected.content), path
+            if view is async_views.task_detail:
+                # O ETag da listagem inclui a versão de visibilidade, refeita a cada cache.clear()
+                assert response['ETag'] == expected['ETag'], path
+
+        cursor = json.loads(self._call(async_views.task_list_create, 'get', '/api/tasks/?pagination=cursor&page_size=3', test_user).content)
+        rest = self._call(
+            async_views.task_list_create, 'get', f"/api/tasks/?pagination=cursor&page_size=3&cursor={cursor['next_cursor']}", test_user
+        )
+        assert len(cursor['results']) + len(json.loads(rest.content)['results']) == 6
+        bad_cursor = self._call(async_views.task_list_create, 'get', '/api/tasks/?cursor=xyz', test_user)
+        assert bad_cursor.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_list_with_database_cache(self, settings, test_user):
+        from asgiref.sync import async_to_sync
+        from django.core.management import call_command
+        from django.test import AsyncRequestFactory
+        from rest_framework_simplejwt.tokens import AccessToken
+        from core.routers import finish_request, start_request, stick_to_primary
+        from tasks import async_views
+        # O cache padrão do contêiner consulta o banco: nada dele pode rodar no event loop
+        settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'async_cache'}}
+        call_command('createcachetable', verbosity=0)
+        # Com réplicas a aderência ao primário também é lida do cache (a réplica nem existe aqui)
+        settings.DATABASE_REPLICAS = ['replica1']
+        stick_to_primary([test_user.id])
+        Task.objects.create(owner=test_user, title='No DatabaseCache')
+        headers = {'Authorization': f'Bearer {AccessToken.for_user(test_user)}'}
+        for expected in ('MISS', 'HIT'):
+            token = start_request('GET')
+            try:
+                response = async_to_sync(async_views.task_list_create)(AsyncRequestFactory().get('/api/tasks/', headers=headers))
+            finally:
+                finish_request(token)
+            assert response.status_code == status.HTTP_200_OK
+            assert response['X-Cache'] == expected
+            assert [task['title'] for task in json.loads(response.content)['results']] == ['No DatabaseCache']
+
+    def test_toggle_and_preconditions(self, test_user, second_test_user):
+        from tasks import async_views
+        task = Task.objects.create(owner=test_user, title='Alternar')
+        task.share_with_user(second_test_user)
+        path = f'/api/tasks/{task.id}/toggle/'
+
+        response = self._call(async_views.task_toggle_complete, 'patch', path, test_user, task_id=task.id)
+        assert response.status_code == status.HTTP_200_OK
+        assert json.loads(response.content)['is_completed'] is True
+        task.refresh_from_db()
+        assert task.status == 'completed' and task.completed_at is not None
+
+        detail = self._call(async_views.task_detail, 'get', f'/api/tasks/{task.id}/', test_user, task_id=task.id)
+        assert detail['ETag'] == response['ETag']
+        not_modified = self._call(
+            async_views.task_detail, 'get', f'/api/tasks/{task.id}/', test_user,
+            headers={'If-None-Match': detail['ETag']}, task_id=task.id
+        )
+        assert not_modified.status_code == status.HTTP_304_NOT_MODIFIED
+        stale = self._call(
+            async_views.task_toggle_complete, 'patch', path, test_user, headers={'If-Match': '"stale"'}, task_id=task.id
+        )
+        assert stale.status_code == status.HTTP_412_PRECONDITION_FAILED
+        forbidden = self._call(async_views.task_toggle_complete, 'patch', path, second_test_user, task_id=task.id)
+        assert forbidden.status_code == status.HTTP_403_FORBIDDEN
+        missing = self._call(async_views.task_toggle_complete, 'patch', '/api/tasks/999999/toggle/', test_user, task_id=999999)
+        assert missing.status_code == status.HTTP_404_NOT_FOUND
+
+        response = self._call(async_views.task_toggle_complete, 'patch', path, test_user, task_id=task.id)
+        task.refresh_from_db()
+        assert json.loads(response.content)['is_completed'] is False
+        assert task.status == 'pending' and task.completed_at is None
+
+    def test_other_methods_and_auth_failures_use_sync_views(self, test_user, second_test_user):
+        from tasks import async_views, views
+        unauthenticated = self._call(async_views.task_list_create, 'get', '/api/tasks/')
+        assert unauthenticated.status_code == status.HTTP_401_UNAUTHORIZED
+        invalid = self._call(async_views.task_detail, 'get', '/api/tasks/1/', headers={'Authorization': 'Bearer xyz'}, task_id=1)
+        assert invalid.status_code == status.HTTP_401_UNAUTHORIZED
+        second_test_user.is_active = False
+        second_test_user.save()
+        inactive = self._call(async_views.task_list_create, 'get', '/api/tasks/', second_test_user)
+        assert inactive.status_code == status.HTTP_401_UNAUTHORIZED
+
+        created = self._call(async_views.task_list_create, 'post', '/api/tasks/', test_user, data={'title': 'Nova'})
+        assert created.status_code == status.HTTP_201_CREATED
+        task = Task.objects.get(title='Nova')
+        updated = self._call(
+            async_views.task_detail, 'patch', f'/api/tasks/{task.id}/', test_user, data={'title': 'Editada'}, task_id=task.id
+        )
+        assert updated.status_code == status.HTTP_200_OK
+        assert Task.objects.get(id=task.id).title == 'Editada'
+        assert async_views.task_detail.csrf_exempt
+        assert async_views.task_detail.cls is views.task_detail.cls
+
+
+@pytest.mark.django_db(transaction=True)
+class TestServe:
+    def test_application_is_preloaded_with_worker_settings(self):
+        from core.serving import build_application, warm_up_worker
+        application = build_application('asgi', {'workers': 3, 'max_requests': 500, 'max_requests_jitter': 50})
+        assert application.cfg.worker_class_str == 'uvicorn.workers.UvicornWorker'
+        assert application.cfg.preload_app is True
+        assert (application.cfg.workers, application.cfg.max_requests, application.cfg.max_requests_jitter) == (3, 500, 50)
+        assert application.cfg.post_worker_init is warm_up_worker
+        assert build_application('gthread', {}, warm=False).cfg.worker_class_str == 'gthread'
+
+    def test_warm_up_opens_a_connection_in_each_thread(self, monkeypatch):
+        import threading
+        from concurrent.futures import ThreadPoolExecutor
+        from types import SimpleNamespace
+        from django.db import connection
+        from core.serving import warm_up, warm_up_worker
+        warm_up()
+        pool = ThreadPoolExecutor(max_workers=3)
+        worker = SimpleNamespace(tpool=pool, cfg=SimpleNamespace(threads=3, worker_class_str='gthread'))
+        warm_up_worker(worker)
+
+        barrier = threading.Barrier(3)
+
+        def in_each_thread(function):
+            def run():
+                barrier.wait()
+                return function()
+            return [future.result() for future in [pool.submit(run) for _ in range(3)]]
+        try:
+            assert in_each_thread(lambda: connection.connection is not None) == [True] * 3
+        finally:
+            in_each_thread(lambda: connection.close())
+            pool.shutdown()
+        # ASGI: as requisições usam conexões das threads do sync_to_async, nenhuma é aberta aqui
+        from core import serving
+        opened = []
+        monkeypatch.setattr(serving, 'open_connections', lambda: opened.append(True))
+        warm_up_worker(SimpleNamespace(cfg=SimpleNamespace(worker_class_str='uvicorn.workers.UvicornWorker')))
+        assert opened == []
+
+    def test_serve_rejects_invalid_counts(self):
+        from django.core.management import CommandError, call_command
+        with pytest.raises(CommandError):
+            call_command('serve', '--workers', '0')
+
+    def test_serve_requires_a_cross_process_broker_for_asgi_workers(self, settings, monkeypatch):
+        from io import StringIO
+        from django.core.management import CommandError, call_command
+        from core.management.commands import serve
+        settings.WEB_PROCESSES = 1
+        started = []
+
+        class Application:
+            def __init__(self, worker_class, options, warm=True):
+                self.worker_class = worker_class
+
+            def run(self):
+                started.append(self.worker_class)
+        monkeypatch.setattr(serve, 'build_application', Application)
+        output = {'stdout': StringIO(), 'stderr': StringIO()}
+        with pytest.raises(CommandError, match='ChangeFeedBroker'):
+            call_command('serve', '--workers', '2', '--worker-class', 'asgi', **output)
+        # gthread não atende o SSE: o broker não importa
+        call_command('serve', '--workers', '2', '--worker-class', 'gthread', **output)
+        settings.TASK_EVENTS_BROKER = 'tasks.events.ChangeFeedBroker'
+        call_command('serve', '--workers', '2', **output)
+        # O padrão atende o SSE
+        assert started == ['gthread', 'asgi']
+        monkeypatch.setattr('tasks.changes.changes_available', lambda using='default': False)
+        with pytest.raises(CommandError, match='banco de dados'):
+            call_command('serve', '--workers', '2', **output)
+
+
+@pytest.mark.django_db
+class TestSqliteBackend:
+    def _wrapper(self, path, alias, **options):
+        from django.db import connection
+        from core.backends.sqlite3.base import DatabaseWrapper
+        settings_dict = dict(connection.settings_dict, NAME=str(path), TEST={})
+        settings_dict['OPTIONS'] = dict(settings_dict['OPTIONS'], **options)
+        return DatabaseWrapper(settings_dict, alias=alias)
+
+    def _pragma(self, wrapper, name):
+        with wrapper.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_pragmas_applied_on_new_connections(self, tmp_path):
+        wrapper = self._wrapper(tmp_path / 'db.sqlite3', 'pragmas')
+        try:
+            assert self._pragma(wrapper, 'journal_mode') == 'wal'
+            assert self._pragma(wrapper, 'synchronous') == 1
+            assert self._pragma(wrapper, 'busy_timeout') == 5000
+            assert self._pragma(wrapper, 'temp_store') == 2
+            assert self._pragma(wrapper, 'cache_size') == -20000
+        finally:
+            wrapper.close()
+
+    def test_write_transactions_take_the_write_lock_at_begin(self, tmp_path):
+        from django.db import OperationalError
+        path = tmp_path / 'db.sqlite3'
+        first = self._wrapper(path, 'first')
+        second = self._wrapper(path, 'second', pragmas={'busy_timeout': 0})
+        try:
+            with first.cursor() as cursor:
+                cursor.execute('CREATE TABLE t (id INTEGER PRIMARY KEY)')
+            # Transação comum (DEFERRED): não reserva nada até escrever
+            first._start_transaction_under_autocommit()
+            with second.cursor() as cursor:
+                cursor.execute('BEGIN IMMEDIATE')
+                cursor.execute('ROLLBACK')
+            first.connection.rollback()
+            first.write_transaction = True
+            first._start_transaction_under_autocommit()
+            # Nenhuma escrita ainda, mas BEGIN IMMEDIATE já reservou o banco
+            with pytest.raises(OperationalError, match='locked'):
+                with second.cursor() as cursor:
+                    cursor.execute('BEGIN IMMEDIATE')
+            with second.cursor() as cursor:
+                cursor.execute('SELECT COUNT(*) FROM t')
+                assert cursor.fetchone()[0] == 0
+            first.connection.rollback()
+        finally:
+            first.close()
+            second.close()
+
+    def test_invalid_options_are_rejected(self, tmp_path):
+        from django.core.exceptions import ImproperlyConfigured
+        with pytest.raises(ImproperlyConfigured):
+            self._wrapper(tmp_path / 'a.sqlite3', 'bad_pragma', pragmas={'journal_mode; DROP TABLE x': 1}).ensure_connection()
+        with pytest.raises(ImproperlyConfigured):
+            self._wrapper(tmp_path / 'b.sqlite3', 'bad_mode', transaction_mode='LATER')._start_transaction_under_autocommit()
+        with pytest.raises(ImproperlyConfigured):
+            self._wrapper(tmp_path / 'c.sqlite3', 'bad_write_mode', write_transaction_mode='NOW').write_transaction_mode
+
+    @pytest.mark.django_db(transaction=True)
+    def test_write_atomic_opens_immediate_only_for_the_outer_block(self):
+        from django.db import connection, transaction
+        from django.test.utils import CaptureQueriesContext
+        from core.transactions import write_atomic
+        with CaptureQueriesContext(connection) as queries:
+            with transaction.atomic():
+                Task.objects.count()
+            with write_atomic():
+                with transaction.atomic():
+                    Task.objects.count()
+            with transaction.atomic():
+                Task.objects.count()
+        begins = [query['sql'] for query in queries.captured_queries if query['sql'].startswith('BEGIN')]
+        assert begins == ['BEGIN DEFERRED', 'BEGIN IMMEDIATE', 'BEGIN DEFERRED']
+        assert connection.write_transaction is False
+
+    @pytest.mark.django_db(transaction=True)
+    def test_write_views_write_in_one_immediate_transaction(self, authenticated_client, test_user, second_test_user):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        task = Task.objects.create(owner=test_user, title='Escrita')
+        requests = [
+            lambda: authenticated_client.post('/api/tasks/', {'title': 'Nova'}),
+            lambda: authenticated_client.patch(f'/api/tasks/{task.id}/', {'title': 'Editada'}),
+            lambda: authenticated_client.patch(f'/api/tasks/{task.id}/toggle/'),
+            lambda: authenticated_client.post(f'/api/tasks/{task.id}/shared-users/', {'email': second_test_user.email}),
+            lambda: authenticated_client.post(f'/api/tasks/{task.id}/remove-user/', {'user_id': second_test_user.id}),
+            lambda: authenticated_client.delete(f'/api/tasks/{task.id}/'),
+        ]
+        for send in requests:
+            with CaptureQueriesContext(connection) as queries:
+                response = send()
+            assert response.status_code < 300
+            sqls = [query['sql'] for query in queries.captured_queries]
+            # Tarefa, TaskAccess e TaskTag gravados juntos, na transação de escrita
+            assert [sql for sql in sqls if sql.startswith('BEGIN')] == ['BEGIN IMMEDIATE']
+            writes = [index for index, sql in enumerate(sqls) if sql.split(' ', 1)[0] in ('INSERT', 'UPDATE', 'DELETE')]
+            assert writes and min(writes) > sqls.index('BEGIN IMMEDIATE')
+
+
+@pytest.mark.django_db(transaction=True)
+class TestReplicaRouting:
+    @pytest.fixture
+    def replica(self, settings, tmp_path):
+        # Uma cópia do banco de testes em arquivo fazendo papel de réplica
+        from django.db import connections
+        connections.settings['replica1'] = dict(
+            connections['default'].settings_dict, NAME=str(tmp_path / 'replica1.sqlite3'), TEST={'MIRROR': 'default'}
+        )
+        settings.DATABASE_REPLICAS = ['replica1']
+        yield 'replica1'
+        connections['replica1'].close()
+        del connections['replica1']
+        del connections.settings['replica1']
+
+    def test_router_decisions(self, settings, test_user, second_test_user):
+        from django.db import transaction
+        from core.routers import PrimaryReplicaRouter, finish_request, route_user, start_request, stick_to_primary
+        router = PrimaryReplicaRouter()
+        assert router.db_for_read(Task) is None
+        settings.DATABASE_REPLICAS = ['replica1']
+        assert router.db_for_read(Task) == 'default'
+
+        def read_as(user, method='GET', model=Task):
+            token = start_request(method)
+            try:
+                route_user(user.id)
+                return router.db_for_read(model)
+            finally:
+                finish_request(token)
+        assert read_as(test_user) == 'replica1'
+        assert read_as(test_user, model=User) is None
+        assert read_as(test_user, 'PATCH') == 'default'
+        with transaction.atomic():
+            assert read_as(test_user) == 'default'
+        stick_to_primary([test_user.id])
+        assert read_as(test_user) == 'default'
+        assert read_as(second_test_user) == 'replica1'
+        assert router.db_for_write(Task) == 'default'
+        assert router.allow_migrate('replica1', 'tasks') is False
+        # Aderência em locmem não é vista pelos outros workers: tudo no primário
+        settings.WEB_PROCESSES = 2
+        assert read_as(second_test_user) == 'default'
+
+    def test_user_reads_own_writes_after_replica_lag(self, replica, settings, authenticated_client, test_user):
+        from io import StringIO
+        from django.core.management import call_command
+        copied = Task.objects.create(owner=test_user, title='Na réplica')
+        call_command('refresh_sqlite_replicas', stdout=StringIO())
+        # Escrita que a réplica ainda não recebeu, sem marcar o usuário para o primário
+        settings.DATABASE_REPLICAS = []
+        Task.objects.create(owner=test_user, title='Só no primário')
+        settings.DATABASE_REPLICAS = [replica]
+        from django.core.cache import cache
+        cache.clear()
+
+        response = authenticated_client.get('/api/tasks/')
+        assert [task['title'] for task in response.data['results']] == ['Na réplica']
+        response = authenticated_client.patch(f'/api/tasks/{copied.id}/toggle/')
+        assert response.status_code == status.HTTP_200_OK
+        response = authenticated_client.get('/api/tasks/')
+        assert {task['title'] for task in response.data['results']} == {'Na réplica', 'Só no primário'}
+
+    def test_replica_reads_are_not_cached(self, replica, settings, authenticated_client, test_user):
+        from io import StringIO
+        from django.core.management import call_command
+        Task.objects.create(owner=test_user, title='Na réplica')
+        call_command('refresh_sqlite_replicas', stdout=StringIO())
+        # Escrita já fora da janela de aderência: a versão mudou, a réplica não
+        Task.objects.create(owner=test_user, title='Só no primário')
+        from django.core.cache import cache
+        from core.routers import STICKY_KEY
+        cache.delete(STICKY_KEY.format(user_id=test_user.id))
+
+        stale = authenticated_client.get('/api/tasks/')
+        assert [task['title'] for task in stale.data['results']] == ['Na réplica']
+        call_command('refresh_sqlite_replicas', stdout=StringIO())
+        response = authenticated_client.get('/api/tasks/', HTTP_IF_NONE_MATCH=stale['ETag'])
+        assert response.status_code == status.HTTP_200_OK
+        assert response['X-Cache'] == 'MISS'
+        assert {task['title'] for task in response.data['results']} == {'Na réplica', 'Só no primário'}
+
+
+@pytest.mark.django_db
+class TestQueryPlans:
+    # As consultas das rotas mais usadas não podem voltar a percorrer uma tabela
+    # inteira: cada SELECT executado é repetido com EXPLAIN QUERY PLAN
+    HOT_PATHS = [
+        '/api/tasks/',
+        '/api/tasks/?status=pending',
+        '/api/tasks/?priority=high&ordering=-priority',
+        '/api/tasks/?overdue=true',
+        '/api/tasks/?due_date_from=2020-01-01&due_date_to=2030-01-01&ordering=due_date',
+        '/api/tasks/?ordering=title&page=2&page_size=2',
+        '/api/tasks/?pagination=cursor&fields=compact',
+        '/api/tasks/{task_id}/',
+        '/api/tasks/{task_id}/shared-users/',
+        '/api/tasks/stats/',
+    ]
+    INDEX_ORDERED_PATHS = ['/api/tasks/', '/api/tasks/?pagination=cursor&fields=compact']
+
+    def _plans(self, client, path):
+        from django.db import connection
+        selects = []
+
+        def capture(execute, sql, params, many, context):
+            if sql.lstrip().upper().startswith('SELECT'):
+                selects.append((sql, params))
+            return execute(sql, params, many, context)
+        with connection.execute_wrapper(capture):
+            response = client.get(path)
+        assert response.status_code == status.HTTP_200_OK, path
+        with connection.cursor() as cursor:
+            for sql, params in selects:
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+                yield sql, [row[-1] for row in cursor.fetchall()]
+
+    def test_hot_queries_use_indexes(self, authenticated_client, test_user, second_test_user):
+        now = timezone.now()
+        statuses = ['pending', 'in_progress', 'completed', 'cancelled']
+        Task.objects.bulk_create([
+            Task(owner=owner, title=f'Tarefa {i}', status=statuses[i % 4], priority='high' if i % 3 else 'low',
+                 due_date=now + timedelta(days=i - 10))
+            for owner in (test_user, second_test_user) for i in range(20)
+        ])
+        task = Task.objects.filter(owner=test_user).first()
+        task.share_with_user(second_test_user)
+        Task.objects.filter(owner=second_test_user)[:1].get().share_with_user(test_user)
+        for path in self.HOT_PATHS:
+            for sql, plan in self._plans(authenticated_client, path.format(task_id=task.id)):
+                full_scans = [line for line in plan if line.startswith('SCAN ')]
+                assert not full_scans, f"{path}: {sql}\n{plan}"
+                # A ordem padrão (páginas numeradas e cursor) sai pronta do índice
+                if path in self.INDEX_ORDERED_PATHS:
+                    assert not any('TEMP B-TREE' in line for line in plan), f"{path}: {sql}\n{plan}"
+
+
+@pytest.mark.django_db
+class TestAuthCache:
+    def _user_queries(self, client, path='/api/tasks/stats/'):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(path)
+        return response, [query for query in context.captured_queries if 'FROM "auth_user"' in query['sql']]
+
+    def test_repeated_requests_skip_user_query(self, authenticated_client, test_user):
+        from core.authentication import auth_cache_stats
+        response, queries = self._user_queries(authenticated_client)
+        assert response.status_code == status.HTTP_200_OK
+        assert len(queries) == 1
+        response, queries = self._user_queries(authenticated_client)
+        assert response.status_code == status.HTTP_200_OK
+        assert queries == []
+        stats = auth_cache_stats()
+        assert (stats['tokens']['hits'], stats['tokens']['misses']) == (1, 1)
+        assert (stats['users']['hits'], stats['users']['misses']) == (1, 1)
+        assert stats['users']['hit_rate'] == 50
+        test_user.is_staff = True
+        test_user.save()
+        response = authenticated_client.get('/api/tasks/cache-stats/')
+        assert response.data['auth']['users']['size'] == 1
+
+    def test_deactivated_user_rejected_within_ttl(self, authenticated_client, test_user, settings, monkeypatch):
+        import time
+        from types import SimpleNamespace
+        from core import authentication
+        settings.AUTH_USER_CACHE_SECONDS = 30
+        assert authenticated_client.get('/api/tasks/stats/').status_code == status.HTTP_200_OK
+        # Desativado por outro processo (sem sinal aqui): vale o cache até o TTL
+        User.objects.filter(pk=test_user.pk).update(is_active=False)
+        assert authenticated_client.get('/api/tasks/stats/').status_code == status.HTTP_200_OK
+        monkeypatch.setattr(authentication, 'time', SimpleNamespace(time=lambda: time.time() + 31))
+        assert authenticated_client.get('/api/tasks/stats/').status_code == status.HTTP_401_UNAUTHORIZED
+        monkeypatch.undo()
+        # Desativado neste processo: o post_save descarta o usuário na hora
+        User.objects.filter(pk=test_user.pk).update(is_active=True)
+        authentication.clear_auth_caches()
+        assert authenticated_client.get('/api/tasks/stats/').status_code == status.HTTP_200_OK
+        test_user.is_active = False
+        test_user.save()
+        assert authenticated_client.get('/api/tasks/stats/').status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_lru_bounds_and_expiry(self):
+        import time
+        from core.authentication import ExpiringLRU
+        entries = ExpiringLRU(2)
+        entries.set('a', 1, time.time() + 60)
+        entries.set('b', 2, time.time() + 60)
+        assert entries.get('a') == 1
+        entries.set('c', 3, time.time() + 60)
+        assert entries.get('b') is None
+        assert (entries.get('a'), entries.get('c')) == (1, 3)
+        entries.set('expirado', 4, time.time() - 1)
+        assert entries.get('expirado') is None
+        assert entries.stats()['size'] == 2
+
+
+@pytest.mark.django_db
+class TestTokenBlacklist:
+    def _login(self, api_client, test_user):
+        response = api_client.post('/api/auth/login/', {'email': 'test@example.com', 'password': 'testpass123'})
+        assert response.status_code == status.HTTP_200_OK
+        return response.data['refresh']
+
+    def test_refresh_is_single_use_without_blacklist_lookup(self, api_client, test_user):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        refresh = self._login(api_client, test_user)
+        with CaptureQueriesContext(connection) as context:
+            response = api_client.post('/api/auth/token/refresh/', {'refresh': refresh})
+        assert response.status_code == status.HTTP_200_OK
+        assert not any(
+            query['sql'].startswith('SELECT') and 'token_blacklist_blacklistedtoken' in query['sql']
+            for query in context.captured_queries
+        )
+        assert api_client.post('/api/auth/token/refresh/', {'refresh': refresh}).status_code == status.HTTP_401_UNAUTHORIZED
+        rotated = response.data['refresh']
+        assert api_client.post('/api/auth/token/refresh/', {'refresh': rotated}).status_code == status.HTTP_200_OK
+
+    def test_logout_blacklists_refresh_token(self, api_client, test_user):
+        refresh = self._login(api_client, test_user)
+        api_client.force_authenticate(user=test_user)
+        assert api_client.post('/api/auth/logout/', {'refresh': refresh}).status_code == status.HTTP_200_OK
+        assert api_client.post('/api/auth/logout/', {'refresh': refresh}).status_code == status.HTTP_400_BAD_REQUEST
+        api_client.force_authenticate(user=None)
+        assert api_client.post('/api/auth/token/refresh/', {'refresh': refresh}).status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_prune_tokens_removes_only_expired(self, test_user):
+        from io import StringIO
+        from django.core.management import call_command
+        from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+        now = timezone.now()
+        tokens = OutstandingToken.objects.bulk_create([
+            OutstandingToken(user=test_user, jti=f'jti-{i}', token='x', expires_at=now + timedelta(days=1 if i < 2 else -1))
+            for i in range(7)
+        ])
+        BlacklistedToken.objects.bulk_create([BlacklistedToken(token=token) for token in tokens[1:5]])
+        output = StringIO()
+        call_command('prune_tokens', '--batch-size', '2', stdout=output)
+        assert 'Emitidos: 5 | Na blacklist: 3' in output.getvalue()
+        assert sorted(OutstandingToken.objects.values_list('jti', flat=True)) == ['jti-0', 'jti-1']
+        assert list(BlacklistedToken.objects.values_list('token__jti', flat=True)) == ['jti-1']
+
+
+@pytest.mark.django_db
+class TestPasswordHashing:
+    def _login(self, api_client):
+        return api_client.post('/api/auth/login/', {'email': 'test@example.com', 'password': 'testpass123'})
+
+    def test_login_rehashes_with_configured_iterations(self, api_client, test_user, settings):
+        assert test_user.password.startswith('pbkdf2_sha256$600000$')
+        settings.PASSWORD_HASH_ITERATIONS = 1000
+        assert self._login(api_client).status_code == status.HTTP_200_OK
+        test_user.refresh_from_db()
+        assert test_user.password.startswith('pbkdf2_sha256$1000$')
+        assert self._login(api_client).status_code == status.HTTP_200_OK
+
+    def test_hashing_limit_sheds_logins_without_waiting(self, api_client, test_user, monkeypatch):
+        import threading
+        import time
+        from django.test import Client
+        from authentication import hashers
+        limiter = hashers.HashingLimiter(1)
+        monkeypatch.setattr(hashers, 'get_limiter', lambda: limiter)
+        started, release = threading.Event(), threading.Event()
+
+        def slow_hash():
+            started.set()
+            release.wait(5)
+        busy = threading.Thread(target=limiter.run, args=(slow_hash,))
+        busy.start()
+        started.wait(5)
+        try:
+            started_at = time.perf_counter()
+            response = self._login(api_client)
+            assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+            assert response['Retry-After'] == '1'
+            # Recusado na hora, sem prender a thread esperando a vaga
+            assert time.perf_counter() - started_at < 1
+            response = api_client.post('/api/auth/register/', {
+                'email': 'novo@example.com', 'password': 'senha-forte-123', 'confirm_password': 'senha-forte-123',
+                'first_name': 'Novo', 'last_name': 'Usuário',
+            })
+            assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+            assert not User.objects.filter(email='novo@example.com').exists()
+            # Login do admin (ModelBackend) também vira 503, não 500
+            response = Client().post('/admin/login/', {'username': 'ninguem', 'password': 'x'})
+            assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+            assert response['Retry-After'] == '1'
+        finally:
+            release.set()
+            busy.join()
+        # Terminado o hash em andamento, a vaga volta e o login entra
+        assert self._login(api_client).status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db
+class TestEmailIndex:
+    def _email_lookups(self, send):
+        from django.db import connection
+        selects = []
+
+        def capture(execute, sql, params, many, context):
+            # Só as consultas que procuram usuários pelo email
+            if sql.lstrip().upper().startswith('SELECT') and '"auth_user"."email"' in sql.partition(' WHERE ')[2]:
+                selects.append((sql, params))
+            return execute(sql, params, many, context)
+        with connection.execute_wrapper(capture):
+            response = send()
+        plans = []
+        with connection.cursor() as cursor:
+            for sql, params in selects:
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+                plans.append([row[-1] for row in cursor.fetchall()])
+        return response, plans
+
+    def test_email_lookups_use_index(self, api_client, authenticated_client, sample_task):
+        register = lambda: APIClient().post('/api/auth/register/', {
+            'email': 'novo@example.com', 'password': 'senha-forte-123', 'confirm_password': 'senha-forte-123',
+            'first_name': 'Novo', 'last_name': 'Usuário',
+        })
+        login = lambda: APIClient().post('/api/auth/login/', {'email': 'novo@example.com', 'password': 'senha-forte-123'})
+        share = lambda: authenticated_client.post(f'/api/tasks/{sample_task.id}/shared-users/', {'email': 'novo@example.com'})
+        bulk_share = lambda: authenticated_client.post('/api/tasks/bulk-share/', {
+            'action': 'share', 'task_ids': [sample_task.id], 'emails': ['novo@example.com'],
+        }, format='json')
+        for send, expected in ((register, 201), (login, 200), (share, 200), (bulk_share, 200)):
+            response, plans = self._email_lookups(send)
+            assert response.status_code == expected
+            # Uma única busca pelo email, pelo índice e nunca percorrendo auth_user
+            assert len(plans) == 1
+            assert all('auth_user_email_lower_uniq' in ' '.join(plan) for plan in plans), plans
+            assert not any(line.startswith('SCAN auth_user') for plan in plans for line in plan), plans
+
+    def test_email_is_unique_and_case_insensitive(self, api_client, authenticated_client, test_user, sample_task):
+        from django.db import IntegrityError, transaction
+        with pytest.raises(IntegrityError), transaction.atomic():
+            User.objects.create_user(username='outro', email='TEST@example.com', password='x')
+        # Usuários sem email ficam fora do índice
+        User.objects.create_user(username='admin1', email='', password='x')
+        User.objects.create_user(username='admin2', email='', password='x')
+
+        response = api_client.post('/api/auth/register/', {
+            'email': 'Test@Example.com', 'password': 'senha-forte-123', 'confirm_password': 'senha-forte-123',
+            'first_name': 'Outro', 'last_name': 'Usuário',
+        })
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'email' in response.data['errors']
+        response = api_client.post('/api/auth/login/', {'email': 'TEST@example.com', 'password': 'testpass123'})
+        assert response.status_code == status.HTTP_200_OK
+
+        second = User.objects.create_user(username='second@example.com', email='Second@Example.com', password='x')
+        response = authenticated_client.post(f'/api/tasks/{sample_task.id}/shared-users/', {'email': 'second@example.COM'})
+        assert response.status_code == status.HTTP_200_OK
+        assert sample_task.is_shared_with(second)
+        response = authenticated_client.post('/api/tasks/bulk-share/', {
+            'action': 'unshare', 'task_ids': [sample_task.id], 'emails': ['SECOND@example.com'],
+        }, format='json')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['user_errors'] == []
+        assert not sample_task.is_shared_with(second)
+
+
 @pytest.mark.django_db
 class TestTaskModelMethods:
     def test_share_with_user(self, test_user, second_test_user):
@@ -573,5 +2499,18 @@ class TestTaskModelMethods:
         tags = task.get_tags_list()
         assert tags == []
 
+    def test_priority_rank_maintained(self, test_user):
+        task = Task.objects.create(owner=test_user, title='Rank', priority='urgent')
+        assert task.priority_rank == 4
+        task.priority = 'low'
+        task.save(update_fields=['priority'])
+        task.refresh_from_db()
+        assert task.priority_rank == 1
+        Task.objects.filter(id=task.id).update(priority='high')
+        task.refresh_from_db()
+        assert task.priority_rank == 3
+        Task.objects.bulk_create([Task(owner=test_user, title='Bulk', priority='urgent')])
+        assert Task.objects.get(title='Bulk').priority_rank == 4
+
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
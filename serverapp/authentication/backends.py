@@ -0,0 +1,22 @@
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.models import User
+
+from .emails import filter_by_email
+
+
+class EmailBackend(ModelBackend):
+    # Login por email pelo índice em LOWER(email). Só atende authenticate(email=...);
+    # o login por username (admin) continua com o ModelBackend, sem calcular o hash
+    # duas vezes para uma senha errada
+    def authenticate(self, request, email=None, password=None, **kwargs):
+        if email is None or password is None:
+            return None
+        try:
+            user = filter_by_email(User._default_manager.all(), [email]).get()
+        except User.DoesNotExist:
+            # Mesmo custo de um usuário existente, como no ModelBackend
+            User().set_password(password)
+            return None
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
@@ -0,0 +1,20 @@
+from django.db.models import Q, UniqueConstraint
+from django.db.models.functions import Lower
+
+# Índice único em LOWER(email) na auth_user, criado pela migração deste app.
+# Usuários sem email (ex.: createsuperuser) ficam fora do índice
+EMAIL_CONSTRAINT = UniqueConstraint(
+    Lower('email'), condition=~Q(email=''), name='auth_user_email_lower_uniq'
+)
+
+
+def normalize_email(email):
+    return email.strip().lower()
+
+
+def filter_by_email(queryset, emails):
+    # Mesma expressão e mesma condição do índice, para o banco poder usá-lo
+    # (email__iexact vira um LIKE que percorre a tabela inteira no SQLite)
+    return queryset.filter(~Q(email='')).alias(email_lower=Lower('email')).filter(
+        email_lower__in=[normalize_email(email) for email in emails]
+    )
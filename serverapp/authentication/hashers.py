@@ -0,0 +1,56 @@
+import os
+import threading
+
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+class PasswordHashingBusy(Exception):
+    # Convertida em 503 com Retry-After por core.middleware.PasswordHashingBusyMiddleware
+    pass
+
+
+class HashingLimiter:
+    # No máximo `concurrency` hashes ao mesmo tempo por processo, calculados na
+    # própria thread da requisição. Sem vaga, PasswordHashingBusy sai na hora: uma
+    # requisição esperando prenderia a thread do worker, e uma onda de logins
+    # ocuparia todas as threads que as demais rotas da API precisam.
+    def __init__(self, concurrency):
+        self._slots = threading.BoundedSemaphore(concurrency)
+
+    def run(self, function, *args):
+        if not self._slots.acquire(blocking=False):
+            raise PasswordHashingBusy()
+        try:
+            return function(*args)
+        finally:
+            self._slots.release()
+
+
+_limiter = None
+_limiter_pid = None
+_limiter_lock = threading.Lock()
+
+
+def get_limiter():
+    # Um por processo: o semáforo do mestre não deve ser herdado pelos workers
+    global _limiter, _limiter_pid
+    with _limiter_lock:
+        if _limiter is None or _limiter_pid != os.getpid():
+            _limiter = HashingLimiter(settings.PASSWORD_HASHING_CONCURRENCY)
+            _limiter_pid = os.getpid()
+        return _limiter
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    # Mesmo algoritmo (pbkdf2_sha256) do hasher padrão: hashes existentes continuam
+    # válidos e os gravados com outra contagem de iterações são refeitos no próximo
+    # login (must_update). O cálculo passa pelo limite de hashes simultâneos.
+    @property
+    def iterations(self):
+        return settings.PASSWORD_HASH_ITERATIONS
+
+    def encode(self, password, salt, iterations=None):
+        if settings.PASSWORD_HASHING_CONCURRENCY <= 0:
+            return super().encode(password, salt, iterations)
+        return get_limiter().run(super().encode, password, salt, iterations)
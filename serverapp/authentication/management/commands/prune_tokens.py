@@ -0,0 +1,53 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from core.transactions import write_atomic
+
+
+class Command(BaseCommand):
+    help = (
+        "Remove os tokens de refresh expirados (emitidos e na blacklist) em lotes curtos, "
+        "cada um na própria transação. Feito para rodar periodicamente (cron)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Tokens removidos por transação'
+        )
+        parser.add_argument(
+            '--pause',
+            type=float,
+            default=0,
+            help='Segundos de espera entre lotes, para dar vez às escritas das requisições'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('--batch-size deve ser maior que zero')
+        # Token expirado já é recusado pela validação: a linha na blacklist não protege mais nada
+        expired = OutstandingToken.objects.filter(expires_at__lte=timezone.now())
+        totals = {OutstandingToken._meta.label: 0, BlacklistedToken._meta.label: 0}
+        last_id = 0
+        while True:
+            ids = list(expired.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size])
+            if not ids:
+                break
+            last_id = ids[-1]
+            with write_atomic():
+                # O CASCADE leva junto as linhas de BlacklistedToken
+                _, deleted = OutstandingToken.objects.filter(id__in=ids).only('id').delete()
+            for label, count in deleted.items():
+                totals[label] = totals.get(label, 0) + count
+            if options['pause']:
+                time.sleep(options['pause'])
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Tokens expirados removidos. Emitidos: {totals[OutstandingToken._meta.label]} | "
+            f"Na blacklist: {totals[BlacklistedToken._meta.label]}"
+        ))
@@ -0,0 +1,39 @@
+from django.db import migrations
+from django.db.models import Count, Q, UniqueConstraint
+from django.db.models.functions import Lower
+
+# Copiado de authentication/emails.py: a migração cria o índice como ele era
+# nesta versão, mesmo que o módulo mude depois
+EMAIL_CONSTRAINT = UniqueConstraint(
+    Lower('email'), condition=~Q(email=''), name='auth_user_email_lower_uniq'
+)
+
+
+def add_email_index(apps, schema_editor):
+    User = apps.get_model('auth', 'User')
+    duplicates = list(
+        User.objects.using(schema_editor.connection.alias).exclude(email='')
+        .values(email_lower=Lower('email')).annotate(total=Count('id')).filter(total__gt=1)
+        .values_list('email_lower', flat=True)[:10]
+    )
+    if duplicates:
+        raise RuntimeError(
+            'Existem usuários com o mesmo email (ignorando maiúsculas/minúsculas); '
+            f'corrija antes de migrar: {", ".join(duplicates)}'
+        )
+    schema_editor.add_constraint(User, EMAIL_CONSTRAINT)
+
+
+def remove_email_index(apps, schema_editor):
+    schema_editor.remove_constraint(apps.get_model('auth', 'User'), EMAIL_CONSTRAINT)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_email_index, remove_email_index),
+    ]
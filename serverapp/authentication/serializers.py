@@ -1,9 +1,15 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
 from django.contrib.auth import authenticate
-from django.db import transaction, IntegrityError
+from django.contrib.auth.hashers import make_password
+from django.db import IntegrityError
 import re
 import logging
+from rest_framework_simplejwt import serializers as jwt_serializers
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from .emails import filter_by_email
+from .tokens import RefreshToken
 
 logger = logging.getLogger(__name__)
 
@@ -49,9 +55,9 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Email não pode começar ou terminar com ponto.")
         if '..' in email:
             raise serializers.ValidationError("Email não pode conter pontos consecutivos.")
-        if User.objects.filter(email__iexact=email).exists():
-            raise serializers.ValidationError("Este email já está em uso.")
-        if User.objects.filter(username__iexact=email).exists():
+        # Verificação antecipada (evita calcular o hash à toa); duas requisições
+        # simultâneas esbarram no índice único em LOWER(email) ao criar
+        if filter_by_email(User.objects.all(), [email]).exists():
             raise serializers.ValidationError("Este email já está em uso.")
         return email
 
@@ -77,13 +83,8 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
     def validate(self, attrs):
         password = attrs.get('password')
         confirm_password = attrs.get('confirm_password')
-        email = attrs.get('email')
         if password != confirm_password:
             raise serializers.ValidationError("Senhas não coincidem.")
-        if email and User.objects.filter(email__iexact=email).exists():
-            raise serializers.ValidationError({
-                "email": ["Este email já está em uso."]
-            })
         attrs.pop('confirm_password', None)
         return attrs
 
@@ -92,28 +93,22 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         password = validated_data['password']
         first_name = validated_data['first_name']
         last_name = validated_data['last_name']
+        # O hash (caro, e que pode ser recusado com a fila cheia) é calculado antes
+        # do INSERT, fora do lock de escrita do SQLite
+        password = make_password(password)
         try:
-            with transaction.atomic():
-                if User.objects.filter(email__iexact=email).exists():
-                    raise serializers.ValidationError({
-                        "email": ["Este email já está em uso."]
-                    })
-                if User.objects.filter(username__iexact=email).exists():
-                    raise serializers.ValidationError({
-                        "email": ["Este email já está em uso."]
-                    })
-                
-                # Criar usuário apenas no Django
-                user = User.objects.create_user(
-                    username=email,
-                    email=email,
-                    password=password,
-                    first_name=first_name,
-                    last_name=last_name
-                )
-                logger.info(f"User created in Django: {email}")
-                return user
-                
+            # Criar usuário apenas no Django (como create_user, com a senha já em hash).
+            # Email ou username repetidos são recusados pelos índices únicos
+            user = User.objects.create(
+                username=User.normalize_username(email),
+                email=User.objects.normalize_email(email),
+                password=password,
+                first_name=first_name,
+                last_name=last_name
+            )
+            logger.info(f"User created in Django: {email}")
+            return user
+
         except IntegrityError as e:
             logger.error(f"Database integrity error during user creation: {str(e)}")
             raise serializers.ValidationError({
@@ -141,7 +136,7 @@ class UserLoginSerializer(serializers.Serializer):
         password = attrs.get('password', '')
         if not email or not password:
             raise serializers.ValidationError("Email e senha são obrigatórios.")
-        user = authenticate(username=email, password=password)
+        user = authenticate(email=email, password=password)
         if not user:
             raise serializers.ValidationError("Credenciais inválidas.")
         if not user.is_active:
@@ -201,3 +196,19 @@ class PasswordChangeSerializer(serializers.Serializer):
         if new_password == current_password:
             raise serializers.ValidationError("Nova senha deve ser diferente da atual.")
         return attrs
+
+
+class TokenRefreshSerializer(jwt_serializers.TokenRefreshSerializer):
+    def validate(self, attrs):
+        if not (jwt_settings.ROTATE_REFRESH_TOKENS and jwt_settings.BLACKLIST_AFTER_ROTATION):
+            return super().validate(attrs)
+        # O token usado entra na blacklist antes de emitir os novos; a inserção
+        # recusa um token já usado (ver tokens.RefreshToken.blacklist)
+        refresh = RefreshToken(attrs['refresh'])
+        refresh.blacklist()
+        data = {'access': str(refresh.access_token)}
+        refresh.set_jti()
+        refresh.set_exp()
+        refresh.set_iat()
+        data['refresh'] = str(refresh)
+        return data
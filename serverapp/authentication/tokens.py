@@ -0,0 +1,53 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt import tokens
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from core.transactions import write_atomic
+
+
+class RefreshToken(tokens.RefreshToken):
+    # Token de uso único (refresh com rotação e logout). Em vez de consultar a
+    # blacklist ao validar e depois inserir nela, só insere: token_id é único em
+    # BlacklistedToken, então a inserção falha se o token já foi usado. Vale entre
+    # processos e também para dois refreshes simultâneos com o mesmo token.
+    def check_blacklist(self):
+        pass
+
+    def blacklist(self):
+        jti = self.payload[api_settings.JTI_CLAIM]
+        with write_atomic():
+            outstanding, _created = OutstandingToken.objects.get_or_create(
+                jti=jti,
+                defaults={'token': str(self), 'expires_at': datetime_from_epoch(self.payload['exp'])},
+            )
+            try:
+                with transaction.atomic():
+                    return BlacklistedToken.objects.create(token=outstanding)
+            except IntegrityError:
+                raise TokenError(_("Token is blacklisted"))
+
+
+class StreamToken(tokens.Token):
+    # Só abre o stream de eventos (/api/tasks/events/?token=), pedido com o token
+    # de acesso em POST /api/tasks/events/token/. Vale por TASK_EVENTS_TOKEN_SECONDS,
+    # então o que ficar no log de acesso expira logo; `session_exp` é o exp do token
+    # de acesso que o pediu e o stream fecha nele.
+    token_type = 'stream'
+
+    @property
+    def lifetime(self):
+        return timedelta(seconds=settings.TASK_EVENTS_TOKEN_SECONDS)
+
+    @classmethod
+    def for_access_token(cls, user, access_token):
+        token = cls.for_user(user)
+        token['session_exp'] = access_token['exp']
+        token['exp'] = min(token['exp'], access_token['exp'])
+        return token
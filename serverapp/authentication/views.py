@@ -2,11 +2,12 @@ from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 import logging
 
+from .hashers import PasswordHashingBusy
+from .tokens import RefreshToken
 from .serializers import (
     UserRegistrationSerializer,
     UserLoginSerializer,
@@ -86,6 +87,10 @@ def register_user(request):
             'errors': serializer.errors
         }, status=status.HTTP_400_BAD_REQUEST)
         
+    except PasswordHashingBusy:
+        # 503 pelo PasswordHashingBusyMiddleware, como em qualquer outra view
+        logger.warning("Registro recusado: limite de hashes de senha simultâneos")
+        raise
     except Exception as e:
         logger.error(f"Erro durante o registro: {str(e)}", exc_info=True)
         return Response({
@@ -162,6 +167,9 @@ def login_user(request):
             'errors': serializer.errors
         }, status=status.HTTP_401_UNAUTHORIZED)
         
+    except PasswordHashingBusy:
+        logger.warning("Login recusado: limite de hashes de senha simultâneos")
+        raise
     except Exception as e:
         logger.error(f"Erro durante o login: {str(e)}", exc_info=True)
         return Response({
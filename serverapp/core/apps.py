@@ -1,6 +1,13 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
 
 
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from .authentication import forget_user
+        post_save.connect(forget_user, sender=settings.AUTH_USER_MODEL, dispatch_uid='core_forget_user_save')
+        post_delete.connect(forget_user, sender=settings.AUTH_USER_MODEL, dispatch_uid='core_forget_user_delete')
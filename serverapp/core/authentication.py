@@ -0,0 +1,129 @@
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from rest_framework_simplejwt import authentication
+from rest_framework_simplejwt.settings import api_settings
+
+from .routers import route_user
+
+
+class ExpiringLRU:
+    # Cache em memória do processo: no máximo `maxsize` entradas, a usada há mais
+    # tempo sai primeiro e cada uma vale até o seu `expires_at` (time.time()).
+    # Com workers gthread várias threads usam a mesma instância, daí o lock.
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > time.time():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, value, expires_at):
+        if self.maxsize <= 0 or expires_at <= time.time():
+            return
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': (self.hits / total * 100) if total else 0,
+            'size': len(self._entries),
+        }
+
+
+# Tokens já verificados (pelo SHA-256 do token, até o `exp`) e usuários por id
+# (AUTH_USER_CACHE_SECONDS). Alterar ou excluir um usuário limpa a entrada dele
+# neste processo; nos demais ela vale até expirar.
+validated_tokens = ExpiringLRU(settings.AUTH_TOKEN_CACHE_SIZE)
+users = ExpiringLRU(settings.AUTH_USER_CACHE_SIZE)
+
+
+def get_validated_token(raw_token, validate):
+    key = hashlib.sha256(raw_token).digest()
+    token = validated_tokens.get(key)
+    if token is None:
+        token = validate(raw_token)
+        validated_tokens.set(key, token, token.get('exp', 0))
+    return token
+
+
+def cached_user(user_id):
+    # Cópia: cada requisição pode alterar o próprio request.user
+    user = users.get(user_id)
+    return copy.copy(user) if user is not None else None
+
+
+def cache_user(user):
+    # Só usuários ativos (os inativos são recusados pela autenticação) e sem
+    # CHECK_REVOKE_TOKEN, que compara cada token com a senha atual
+    if user.is_active and not api_settings.CHECK_REVOKE_TOKEN:
+        users.set(
+            getattr(user, api_settings.USER_ID_FIELD), copy.copy(user),
+            time.time() + settings.AUTH_USER_CACHE_SECONDS
+        )
+
+
+def forget_user(sender, instance, **kwargs):
+    users.delete(getattr(instance, api_settings.USER_ID_FIELD))
+
+
+def auth_cache_stats():
+    return {'tokens': validated_tokens.stats(), 'users': users.stats()}
+
+
+def clear_auth_caches():
+    validated_tokens.clear()
+    users.clear()
+
+
+class JWTAuthentication(authentication.JWTAuthentication):
+    # Além da verificação do simplejwt, guarda tokens e usuários já validados:
+    # nas requisições seguintes com o mesmo token não há consulta a auth_user
+    def authenticate(self, request):
+        result = super().authenticate(request)
+        if result is not None:
+            # Informa ao roteador de réplicas quem fez a requisição (leituras do
+            # próprio usuário logo após uma escrita vão para o primário)
+            route_user(result[0].pk)
+        return result
+
+    def get_validated_token(self, raw_token):
+        return get_validated_token(raw_token, super().get_validated_token)
+
+    def get_user(self, validated_token):
+        user = cached_user(validated_token.get(api_settings.USER_ID_CLAIM))
+        if user is None:
+            user = super().get_user(validated_token)
+            cache_user(user)
+        return user
@@ -0,0 +1,63 @@
+import re
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+PRAGMA_NAME = re.compile(r'^[a-z_]+$')
+
+PRAGMA_VALUE = re.compile(r'^-?\w+$')
+
+TRANSACTION_MODES = ('DEFERRED', 'IMMEDIATE', 'EXCLUSIVE')
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    # SQLite com PRAGMAs aplicados a cada conexão nova (OPTIONS['pragmas']).
+    # transaction.atomic() abre com OPTIONS['transaction_mode'] (DEFERRED: leituras
+    # não disputam o lock de escrita) e core.transactions.write_atomic() com
+    # OPTIONS['write_transaction_mode'] (IMMEDIATE): a transação de escrita pega o
+    # lock no início e espera o busy_timeout, em vez de falhar com "database is
+    # locked" ao tentar promover uma leitura a escrita.
+    write_transaction = False
+    def get_connection_params(self):
+        kwargs = super().get_connection_params()
+        kwargs.pop('pragmas', None)
+        kwargs.pop('transaction_mode', None)
+        kwargs.pop('write_transaction_mode', None)
+        return kwargs
+
+    @property
+    def pragmas(self):
+        pragmas = self.settings_dict['OPTIONS'].get('pragmas', {})
+        invalid = [
+            name for name, value in pragmas.items()
+            if not PRAGMA_NAME.match(name) or not PRAGMA_VALUE.match(str(value))
+        ]
+        if invalid:
+            raise ImproperlyConfigured(f"PRAGMAs inválidos em OPTIONS['pragmas']: {', '.join(invalid)}")
+        return pragmas
+
+    def _transaction_mode(self, option, default):
+        mode = (self.settings_dict['OPTIONS'].get(option) or default).upper()
+        if mode not in TRANSACTION_MODES:
+            raise ImproperlyConfigured(
+                f"OPTIONS['{option}'] deve ser um de: {', '.join(TRANSACTION_MODES)}"
+            )
+        return mode
+
+    @property
+    def transaction_mode(self):
+        return self._transaction_mode('transaction_mode', 'DEFERRED')
+
+    @property
+    def write_transaction_mode(self):
+        return self._transaction_mode('write_transaction_mode', 'IMMEDIATE')
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        mode = self.write_transaction_mode if self.write_transaction else self.transaction_mode
+        self.cursor().execute(f'BEGIN {mode}')
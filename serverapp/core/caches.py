@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+# Backends cujo conteúdo só existe no próprio processo
+PROCESS_LOCAL_CACHES = (LocMemCache, DummyCache)
+
+
+def cache_is_shared(alias='default'):
+    return not isinstance(caches[alias], PROCESS_LOCAL_CACHES)
+
+
+def shared_state_available(alias='default'):
+    # Estado guardado no cache e lido por outras requisições (versões da listagem)
+    # só vale com um processo ou com um cache compartilhado entre eles (Redis,
+    # DatabaseCache no primário)
+    return settings.WEB_PROCESSES <= 1 or cache_is_shared(alias)
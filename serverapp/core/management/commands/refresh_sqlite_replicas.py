@@ -0,0 +1,31 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = (
+        "Copia o banco SQLite primário para as réplicas de DATABASE_REPLICA_URLS (backup online), "
+        "para testar localmente o roteamento de leituras"
+    )
+
+    def handle(self, *args, **options):
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError("Nenhuma réplica configurada (DATABASE_REPLICA_URLS)")
+        primary = connections['default']
+        aliases = ['default'] + settings.DATABASE_REPLICAS
+        if any(connections[alias].vendor != 'sqlite' for alias in aliases):
+            raise CommandError("Só réplicas SQLite em arquivo podem ser copiadas por este comando")
+        primary.ensure_connection()
+        for alias in settings.DATABASE_REPLICAS:
+            replica = connections[alias]
+            replica.close()
+            target = sqlite3.connect(replica.settings_dict['NAME'])
+            try:
+                primary.connection.backup(target)
+            finally:
+                target.close()
+            self.stdout.write(f"   {alias}: {replica.settings_dict['NAME']}")
+        self.stdout.write(self.style.SUCCESS(f"✅ Réplicas atualizadas: {len(settings.DATABASE_REPLICAS)}"))
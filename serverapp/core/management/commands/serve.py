@@ -0,0 +1,79 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.module_loading import import_string
+
+from core.caches import shared_state_available
+from core.serving import WORKER_CLASSES, build_application
+
+
+def default_workers():
+    return int(os.getenv('WEB_CONCURRENCY', 2 * (os.cpu_count() or 1) + 1))
+
+
+class Command(BaseCommand):
+    help = (
+        "Inicia o servidor de produção (gunicorn): vários workers pré-forkados a partir da "
+        "aplicação já carregada. SIGHUP reinicia os workers sem derrubar conexões"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bind', default=os.getenv('BIND', f"0.0.0.0:{os.getenv('PORT', '8000')}"))
+        parser.add_argument('--workers', type=int, default=default_workers(),
+                            help='Processos worker (padrão: WEB_CONCURRENCY ou 2 * CPUs + 1)')
+        parser.add_argument('--threads', type=int, default=int(os.getenv('WEB_THREADS', '4')),
+                            help='Threads por worker no modo gthread')
+        parser.add_argument('--worker-class', choices=sorted(WORKER_CLASSES), default=os.getenv('WEB_WORKER_CLASS', 'asgi'),
+                            help="'asgi' (padrão, uvicorn) atende também o SSE de /api/tasks/events/; 'gthread' e 'sync' não")
+        parser.add_argument('--max-requests', type=int, default=int(os.getenv('WEB_MAX_REQUESTS', '1000')),
+                            help='Recicla o worker após N requisições (0 desativa)')
+        parser.add_argument('--max-requests-jitter', type=int, default=int(os.getenv('WEB_MAX_REQUESTS_JITTER', '100')),
+                            help='Variação aleatória de --max-requests, para os workers não reiniciarem juntos')
+        parser.add_argument('--timeout', type=int, default=int(os.getenv('WEB_TIMEOUT', '30')),
+                            help='Segundos sem resposta antes de o worker ser reiniciado')
+        parser.add_argument('--graceful-timeout', type=int, default=int(os.getenv('WEB_GRACEFUL_TIMEOUT', '30')),
+                            help='Segundos para um worker terminar as requisições em andamento ao reiniciar')
+        parser.add_argument('--keep-alive', type=int, default=int(os.getenv('WEB_KEEP_ALIVE', '5')))
+        parser.add_argument('--pid', default=os.getenv('WEB_PIDFILE'), help='Arquivo com o PID do mestre (para kill -HUP)')
+        parser.add_argument('--no-warm-up', action='store_true',
+                            help='Não importa views/serializers nem abre conexões antes de aceitar requisições')
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1 or options['threads'] < 1:
+            raise CommandError('--workers e --threads devem ser maiores que zero')
+        gunicorn_options = {
+            'bind': [options['bind']],
+            'workers': options['workers'],
+            'threads': options['threads'],
+            'max_requests': options['max_requests'],
+            'max_requests_jitter': options['max_requests_jitter'] if options['max_requests'] else 0,
+            'timeout': options['timeout'],
+            'graceful_timeout': options['graceful_timeout'],
+            'keepalive': options['keep_alive'],
+            'accesslog': '-',
+            'errorlog': '-',
+        }
+        # Os workers herdam as configurações do mestre (preload_app)
+        settings.WEB_PROCESSES = max(settings.WEB_PROCESSES, options['workers'])
+        if options['worker_class'] == 'asgi':
+            broker = import_string(settings.TASK_EVENTS_BROKER)
+            if settings.WEB_PROCESSES > 1 and not getattr(broker, 'cross_process', False):
+                raise CommandError(
+                    f"{settings.TASK_EVENTS_BROKER} só entrega eventos às conexões do próprio processo: com "
+                    f"{settings.WEB_PROCESSES} workers use TASK_EVENTS_BROKER=tasks.events.ChangeFeedBroker "
+                    "(ou outro broker entre processos) ou --workers 1"
+                )
+            if not getattr(broker, 'available', lambda: True)():
+                raise CommandError(f"{settings.TASK_EVENTS_BROKER} não funciona com este banco de dados")
+        if not shared_state_available():
+            self.stderr.write(self.style.WARNING(
+                f"⚠️ Cache local ({settings.CACHES['default']['BACKEND']}) com {settings.WEB_PROCESSES} processos: "
+                "cache da listagem e leituras nas réplicas desativados. Use um cache compartilhado em CACHE_BACKEND "
+                "(django.core.cache.backends.redis.RedisCache ou django.core.cache.backends.db.DatabaseCache)"
+            ))
+        if options['pid']:
+            gunicorn_options['pidfile'] = options['pid']
+        threads = f" x {options['threads']} threads" if options['worker_class'] == 'gthread' else ''
+        self.stdout.write(f"🌐 {options['worker_class']}: {options['workers']} workers{threads} em {options['bind']}")
+        build_application(options['worker_class'], gunicorn_options, warm=not options['no_warm_up']).run()
@@ -0,0 +1,40 @@
+from asgiref.sync import iscoroutinefunction
+from django.http import JsonResponse
+from django.utils.decorators import sync_and_async_middleware
+from django.utils.deprecation import MiddlewareMixin
+
+from .routers import finish_request, start_request
+
+
+@sync_and_async_middleware
+def replica_routing_middleware(get_response):
+    # Abre o estado de roteamento de cada requisição (core.routers); a autenticação
+    # preenche o usuário. Sem réplicas configuradas o roteador o ignora.
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            token = start_request(request.method)
+            try:
+                return await get_response(request)
+            finally:
+                finish_request(token)
+    else:
+        def middleware(request):
+            token = start_request(request.method)
+            try:
+                return get_response(request)
+            finally:
+                finish_request(token)
+    return middleware
+
+
+class PasswordHashingBusyMiddleware(MiddlewareMixin):
+    # Qualquer view que calcule um hash de senha (login e cadastro da API, login do
+    # admin, troca de senha) responde 503 com Retry-After quando o limite de hashes
+    # simultâneos (authentication/hashers.py) não abre vaga a tempo, em vez de 500
+    def process_exception(self, request, exception):
+        from authentication.hashers import PasswordHashingBusy
+        if not isinstance(exception, PasswordHashingBusy):
+            return None
+        response = JsonResponse({'message': 'Servidor ocupado, tente novamente em instantes'}, status=503)
+        response['Retry-After'] = '1'
+        return response
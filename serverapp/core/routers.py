@@ -0,0 +1,104 @@
+import random
+from contextvars import ContextVar
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+from .caches import shared_state_available
+
+STICKY_KEY = 'db:primary:{user_id}'
+
+# Apps cujas leituras podem ir para as réplicas; o resto (usuários, tokens,
+# sessões) sempre lê do primário
+REPLICA_APPS = {'tasks'}
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_routing = ContextVar('replica_routing', default=None)
+
+
+class RequestRouting:
+    # Estado da requisição atual: quem é o usuário e se ela precisa do primário
+    def __init__(self, method):
+        self.user_id = None
+        self.primary = method not in SAFE_METHODS
+        self.replica_used = False
+        self._sticky = None
+
+    def sticky(self):
+        # Consultado uma vez por requisição
+        if self._sticky is None:
+            self._sticky = cache.get(STICKY_KEY.format(user_id=self.user_id)) is not None
+        return self._sticky
+
+
+def start_request(method):
+    return _routing.set(RequestRouting(method))
+
+
+def finish_request(token):
+    _routing.reset(token)
+
+
+def route_user(user_id):
+    state = _routing.get()
+    if state is not None:
+        state.user_id = user_id
+
+
+async def aroute_user(user_id):
+    # route_user das views assíncronas: a aderência ao primário sai do cache (o
+    # DatabaseCache consulta o banco), então é lida aqui fora do event loop e o
+    # roteador só usa o valor já guardado
+    route_user(user_id)
+    state = _routing.get()
+    if state is not None and settings.DATABASE_REPLICAS and not state.primary:
+        await sync_to_async(state.sticky)()
+
+
+def read_from_replica():
+    # Alguma leitura desta requisição foi para uma réplica, que pode estar atrasada
+    state = _routing.get()
+    return state is not None and state.replica_used
+
+
+def stick_to_primary(user_ids):
+    # Depois de uma escrita, quem enxerga o dado alterado lê do primário por
+    # DATABASE_REPLICA_STICKY_SECONDS, tempo para as réplicas alcançarem
+    if settings.DATABASE_REPLICAS and user_ids:
+        cache.set_many(
+            {STICKY_KEY.format(user_id=user_id): True for user_id in user_ids},
+            timeout=settings.DATABASE_REPLICA_STICKY_SECONDS
+        )
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if not replicas or model._meta.app_label not in REPLICA_APPS:
+            return None
+        state = _routing.get()
+        # Fora de uma requisição autenticada (comandos, sinais), em escritas e
+        # dentro de transações a leitura fica no primário
+        if state is None or state.user_id is None or state.primary:
+            return 'default'
+        if connections['default'].in_atomic_block or state.sticky():
+            return 'default'
+        # A aderência ao primário fica no cache: sem um cache compartilhado entre
+        # os processos, quem escreveu em um worker leria a réplica atrasada em outro
+        if not shared_state_available():
+            return 'default'
+        state.replica_used = True
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Réplicas são cópias do primário: objetos lidos de qualquer uma se relacionam
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.DATABASE_REPLICAS
@@ -0,0 +1,80 @@
+import threading
+from importlib import import_module
+
+from django.apps import apps
+from django.db import connections
+from django.utils.module_loading import import_string, module_has_submodule
+
+WORKER_CLASSES = {
+    'sync': ('sync', 'todolist_project.wsgi.application'),
+    'gthread': ('gthread', 'todolist_project.wsgi.application'),
+    # A aplicação ASGI também atende o SSE de /api/tasks/events/ e as views assíncronas
+    'asgi': ('uvicorn.workers.UvicornWorker', 'todolist_project.asgi.application'),
+}
+
+
+def warm_up():
+    # No processo mestre, antes do fork: os workers herdam o código já importado
+    # (copy-on-write) e a primeira requisição de cada um não paga os imports
+    from django.urls import get_resolver
+    from rest_framework.settings import api_settings
+    for app_config in apps.get_app_configs():
+        for name in ('views', 'async_views', 'serializers'):
+            if module_has_submodule(app_config.module, name):
+                import_module(f'{app_config.name}.{name}')
+    resolver = get_resolver()
+    resolver.url_patterns
+    resolver.reverse_dict
+    api_settings.DEFAULT_AUTHENTICATION_CLASSES
+    api_settings.DEFAULT_RENDERER_CLASSES
+
+
+def open_connections():
+    from tasks.search import fts_available
+    for connection in connections.all():
+        connection.ensure_connection()
+        fts_available(connection.alias)
+
+
+def warm_up_worker(worker):
+    # Depois do fork: conexões abertas no mestre não podem ser compartilhadas
+    connections.close_all()
+    if worker.cfg.worker_class_str == WORKER_CLASSES['asgi'][0]:
+        # ASGI: o código síncrono de cada requisição roda em uma thread do
+        # sync_to_async, que abre a própria conexão; uma aberta aqui nunca seria usada
+        return
+    pool = getattr(worker, 'tpool', None)
+    if pool is None:
+        open_connections()
+        return
+    # gthread: as conexões do Django são por thread, então cada thread do pool
+    # abre a sua; a barreira garante que as tarefas caiam em threads diferentes
+    barrier = threading.Barrier(worker.cfg.threads)
+
+    def open_in_thread():
+        barrier.wait()
+        open_connections()
+    for future in [pool.submit(open_in_thread) for _ in range(worker.cfg.threads)]:
+        future.result()
+
+
+def build_application(worker_class, options, warm=True):
+    from gunicorn.app.base import BaseApplication
+    gunicorn_worker, app_path = WORKER_CLASSES[worker_class]
+
+    class DjangoApplication(BaseApplication):
+        def load_config(self):
+            for key, value in options.items():
+                self.cfg.set(key, value)
+            self.cfg.set('worker_class', gunicorn_worker)
+            self.cfg.set('preload_app', True)
+            if warm:
+                self.cfg.set('post_worker_init', warm_up_worker)
+
+        def load(self):
+            application = import_string(app_path)
+            if warm:
+                warm_up()
+            return application
+
+    return DjangoApplication()
@@ -0,0 +1,21 @@
+from contextlib import contextmanager
+
+from django.db import transaction
+
+
+@contextmanager
+def write_atomic(using=None):
+    # transaction.atomic() para blocos que vão escrever: no SQLite abre com
+    # OPTIONS['write_transaction_mode'] (BEGIN IMMEDIATE) em vez do modo padrão.
+    # Dentro de outra transação vira um savepoint, como o atomic().
+    connection = transaction.get_connection(using)
+    previous = getattr(connection, 'write_transaction', False)
+    connection.write_transaction = True
+    try:
+        with transaction.atomic(using=using):
+            # O BEGIN já foi emitido: callbacks de on_commit e transações
+            # abertas depois voltam ao modo padrão
+            connection.write_transaction = previous
+            yield
+    finally:
+        connection.write_transaction = previous
@@ -28,8 +28,16 @@ except Exception as e:
 
 sleep 2
 
+# Vários workers precisam de um cache compartilhado (versões da listagem): sem
+# CACHE_BACKEND, o cache fica numa tabela do banco primário
+export CACHE_BACKEND="${CACHE_BACKEND:-django.core.cache.backends.db.DatabaseCache}"
+if [ "$CACHE_BACKEND" = "django.core.cache.backends.db.DatabaseCache" ]; then
+    export CACHE_LOCATION="${CACHE_LOCATION:-django_cache}"
+fi
+
 echo "📦 Aplicando migrações do banco de dados..."
 python manage.py migrate
+python manage.py createcachetable
 
 echo "📂 Coletando arquivos estáticos..."
 python manage.py collectstatic --noinput
@@ -45,5 +53,18 @@ else:
     print('✅ Superusuário já existe')
 "
 
-echo "🌐 Iniciando servidor Django na porta 8000..."
-python manage.py runserver 0.0.0.0:8000
+echo "🌐 Iniciando servidor na porta 8000..."
+# Vários workers pré-forkados (gunicorn); configurável por WEB_CONCURRENCY, WEB_THREADS,
+# WEB_WORKER_CLASS e WEB_MAX_REQUESTS. Para o servidor de desenvolvimento: DJANGO_RUNSERVER=1
+if [ "$DJANGO_RUNSERVER" = "1" ]; then
+    exec python manage.py runserver 0.0.0.0:8000
+fi
+# Workers ASGI (uvicorn) por padrão: atendem a API e o SSE de /api/tasks/events/.
+# Com vários workers os eventos passam entre processos pelo feed de alterações
+export WEB_WORKER_CLASS="${WEB_WORKER_CLASS:-asgi}"
+export TASK_EVENTS_BROKER="${TASK_EVENTS_BROKER:-tasks.events.ChangeFeedBroker}"
+# Conexões persistentes só nos workers WSGI: sob ASGI o Django recomenda desativá-las
+if [ "$WEB_WORKER_CLASS" = "asgi" ]; then
+    export DB_CONN_MAX_AGE="${DB_CONN_MAX_AGE:-0}"
+fi
+exec python manage.py serve --bind 0.0.0.0:8000 --pid /tmp/gunicorn.pid
@@ -1,6 +1,49 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.db.models.signals import post_migrate, post_save, pre_save
+
+
+def ensure_search_index(sender, using='default', **kwargs):
+    from .search import ensure_fts_triggers
+    ensure_fts_triggers(using)
+
+
+def ensure_task_counters(sender, using='default', **kwargs):
+    from .counters import ensure_counter_triggers
+    ensure_counter_triggers(using)
+
+
+def ensure_task_rollups(sender, using='default', **kwargs):
+    from .rollups import ensure_rollup_triggers
+    ensure_rollup_triggers(using)
+
+
+def ensure_task_changes(sender, using='default', **kwargs):
+    from .changes import ensure_change_triggers
+    ensure_change_triggers(using)
+
+
+def check_owner_info(sender, instance, update_fields=None, raw=False, **kwargs):
+    from .cache import owner_info_changed
+    instance._owner_info_changed = not raw and owner_info_changed(instance, update_fields)
+
+
+def bump_owner_readers(sender, instance, **kwargs):
+    # Depois de salvo: quem enxerga tarefas do usuário tem owner_info desatualizado
+    if getattr(instance, '_owner_info_changed', False):
+        from .cache import bump_visibility, users_seeing_owner
+        instance._owner_info_changed = False
+        bump_visibility(users_seeing_owner(instance.pk))
 
 
 class TasksConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'tasks'
+
+    def ready(self):
+        post_migrate.connect(ensure_search_index, sender=self)
+        post_migrate.connect(ensure_task_counters, sender=self)
+        post_migrate.connect(ensure_task_rollups, sender=self)
+        post_migrate.connect(ensure_task_changes, sender=self)
+        pre_save.connect(check_owner_info, sender=settings.AUTH_USER_MODEL, dispatch_uid='tasks_check_owner_info')
+        post_save.connect(bump_owner_readers, sender=settings.AUTH_USER_MODEL, dispatch_uid='tasks_bump_owner_readers')
@@ -0,0 +1,197 @@
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.paginator import Paginator
+from django.http import HttpResponse
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+
+from core.authentication import JWTAuthentication, cache_user, cached_user
+from core.routers import aroute_user
+
+from . import views
+from .cache import cacheable_list_key, get_cached_list, list_cache_key, list_cache_timeout, set_cached_list
+from .etags import if_match_failed, if_none_match, task_etag
+from .models import Task, TaskAccess
+from .pagination import InvalidCursor, cursor_page, cursor_page_queryset
+from .serializers import TaskSerializer, order_task_rows, parse_list_fields, task_rows_queryset
+
+# Versões assíncronas (ORM assíncrono do Django) das views mais acessadas, usadas
+# quando TASK_ASYNC_VIEWS está ativo sob ASGI. Cada uma atende só os métodos de
+# leitura/alternância; os demais métodos e qualquer requisição que não autentique
+# aqui caem na view síncrona de views.py, que responde exatamente como antes.
+
+
+def _json(data, status_code=status.HTTP_200_OK, headers=None):
+    return HttpResponse(
+        JSONRenderer().render(data), status=status_code, content_type='application/json', headers=headers
+    )
+
+
+def _not_modified(etag):
+    return HttpResponse(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
+
+def _not_found():
+    return _json(
+        {'error': 'Tarefa não encontrada ou você não tem permissão para acessá-la'},
+        status.HTTP_404_NOT_FOUND
+    )
+
+
+async def _authenticate(request):
+    # Mesma validação (e caches) de core.authentication.JWTAuthentication, com a
+    # busca do usuário assíncrona. None quando não há token válido: a view
+    # síncrona monta o 401 do DRF.
+    from rest_framework_simplejwt.exceptions import InvalidToken
+    from rest_framework_simplejwt.settings import api_settings
+    authentication = JWTAuthentication()
+    header = authentication.get_header(request)
+    raw_token = authentication.get_raw_token(header) if header else None
+    if raw_token is None:
+        return None
+    try:
+        token = authentication.get_validated_token(raw_token)
+    except InvalidToken:
+        return None
+    user_id = token.get(api_settings.USER_ID_CLAIM)
+    if user_id is None:
+        return None
+    user = cached_user(user_id)
+    if user is None:
+        try:
+            user = await User.objects.aget(**{api_settings.USER_ID_FIELD: user_id})
+        except User.DoesNotExist:
+            return None
+        if not user.is_active:
+            return None
+        cache_user(user)
+    await aroute_user(user.pk)
+    return user
+
+
+def with_sync_fallback(sync_view, methods):
+    def decorator(handler):
+        async def view(request, *args, **kwargs):
+            if request.method in methods:
+                user = await _authenticate(request)
+                if user is not None:
+                    request.user = user
+                    return await handler(request, *args, **kwargs)
+            return await sync_to_async(sync_view)(request, *args, **kwargs)
+        # Como as views do DRF: autenticação por token, sem CSRF. `cls` mantém a
+        # documentação do Swagger gerada a partir da view síncrona.
+        view.csrf_exempt = True
+        view.cls = sync_view.cls
+        view.initkwargs = sync_view.initkwargs
+        view.__name__ = sync_view.__name__
+        view.__doc__ = sync_view.__doc__
+        return view
+    return decorator
+
+
+async def _filtered_accesses(request):
+    queryset = TaskAccess.objects.filter(user=request.user)
+    if request.GET.get('search') or request.GET.getlist('tag'):
+        # A busca (disponibilidade do FTS) e as tags (ids) consultam o banco ao montar o filtro
+        return await sync_to_async(views._filter_tasks)(queryset, request.GET, request.user)
+    return views._filter_tasks(queryset, request.GET, request.user)
+
+
+async def _load_task_rows(task_ids, fields):
+    return order_task_rows([row async for row in task_rows_queryset(task_ids, fields)], task_ids)
+
+
+@with_sync_fallback(views.task_list_create, ['GET'])
+async def task_list_create(request):
+    # O cache da listagem pode ser o DatabaseCache: as chamadas a ele saem do event loop
+    cache_key = await sync_to_async(list_cache_key)(request.user.id, request.GET)
+    cached = await sync_to_async(get_cached_list)(cache_key)
+    if cached is not None:
+        if if_none_match(request, cached['etag']):
+            return _not_modified(cached['etag'])
+        return _json(cached['data'], headers={'ETag': cached['etag'], 'X-Cache': 'HIT'})
+    try:
+        fields = parse_list_fields(request.GET.get('fields'))
+    except ValueError as e:
+        return _json({'error': str(e)}, status.HTTP_400_BAD_REQUEST)
+    queryset = await _filtered_accesses(request)
+    requested_ordering, ordering = views._list_ordering(request.GET)
+    page_size = min(int(request.GET.get('page_size', 20)), 1000)
+    cursor = request.GET.get('cursor')
+    cursor_mode = bool(cursor) or request.GET.get('pagination') == 'cursor'
+    if cursor_mode:
+        try:
+            page_queryset = cursor_page_queryset(queryset, ordering, page_size, cursor)
+        except InvalidCursor as e:
+            return _json({'error': str(e)}, status.HTTP_400_BAD_REQUEST)
+        page, next_cursor = cursor_page([access async for access in page_queryset], ordering, page_size)
+        rows = await _load_task_rows([access.task_id for access in page], fields)
+    else:
+        # Paginator só conta pela propriedade síncrona: a contagem é feita antes
+        paginator = Paginator(views._order_for_pages(queryset, requested_ordering, ordering), page_size)
+        paginator.count = await paginator.object_list.acount()
+        page_obj = paginator.get_page(request.GET.get('page', 1))
+        rows = await _load_task_rows([access.task_id async for access in page_obj.object_list], fields)
+    cache_key = cacheable_list_key(cache_key)
+
+    async def build_response_data():
+        if not cursor_mode:
+            return views._numbered_page_data(rows, fields, request.user, page_obj)
+        data = views._cursor_page_data(rows, fields, request.user, next_cursor)
+        if request.GET.get('include_count', '').lower() == 'true':
+            data['count'] = await queryset.acount()
+        return data
+
+    response_data = None if cache_key is not None else await build_response_data()
+    etag, change_at = views._list_etag(request, cache_key, rows, fields, response_data)
+    if if_none_match(request, etag):
+        return _not_modified(etag)
+    if response_data is None:
+        response_data = await build_response_data()
+    await sync_to_async(set_cached_list)(cache_key, {'etag': etag, 'data': response_data}, list_cache_timeout(change_at))
+    return _json(response_data, headers={'ETag': etag, 'X-Cache': 'MISS'})
+
+
+@with_sync_fallback(views.task_detail, ['GET'])
+async def task_detail(request, task_id):
+    try:
+        task = await Task.objects.with_related().visible_to(request.user).aget(id=task_id)
+    except Task.DoesNotExist:
+        return _not_found()
+    etag = task_etag(task, request.user)
+    if if_none_match(request, etag):
+        return _not_modified(etag)
+    serializer = TaskSerializer(task, context={'request': request})
+    return _json(serializer.data, headers={'ETag': etag})
+
+
+@with_sync_fallback(views.task_toggle_complete, ['PATCH'])
+async def task_toggle_complete(request, task_id):
+    try:
+        task = await Task.objects.with_related().visible_to(request.user).aget(id=task_id)
+    except Task.DoesNotExist:
+        return _not_found()
+    if task.owner_id != request.user.id:
+        return _json(
+            {'error': 'Apenas o proprietário da tarefa pode alterar o status de conclusão'},
+            status.HTTP_403_FORBIDDEN
+        )
+    if if_match_failed(request, task_etag(task, request.user)):
+        return _json(
+            {'error': 'A tarefa foi modificada desde a última leitura (If-Match não confere)'},
+            status.HTTP_412_PRECONDITION_FAILED
+        )
+    views._toggle_completion(task)
+    await task.asave()
+    serializer = TaskSerializer(task, context={'request': request})
+    return _json(serializer.data, headers={'ETag': task_etag(task, request.user)})
+
+
+@with_sync_fallback(views.task_shared_users, ['GET'])
+async def task_shared_users(request, task_id):
+    try:
+        task = await Task.objects.select_related('owner').visible_to(request.user).aget(id=task_id)
+    except Task.DoesNotExist:
+        return _not_found()
+    shared_users = [user async for user in task.get_shared_users()]
+    return _json(views._shared_users_data(task, shared_users, task.owner_id == request.user.id))
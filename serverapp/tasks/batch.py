@@ -0,0 +1,157 @@
+from django.utils import timezone
+from rest_framework import serializers, status
+
+from core.transactions import write_atomic
+
+from .models import Task
+from .serializers import (
+    TASK_LIST_FIELDS,
+    TaskCreateSerializer,
+    TaskUpdateSerializer,
+    load_task_rows,
+    serialize_task_rows,
+)
+
+BATCH_MAX_OPERATIONS = 1000
+
+BATCH_OPERATIONS = ('create', 'update', 'delete')
+
+
+def _failure(index, op, code, **detail):
+    return {'index': index, 'op': op, 'status': code, **detail}
+
+
+def _task_id(value):
+    if isinstance(value, bool):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _validate(serializer, data):
+    # Um único serializer por tipo de operação: montar os campos do
+    # ModelSerializer a cada item custa mais que a própria validação
+    try:
+        return serializer.run_validation(data), None
+    except serializers.ValidationError as exc:
+        return None, exc.detail
+
+
+def run_batch(user, operations, atomic=False):
+    # Valida tudo primeiro (mesmas regras de TaskCreateSerializer/TaskUpdateSerializer)
+    # e aplica as operações válidas com bulk_create/bulk_update/delete em uma transação.
+    # Retorna (resultados por item, se algo foi aplicado).
+    results = [None] * len(operations)
+    creates, updates, deletes = [], [], []
+    seen_ids = set()
+    for index, operation in enumerate(operations):
+        op = operation.get('op') if isinstance(operation, dict) else None
+        if op not in BATCH_OPERATIONS:
+            results[index] = _failure(index, op, status.HTTP_400_BAD_REQUEST,
+                                      error='Operação inválida: use create, update ou delete')
+            continue
+        data = operation.get('data') or {}
+        if op == 'create':
+            creates.append((index, data))
+            continue
+        task_id = _task_id(operation.get('id'))
+        if task_id is None:
+            results[index] = _failure(index, op, status.HTTP_400_BAD_REQUEST, error='ID da tarefa é obrigatório')
+        elif task_id in seen_ids:
+            results[index] = _failure(index, op, status.HTTP_400_BAD_REQUEST, error='Tarefa repetida no lote')
+        else:
+            seen_ids.add(task_id)
+            (updates if op == 'update' else deletes).append((index, task_id, data))
+
+    tasks = Task.objects.visible_to(user).in_bulk(seen_ids)
+
+    def check_access(index, op, task_id):
+        task = tasks.get(task_id)
+        if task is None:
+            results[index] = _failure(index, op, status.HTTP_404_NOT_FOUND,
+                                      error='Tarefa não encontrada ou você não tem permissão para acessá-la')
+        elif task.owner_id != user.id:
+            results[index] = _failure(index, op, status.HTTP_403_FORBIDDEN,
+                                      error='Apenas o proprietário da tarefa pode modificá-la')
+        else:
+            return task
+        return None
+
+    new_tasks = []
+    create_serializer = TaskCreateSerializer()
+    for index, data in creates:
+        validated_data, errors = _validate(create_serializer, data)
+        if errors is not None:
+            results[index] = _failure(index, 'create', status.HTTP_400_BAD_REQUEST, errors=errors)
+            continue
+        task = Task(owner=user, **validated_data)
+        task.apply_completion_rules()
+        new_tasks.append((index, task))
+
+    # Mesmos valores finais viram um único UPDATE ... WHERE id IN (...); o
+    # bulk_update (CASE por linha) fica só para as alterações isoladas
+    now = timezone.now()
+    changed = []
+    groups = {}
+    update_serializer = TaskUpdateSerializer(partial=True)
+    for index, task_id, data in updates:
+        task = check_access(index, 'update', task_id)
+        if task is None:
+            continue
+        validated_data, errors = _validate(update_serializer, data)
+        if errors is not None:
+            results[index] = _failure(index, 'update', status.HTTP_400_BAD_REQUEST, errors=errors)
+            continue
+        for attr, value in validated_data.items():
+            setattr(task, attr, value)
+        values = dict(validated_data)
+        completion = {field: getattr(task, field) for field in Task.COMPLETION_FIELDS}
+        task.apply_completion_rules(now)
+        values.update(
+            (field, getattr(task, field)) for field, value in completion.items() if getattr(task, field) != value
+        )
+        groups.setdefault(tuple(sorted(values.items())), []).append(task)
+        changed.append((index, task))
+
+    removed = []
+    for index, task_id, _ in deletes:
+        if check_access(index, 'delete', task_id) is not None:
+            removed.append((index, task_id))
+
+    pending = [(index, 'create') for index, _ in new_tasks] + \
+        [(index, 'update') for index, _ in changed] + \
+        [(index, 'delete') for index, _ in removed]
+    if atomic and any(result is not None for result in results):
+        for index, op in pending:
+            results[index] = _failure(index, op, status.HTTP_424_FAILED_DEPENDENCY,
+                                      error='Não aplicada: outra operação do lote falhou')
+        return results, False
+
+    with write_atomic():
+        Task.objects.bulk_create([task for _, task in new_tasks])
+        single = []
+        single_fields = set()
+        for values, tasks_group in groups.items():
+            if len(tasks_group) > 1:
+                Task.objects.filter(pk__in=[task.pk for task in tasks_group]).update(**dict(values))
+            else:
+                single.extend(tasks_group)
+                single_fields.update(field for field, _ in values)
+        if single:
+            Task.objects.bulk_update(single, sorted(single_fields))
+        if removed:
+            Task.objects.filter(id__in=[task_id for _, task_id in removed]).delete()
+
+    saved = [(index, 'create', task) for index, task in new_tasks] + \
+        [(index, 'update', task) for index, task in changed]
+    task_ids = [task.pk for _, _, task in saved]
+    rows = serialize_task_rows(load_task_rows(task_ids, TASK_LIST_FIELDS), TASK_LIST_FIELDS, user)
+    data_by_id = {row['id']: row for row in rows}
+    for index, op, task in saved:
+        code = status.HTTP_201_CREATED if op == 'create' else status.HTTP_200_OK
+        results[index] = {'index': index, 'op': op, 'status': code, 'data': data_by_id[task.pk]}
+    for index, task_id in removed:
+        results[index] = {'index': index, 'op': 'delete', 'status': status.HTTP_204_NO_CONTENT, 'id': task_id}
+    return results, True
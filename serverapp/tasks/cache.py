@@ -0,0 +1,167 @@
+import hashlib
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from core.caches import shared_state_available
+from core.routers import read_from_replica, stick_to_primary
+
+VERSION_KEY = 'tasks:visibility:{user_id}'
+LIST_KEY = 'tasks:list:{user_id}:{version}:{params}'
+
+# Acertos e falhas contados na memória do processo, como os do cache da
+# autenticação: com DatabaseCache um cache.incr por leitura seria uma transação
+# de escrita disputando o único escritor do SQLite
+_stats = {'hits': 0, 'misses': 0}
+_stats_lock = threading.Lock()
+
+
+def _new_version():
+    # Versões partem do relógio: se a chave for descartada pelo cache, a nova
+    # versão nunca coincide com uma antiga e respostas velhas não voltam
+    return time.time_ns()
+
+
+def get_visibility_version(user_id):
+    key = VERSION_KEY.format(user_id=user_id)
+    version = cache.get(key)
+    if version is None:
+        version = _new_version()
+        if not cache.add(key, version, timeout=None):
+            version = cache.get(key, version)
+    return version
+
+
+def _bump(user_ids):
+    for user_id in user_ids:
+        key = VERSION_KEY.format(user_id=user_id)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _new_version(), timeout=None)
+
+
+def bump_visibility(user_ids):
+    # Incrementa agora e de novo após o commit: uma leitura concorrente que
+    # viu a versão nova antes do commit não deixa dados antigos no cache
+    user_ids = set(user_ids)
+    if not user_ids:
+        return
+    _bump(user_ids)
+
+    def committed():
+        _bump(user_ids)
+        stick_to_primary(user_ids)
+    transaction.on_commit(committed)
+
+
+# Campos do dono repetidos em owner_info de cada tarefa
+OWNER_INFO_FIELDS = ('username', 'first_name', 'last_name', 'email')
+
+
+def owner_info_changed(user, update_fields=None):
+    # Antes de salvar um usuário: nome ou email diferentes do que está no banco
+    if user.pk is None or (update_fields is not None and not set(update_fields) & set(OWNER_INFO_FIELDS)):
+        return False
+    previous = type(user)._default_manager.filter(pk=user.pk).values(*OWNER_INFO_FIELDS).first()
+    return previous is not None and any(previous[field] != getattr(user, field) for field in OWNER_INFO_FIELDS)
+
+
+def users_seeing_owner(user_id):
+    # Quem enxerga alguma tarefa do usuário: owner_info repete nome e email dele
+    from .models import TaskAccess
+    return set(
+        TaskAccess.objects.filter(task__owner_id=user_id).values_list('user_id', flat=True).distinct()
+    )
+
+
+def users_with_access(task_ids):
+    from .models import TaskAccess
+    return set(
+        TaskAccess.objects.filter(task_id__in=list(task_ids)).values_list('user_id', flat=True)
+    )
+
+
+def bump_task_visibility(task_ids):
+    bump_visibility(users_with_access(task_ids))
+
+
+def list_cache_enabled():
+    return settings.TASK_LIST_CACHE_TIMEOUT > 0 and shared_state_available()
+
+
+def list_cache_key(user_id, params):
+    # None com o cache da listagem desativado: respostas e ETags não dependem da versão
+    if not list_cache_enabled():
+        return None
+    normalized = sorted(
+        (name, sorted(value for value in values if value))
+        for name, values in params.lists()
+        if any(values)
+    )
+    digest = hashlib.sha1(repr(normalized).encode()).hexdigest()
+    return LIST_KEY.format(user_id=user_id, version=get_visibility_version(user_id), params=digest)
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def get_cached_list(key):
+    if key is None:
+        return None
+    data = cache.get(key)
+    _count('misses' if data is None else 'hits')
+    return data
+
+
+def next_change_at(due_dates, date_filtered=False):
+    # is_overdue/days_until_due dependem do relógio: devolve o próximo instante
+    # em que algum desses valores (ou o filtro overdue) muda para estas datas
+    from django.utils import timezone
+    now = timezone.now()
+    changes = [due_date - timedelta(days=(due_date - now).days) for due_date in due_dates if due_date]
+    if date_filtered:
+        changes.append((now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0))
+    return min(changes) if changes else None
+
+
+def list_cache_timeout(change_at):
+    from django.utils import timezone
+    timeout = settings.TASK_LIST_CACHE_TIMEOUT
+    if change_at is not None:
+        timeout = min(timeout, (change_at - timezone.now()).total_seconds())
+    return int(timeout)
+
+
+def cacheable_list_key(key):
+    # Uma página lida de uma réplica atrasada não pode ficar no cache nem ganhar
+    # o ETag da versão atual: ela seria servida até a próxima alteração
+    return None if read_from_replica() else key
+
+
+def set_cached_list(key, data, timeout):
+    if key is not None and timeout > 0:
+        cache.set(key, data, timeout=timeout)
+
+
+def get_cache_stats():
+    with _stats_lock:
+        hits, misses = _stats['hits'], _stats['misses']
+    total = hits + misses
+    return {
+        'enabled': list_cache_enabled(),
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': (hits / total * 100) if total else 0,
+    }
+
+
+def clear_cache_stats():
+    with _stats_lock:
+        _stats['hits'] = _stats['misses'] = 0
@@ -0,0 +1,117 @@
+from django.db import connections
+from django.db.models import Max
+
+CHANGE_TABLE = 'tasks_taskchange'
+
+CHANGES_PAGE_SIZE = 500
+
+CHANGES_MAX_PAGE_SIZE = 1000
+
+
+def _touch_sql(pairs, deleted):
+    # Remove e reinsere as linhas dos pares (usuário, tarefa): o novo id AUTOINCREMENT
+    # leva cada par para o fim do feed. Não usa INSERT OR REPLACE porque, dentro de um
+    # trigger, a política de conflito do comando externo (ex.: o INSERT OR IGNORE de
+    # bulk_create(ignore_conflicts=True)) substitui a do trigger.
+    return f"""
+        DELETE FROM {CHANGE_TABLE} WHERE (user_id, task_id) IN ({pairs});
+        INSERT INTO {CHANGE_TABLE}(user_id, task_id, deleted) SELECT *, {deleted} FROM ({pairs});"""
+
+
+# Sem lápide para usuário que já não existe: o flush (DELETE tabela a tabela, em
+# qualquer ordem) pode apagar auth_user antes de tasks_taskaccess
+ACCESS_DELETE_TRIGGER_SQL = f"""
+    CREATE TRIGGER IF NOT EXISTS {CHANGE_TABLE}_access_ad AFTER DELETE ON tasks_taskaccess BEGIN
+        {_touch_sql("SELECT old.user_id, old.task_id WHERE EXISTS (SELECT 1 FROM auth_user WHERE id = old.user_id)", 1)}
+    END
+    """
+
+
+# Toda mudança no que um usuário enxerga passa por estas tabelas: tasks_taskaccess
+# (tarefa passou a ser ou deixou de ser visível), tasks_task (conteúdo) e
+# tasks_task_shared_with (shared_count na visão do dono).
+CREATE_CHANGE_TRIGGERS_SQL = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {CHANGE_TABLE}_access_ai AFTER INSERT ON tasks_taskaccess BEGIN
+        {_touch_sql("SELECT new.user_id, new.task_id", 0)}
+    END
+    """,
+    ACCESS_DELETE_TRIGGER_SQL,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {CHANGE_TABLE}_task_au AFTER UPDATE ON tasks_task BEGIN
+        {_touch_sql("SELECT user_id, task_id FROM tasks_taskaccess WHERE task_id = new.id", 0)}
+    END
+    """,
+    # Só enquanto o dono ainda enxerga a tarefa: na exclusão em cascata as linhas de
+    # TaskAccess podem sair antes e a lápide do dono não deve ser sobrescrita
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {CHANGE_TABLE}_shared_ai AFTER INSERT ON tasks_task_shared_with BEGIN
+        {_touch_sql("SELECT user_id, task_id FROM tasks_taskaccess WHERE task_id = new.task_id AND role = 'owner'", 0)}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {CHANGE_TABLE}_shared_ad AFTER DELETE ON tasks_task_shared_with BEGIN
+        {_touch_sql("SELECT user_id, task_id FROM tasks_taskaccess WHERE task_id = old.task_id AND role = 'owner'", 0)}
+    END
+    """,
+    # Ao excluir um usuário as lápides das suas linhas de TaskAccess podem ser
+    # gravadas depois que o Django já apagou as de TaskChange
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {CHANGE_TABLE}_user_ad AFTER DELETE ON auth_user BEGIN
+        DELETE FROM {CHANGE_TABLE} WHERE user_id = old.id;
+    END
+    """,
+]
+
+DROP_CHANGE_TRIGGERS_SQL = [
+    f"DROP TRIGGER IF EXISTS {CHANGE_TABLE}_access_ai",
+    f"DROP TRIGGER IF EXISTS {CHANGE_TABLE}_access_ad",
+    f"DROP TRIGGER IF EXISTS {CHANGE_TABLE}_task_au",
+    f"DROP TRIGGER IF EXISTS {CHANGE_TABLE}_shared_ai",
+    f"DROP TRIGGER IF EXISTS {CHANGE_TABLE}_shared_ad",
+    f"DROP TRIGGER IF EXISTS {CHANGE_TABLE}_user_ad",
+]
+
+SEED_CHANGES_SQL = [
+    f"DELETE FROM {CHANGE_TABLE}",
+    f"""
+    INSERT INTO {CHANGE_TABLE}(user_id, task_id, deleted)
+    SELECT user_id, task_id, 0 FROM tasks_taskaccess ORDER BY task_id, user_id
+    """,
+]
+
+
+def changes_available(using='default'):
+    return connections[using].vendor == 'sqlite'
+
+
+def ensure_change_triggers(using='default'):
+    # Assim como os do FTS, somem quando o SQLite recria tasks_task ou tasks_taskaccess
+    connection = connections[using]
+    if not changes_available(using) or CHANGE_TABLE not in connection.introspection.table_names():
+        return
+    with connection.cursor() as cursor:
+        for statement in CREATE_CHANGE_TRIGGERS_SQL:
+            cursor.execute(statement)
+
+
+def read_changes(user, since, limit):
+    # Mudanças com seq > since, em ordem de seq. Sem `since` o cliente não tem cópia
+    # local, então as lápides são omitidas (a sincronização inicial lista só as vivas)
+    from .models import TaskChange
+    changes = TaskChange.objects.filter(user=user, id__gt=since).order_by('id')
+    if not since:
+        changes = changes.filter(deleted=False)
+    rows = list(changes.values_list('id', 'task_id', 'deleted')[:limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_since = rows[-1][0] if rows else since
+    if not since and not has_more:
+        # As lápides puladas não interessam a quem ainda não tem cópia local
+        next_since = TaskChange.objects.filter(user=user).aggregate(last=Max('id'))['last'] or 0
+    return {
+        'updated': [task_id for _, task_id, deleted in rows if not deleted],
+        'deleted': [task_id for _, task_id, deleted in rows if deleted],
+        'next_since': next_since,
+        'has_more': has_more,
+    }
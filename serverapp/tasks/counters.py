@@ -0,0 +1,130 @@
+from django.db import connections
+from django.db.models import Count, Q
+
+COUNTER_TABLE = 'tasks_taskcounter'
+
+# Coluna de TaskCounter -> condição sobre a linha de TaskAccess que ela conta.
+# Toda escrita que muda o que um usuário enxerga passa por tasks_taskaccess
+# (save, bulk_*, update(), compartilhamento, deleções em cascata), então os
+# triggers abaixo mantêm os totais sem depender de cada caminho do ORM.
+COUNTER_CONDITIONS = {
+    'total': None,
+    'owned': ('role', 'owner'),
+    'shared': ('role', 'shared'),
+    'completed': ('is_completed', True),
+    'status_pending': ('status', 'pending'),
+    'status_in_progress': ('status', 'in_progress'),
+    'status_completed': ('status', 'completed'),
+    'status_cancelled': ('status', 'cancelled'),
+    'priority_low': ('priority', 'low'),
+    'priority_medium': ('priority', 'medium'),
+    'priority_high': ('priority', 'high'),
+    'priority_urgent': ('priority', 'urgent'),
+}
+
+COUNTER_COLUMNS = tuple(COUNTER_CONDITIONS)
+
+COUNTED_FIELDS = sorted({condition[0] for condition in COUNTER_CONDITIONS.values() if condition})
+
+
+def _sql_condition(row, column):
+    condition = COUNTER_CONDITIONS[column]
+    if condition is None:
+        return '1'
+    field, value = condition
+    literal = '1' if value is True else f"'{value}'"
+    return f"({row}.{field} = {literal})"
+
+
+def _adjust(sign, row, columns=COUNTER_COLUMNS):
+    return ', '.join(f"{column} = {column} {sign} {_sql_condition(row, column)}" for column in columns)
+
+
+CREATE_COUNTER_TRIGGERS_SQL = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {COUNTER_TABLE}_access_ai AFTER INSERT ON tasks_taskaccess BEGIN
+        INSERT OR IGNORE INTO {COUNTER_TABLE}(user_id, {', '.join(COUNTER_COLUMNS)})
+        VALUES (new.user_id, {', '.join('0' for _ in COUNTER_COLUMNS)});
+        UPDATE {COUNTER_TABLE} SET {_adjust('+', 'new')} WHERE user_id = new.user_id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {COUNTER_TABLE}_access_ad AFTER DELETE ON tasks_taskaccess BEGIN
+        UPDATE {COUNTER_TABLE} SET {_adjust('-', 'old')} WHERE user_id = old.user_id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {COUNTER_TABLE}_access_au AFTER UPDATE OF {', '.join(COUNTED_FIELDS)} ON tasks_taskaccess
+    WHEN {' OR '.join(f'old.{field} IS NOT new.{field}' for field in COUNTED_FIELDS)}
+    BEGIN
+        UPDATE {COUNTER_TABLE} SET {', '.join(
+            f"{column} = {column} - {_sql_condition('old', column)} + {_sql_condition('new', column)}"
+            for column in COUNTER_COLUMNS if COUNTER_CONDITIONS[column]
+        )} WHERE user_id = new.user_id;
+    END
+    """,
+]
+
+REBUILD_COUNTERS_SQL = [
+    f"DELETE FROM {COUNTER_TABLE}",
+    f"""
+    INSERT INTO {COUNTER_TABLE}(user_id, {', '.join(COUNTER_COLUMNS)})
+    SELECT user_id, {', '.join(f"SUM({_sql_condition('tasks_taskaccess', column)})" for column in COUNTER_COLUMNS)}
+    FROM tasks_taskaccess
+    GROUP BY user_id
+    """,
+]
+
+DROP_COUNTER_TRIGGERS_SQL = [
+    f"DROP TRIGGER IF EXISTS {COUNTER_TABLE}_access_ai",
+    f"DROP TRIGGER IF EXISTS {COUNTER_TABLE}_access_ad",
+    f"DROP TRIGGER IF EXISTS {COUNTER_TABLE}_access_au",
+]
+
+
+def counters_available(using='default'):
+    return connections[using].vendor == 'sqlite'
+
+
+def ensure_counter_triggers(using='default'):
+    # Assim como os triggers do FTS, somem quando o SQLite recria tasks_taskaccess
+    connection = connections[using]
+    if not counters_available(using) or COUNTER_TABLE not in connection.introspection.table_names():
+        return
+    with connection.cursor() as cursor:
+        for statement in CREATE_COUNTER_TRIGGERS_SQL:
+            cursor.execute(statement)
+
+
+def counter_aggregates():
+    return {
+        column: Count('id', filter=Q(**{condition[0]: condition[1]})) if condition else Count('id')
+        for column, condition in COUNTER_CONDITIONS.items()
+    }
+
+
+def expected_counters():
+    # Totais calculados do zero a partir de TaskAccess (comando recompute_task_counters)
+    from .models import TaskAccess
+    return {
+        row.pop('user_id'): row
+        for row in TaskAccess.objects.order_by().values('user_id').annotate(**counter_aggregates())
+    }
+
+
+def get_task_counters(user):
+    from .models import TaskAccess, TaskCounter
+    if not counters_available(TaskCounter.objects.db):
+        return TaskAccess.objects.filter(user=user).aggregate(**counter_aggregates())
+    counters = TaskCounter.objects.filter(user=user).values(*COUNTER_COLUMNS).first()
+    return counters or dict.fromkeys(COUNTER_COLUMNS, 0)
+
+
+def count_overdue(user):
+    from django.utils import timezone
+    from .models import TaskAccess
+    # `is_completed=False` vira "NOT is_completed", que o SQLite não usa como igualdade
+    # no índice (user, is_completed, due_date); com IN a contagem fica só no índice
+    return TaskAccess.objects.filter(
+        user=user, is_completed__in=[False], due_date__lt=timezone.now()
+    ).count()
@@ -0,0 +1,44 @@
+import hashlib
+
+from django.utils.http import parse_etags, quote_etag
+
+
+def _digest(*parts):
+    return quote_etag(hashlib.sha1(repr(parts).encode()).hexdigest())
+
+
+def task_etag(task, user):
+    # Tudo o que muda a representação de TaskSerializer para este usuário
+    owner = task.owner
+    return _digest(
+        task.pk, task.updated_at.isoformat(), getattr(task, 'shared_count', None),
+        task.owner_id == user.id, owner.username, owner.first_name, owner.last_name, owner.email,
+        task.is_overdue, task.days_until_due,
+    )
+
+
+def list_etag(cache_key, change_at, data=None):
+    # cache_key já inclui usuário, parâmetros e a versão de visibilidade. Sem ele
+    # (cache da listagem desativado) o ETag sai do conteúdo da resposta
+    return _digest(cache_key if cache_key is not None else data, change_at.isoformat() if change_at else None)
+
+
+def etag_matches(header, etag, weak=True):
+    if not header:
+        return False
+    etags = parse_etags(header)
+    if '*' in etags:
+        return True
+    if weak:
+        # If-None-Match usa comparação fraca (RFC 9110)
+        etags = [value[2:] if value.startswith('W/') else value for value in etags]
+    return etag in etags
+
+
+def if_none_match(request, etag):
+    return etag_matches(request.META.get('HTTP_IF_NONE_MATCH'), etag)
+
+
+def if_match_failed(request, etag):
+    header = request.META.get('HTTP_IF_MATCH')
+    return bool(header) and not etag_matches(header, etag, weak=False)
@@ -0,0 +1,319 @@
+import asyncio
+import json
+import time
+from collections import deque
+from functools import lru_cache
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils.module_loading import import_string
+
+EVENTS_PATH = '/api/tasks/events/'
+
+EVENT_TYPES = ('created', 'updated', 'deleted', 'shared', 'unshared')
+
+HEARTBEAT = b': ping\n\n'
+
+# Enviado no lugar dos eventos descartados de um cliente lento: ele deve reler
+# /api/tasks/changes/ a partir do último token que tem
+RESYNC = b'event: resync\ndata: {}\n\n'
+
+# Último evento antes de fechar o stream: o token de acesso expirou ou o usuário
+# foi desativado; o cliente pede outro token antes de reconectar
+EXPIRED = b'event: expired\ndata: {}\n\n'
+
+
+def encode_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n".encode()
+
+
+class Subscription:
+    # Fila limitada de uma conexão. Se o cliente não acompanha (a fila enche), os
+    # eventos pendentes viram um único `resync` e os seguintes são descartados até
+    # ele ser enviado: a memória por conexão nunca passa de `maxsize` mensagens.
+    def __init__(self, user_id, maxsize):
+        self.user_id = user_id
+        self.maxsize = maxsize
+        self.messages = deque()
+        self.ready = asyncio.Event()
+        self.closed = False
+        self.dropped = 0
+
+    def put(self, message):
+        if self.messages and self.messages[-1] is RESYNC:
+            self.dropped += 1
+            return
+        if len(self.messages) >= self.maxsize:
+            self.dropped += len(self.messages) + 1
+            self.messages.clear()
+            message = RESYNC
+        self.messages.append(message)
+        self.ready.set()
+
+    def close(self):
+        self.closed = True
+        self.ready.set()
+
+    async def get(self, timeout):
+        # Próxima mensagem, ou None se o tempo acabar ou a conexão for fechada
+        if not self.messages and not self.closed:
+            self.ready.clear()
+            try:
+                await asyncio.wait_for(self.ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        if self.closed or not self.messages:
+            return None
+        return self.messages.popleft()
+
+
+class InProcessBroker:
+    # Fan-out para as conexões deste processo. Com vários processos ou máquinas,
+    # TASK_EVENTS_BROKER aponta para uma classe com a mesma interface que repasse
+    # as publicações entre eles (ChangeFeedBroker, ou Redis pub/sub).
+    cross_process = False
+
+    def __init__(self):
+        self.loop = None
+        self.subscribers = {}
+
+    def active(self):
+        # Sem conexões neste processo não há a quem entregar: evita a consulta de destinatários
+        return bool(self.subscribers)
+
+    def subscribe(self, user_id):
+        self.loop = asyncio.get_running_loop()
+        subscription = Subscription(user_id, settings.TASK_EVENTS_QUEUE_SIZE)
+        self.subscribers.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        subscriptions = self.subscribers.get(subscription.user_id)
+        if subscriptions is not None:
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self.subscribers[subscription.user_id]
+
+    def publish(self, user_ids, message):
+        # Chamado pelas views síncronas em outra thread: a entrega roda no loop
+        if self.loop is None or self.loop.is_closed() or not self.subscribers:
+            return
+        self.loop.call_soon_threadsafe(self._deliver, user_ids, message)
+
+    def _deliver(self, user_ids, message):
+        for user_id in user_ids:
+            for subscription in self.subscribers.get(user_id, ()):
+                subscription.put(message)
+
+
+class ChangeFeedBroker(InProcessBroker):
+    # Entre processos pelo próprio banco: os triggers do feed de alterações
+    # (tasks/changes.py, só SQLite) já gravam em TaskChange cada mudança na visão
+    # de cada usuário, então publicar não custa nada. Cada processo com conexões
+    # abertas lê as linhas novas a cada TASK_EVENTS_POLL_INTERVAL e entrega
+    # `updated` e `deleted` (lápides) com os ids e o `next_since` do feed.
+    cross_process = True
+    poll_limit = 1000
+
+    def __init__(self):
+        super().__init__()
+        self.poller = None
+        self.last_id = None
+
+    @classmethod
+    def available(cls):
+        from .changes import changes_available
+        return changes_available()
+
+    def active(self):
+        return False
+
+    def publish(self, user_ids, message):
+        pass
+
+    def subscribe(self, user_id):
+        subscription = super().subscribe(user_id)
+        if self.poller is None or self.poller.done():
+            self.poller = asyncio.ensure_future(self._poll())
+        return subscription
+
+    async def _poll(self):
+        while self.subscribers:
+            rows = await sync_to_async(self._read)()
+            self._deliver_changes(rows)
+            if len(rows) < self.poll_limit:
+                await asyncio.sleep(settings.TASK_EVENTS_POLL_INTERVAL)
+        # A próxima conexão recomeça do fim do feed, sem o que mudou sem ninguém ouvindo
+        self.last_id = None
+
+    def _read(self):
+        from django.db.models import Max
+        from .models import TaskChange
+        close_old_connections()
+        try:
+            changes = TaskChange.objects.using('default')
+            if self.last_id is None:
+                # Só o que mudar depois da primeira conexão deste processo
+                self.last_id = changes.aggregate(last=Max('id'))['last'] or 0
+                return []
+            rows = list(
+                changes.filter(id__gt=self.last_id).order_by('id')
+                .values_list('id', 'user_id', 'task_id', 'deleted')[:self.poll_limit]
+            )
+            if rows:
+                self.last_id = rows[-1][0]
+            return rows
+        finally:
+            close_old_connections()
+
+    def _deliver_changes(self, rows):
+        changes = {}
+        for change_id, user_id, task_id, deleted in rows:
+            if user_id in self.subscribers:
+                user_changes = changes.setdefault(user_id, {'updated': [], 'deleted': [], 'next_since': 0})
+                user_changes['deleted' if deleted else 'updated'].append(task_id)
+                user_changes['next_since'] = change_id
+        for user_id, user_changes in changes.items():
+            for event in ('updated', 'deleted'):
+                if user_changes[event]:
+                    message = encode_event(event, {'task_ids': user_changes[event], 'next_since': user_changes['next_since']})
+                    self._deliver([user_id], message)
+
+
+@lru_cache(maxsize=None)
+def get_broker():
+    return import_string(settings.TASK_EVENTS_BROKER)()
+
+
+def publish_task_event(event, task_ids):
+    # Destinatários lidos de TaskAccess no momento da chamada (antes de exclusões e
+    # descompartilhamentos, depois de criações e compartilhamentos); a entrega só
+    # acontece após o commit. Cada usuário recebe apenas os ids que enxerga.
+    broker = get_broker()
+    task_ids = list(task_ids)
+    if not task_ids or not broker.active():
+        return
+    from .models import TaskAccess
+    visible = {}
+    for user_id, task_id in TaskAccess.objects.filter(task_id__in=task_ids).values_list('user_id', 'task_id'):
+        visible.setdefault(user_id, []).append(task_id)
+    recipients = {}
+    for user_id, ids in visible.items():
+        recipients.setdefault(tuple(sorted(ids)), []).append(user_id)
+    messages = [(user_ids, encode_event(event, {'task_ids': list(ids)})) for ids, user_ids in recipients.items()]
+
+    def deliver():
+        for user_ids, message in messages:
+            broker.publish(user_ids, message)
+    transaction.on_commit(deliver)
+
+
+def _raw_token(scope):
+    # (token, veio da query). EventSource não envia cabeçalhos: em ?token= vai um
+    # StreamToken de curta duração, nunca o token de acesso, que iria para os logs
+    for name, value in scope['headers']:
+        if name == b'authorization':
+            parts = value.decode('latin-1').split()
+            if len(parts) == 2 and parts[0].lower() == 'bearer':
+                return parts[1], False
+    return parse_qs(scope.get('query_string', b'').decode()).get('token', [None])[0], True
+
+
+def _load_user(token, from_query):
+    # (usuário, instante em que o stream fecha) ou (None, None)
+    from rest_framework_simplejwt.authentication import JWTAuthentication
+    from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken, TokenError
+    from authentication.tokens import StreamToken
+    close_old_connections()
+    try:
+        authentication = JWTAuthentication()
+        validated = StreamToken(token) if from_query else authentication.get_validated_token(token)
+        return authentication.get_user(validated), validated.get('session_exp', validated['exp'])
+    except (AuthenticationFailed, InvalidToken, TokenError):
+        return None, None
+    finally:
+        close_old_connections()
+
+
+def _user_is_active(user_id):
+    from django.contrib.auth.models import User
+    close_old_connections()
+    try:
+        return User._default_manager.filter(pk=user_id, is_active=True).exists()
+    finally:
+        close_old_connections()
+
+
+def _cors_headers(scope):
+    origin = next((value for name, value in scope['headers'] if name == b'origin'), None)
+    if origin is None:
+        return []
+    allowed = getattr(settings, 'CORS_ALLOW_ALL_ORIGINS', False) or origin.decode('latin-1') in settings.CORS_ALLOWED_ORIGINS
+    if not allowed:
+        return []
+    headers = [(b'access-control-allow-origin', origin), (b'vary', b'Origin')]
+    if getattr(settings, 'CORS_ALLOW_CREDENTIALS', False):
+        headers.append((b'access-control-allow-credentials', b'true'))
+    return headers
+
+
+async def _reject(scope, send, status, error):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'application/json')] + _cors_headers(scope),
+    })
+    await send({'type': 'http.response.body', 'body': json.dumps({'error': error}).encode()})
+
+
+async def _watch_disconnect(receive, subscription):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+    subscription.close()
+
+
+async def task_events_app(scope, receive, send):
+    # Aplicação ASGI própria em vez de uma view: o ASGIHandler do Django 4.2 não
+    # percebe a desconexão durante uma resposta em streaming e cada conexão ociosa
+    # ficaria presa; aqui uma conexão ociosa custa uma tarefa esperando o receive()
+    if scope['method'] != 'GET':
+        await _reject(scope, send, 405, 'Método não permitido')
+        return
+    token, from_query = _raw_token(scope)
+    user, session_exp = await sync_to_async(_load_user)(token, from_query) if token else (None, None)
+    if user is None:
+        await _reject(scope, send, 401, 'Token inválido ou expirado')
+        return
+    broker = get_broker()
+    subscription = broker.subscribe(user.id)
+    watcher = asyncio.ensure_future(_watch_disconnect(receive, subscription))
+    try:
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [
+                (b'content-type', b'text/event-stream'),
+                (b'cache-control', b'no-cache'),
+                (b'x-accel-buffering', b'no'),
+            ] + _cors_headers(scope),
+        })
+        await send({'type': 'http.response.body', 'body': b'retry: 5000\n\n', 'more_body': True})
+        while True:
+            # send() só retorna quando o servidor aceita os bytes: um cliente lento
+            # segura este laço e a fila limitada da inscrição absorve o resto
+            message = await subscription.get(min(settings.TASK_EVENTS_HEARTBEAT, max(session_exp - time.time(), 0)))
+            if subscription.closed:
+                break
+            # Token de acesso expirado, ou usuário desativado (verificado a cada heartbeat)
+            expired = time.time() >= session_exp
+            if expired or (message is None and not await sync_to_async(_user_is_active)(user.pk)):
+                await send({'type': 'http.response.body', 'body': EXPIRED})
+                break
+            await send({'type': 'http.response.body', 'body': message or HEARTBEAT, 'more_body': True})
+    except OSError:
+        pass
+    finally:
+        broker.unsubscribe(subscription)
+        watcher.cancel()
@@ -0,0 +1,92 @@
+import csv
+import json
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+
+from .serializers import load_task_rows, serialize_task_rows
+
+EXPORT_CHUNK_SIZE = 2000
+
+# Junta as linhas em blocos para não fazer uma escrita no socket por tarefa
+EXPORT_BUFFER_SIZE = 64 * 1024
+
+EXPORT_FORMATS = {
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+}
+
+
+def iter_task_rows(access_queryset, fields, user, chunk_size=None):
+    # Percorre as linhas de TaskAccess por task_id (índice único user+task), um
+    # lote por vez: a memória fica limitada a um lote, qualquer que seja o total
+    chunk_size = chunk_size or EXPORT_CHUNK_SIZE
+    last_task_id = 0
+    while True:
+        task_ids = list(
+            access_queryset.filter(task_id__gt=last_task_id)
+            .order_by('task_id')
+            .values_list('task_id', flat=True)[:chunk_size]
+        )
+        if not task_ids:
+            return
+        last_task_id = task_ids[-1]
+        yield from serialize_task_rows(load_task_rows(task_ids, fields), fields, user)
+
+
+def ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False, separators=(',', ':')) + '\n'
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def _csv_value(value):
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    return '' if value is None else value
+
+
+def csv_lines(rows, fields):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow([_csv_value(row[field]) for field in fields])
+
+
+def buffered(lines, size=None):
+    size = size or EXPORT_BUFFER_SIZE
+    buffer = []
+    length = 0
+    for line in lines:
+        buffer.append(line)
+        length += len(line)
+        if length >= size:
+            yield ''.join(buffer)
+            buffer = []
+            length = 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+async def async_chunks(chunks):
+    # Sob ASGI o Django 4.2 lê um iterador síncrono inteiro (sync_to_async(list))
+    # antes de enviar o primeiro byte. Aqui cada bloco é gerado fora do event loop,
+    # na thread das consultas da requisição, e enviado antes do próximo.
+    chunks = iter(chunks)
+    done = object()
+    while True:
+        chunk = await sync_to_async(next)(chunks, done)
+        if chunk is done:
+            return
+        yield chunk
+
+
+def streaming_chunks(request, chunks):
+    request = getattr(request, '_request', request)
+    return async_chunks(chunks) if isinstance(request, ASGIRequest) else chunks
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.transactions import write_atomic
+from tasks.rollups import ROLLUP_CHUNK_SIZE, rebuild_rollups, rollups_available
+
+
+class Command(BaseCommand):
+    help = "Recalcula os rollups diários (TaskDailyRollup) a partir de todo o histórico de tarefas"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=ROLLUP_CHUNK_SIZE,
+            help='Quantidade de tarefas lidas por lote'
+        )
+
+    def handle(self, *args, **options):
+        if not rollups_available():
+            raise CommandError("Os rollups diários só são mantidos no SQLite; nos demais bancos a série é agregada na hora")
+        with write_atomic():
+            rows = rebuild_rollups(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f"✅ Rollups diários recalculados. Linhas: {rows}"))
@@ -0,0 +1,76 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.transactions import write_atomic
+
+from tasks.models import ACCESS_SYNCED_FIELDS, Task, TaskAccess
+
+
+class Command(BaseCommand):
+    help = "Verifica (e opcionalmente reconstrói) a tabela TaskAccess a partir de Task e shared_with"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='Corrige as linhas ausentes, sobrando ou desatualizadas'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=2000,
+            help='Quantidade de tarefas processadas por lote'
+        )
+
+    def handle(self, *args, **options):
+        rebuild = options['rebuild']
+        chunk_size = options['chunk_size']
+        totals = {'missing': 0, 'extra': 0, 'stale': 0}
+        last_id = 0
+        while True:
+            tasks = list(Task.objects.filter(id__gt=last_id).order_by('id')[:chunk_size])
+            if not tasks:
+                break
+            last_id = tasks[-1].id
+            with write_atomic() if rebuild else transaction.atomic():
+                missing, extra, stale = self._diff(tasks)
+                totals['missing'] += len(missing)
+                totals['extra'] += len(extra)
+                totals['stale'] += len(stale)
+                if rebuild and (missing or extra or stale):
+                    TaskAccess.objects.filter(id__in=[row.id for row in extra] + [row.id for row, _ in stale]).delete()
+                    TaskAccess.objects.bulk_create(missing + [fixed for _, fixed in stale])
+        # Linhas de tarefas que não existem mais não sobrevivem ao CASCADE, então basta o diff acima
+        summary = (
+            f"Ausentes: {totals['missing']} | Sobrando: {totals['extra']} | "
+            f"Desatualizadas: {totals['stale']}"
+        )
+        if not any(totals.values()):
+            self.stdout.write(self.style.SUCCESS(f"✅ TaskAccess consistente. {summary}"))
+        elif rebuild:
+            self.stdout.write(self.style.SUCCESS(f"✅ TaskAccess reconstruída. {summary}"))
+        else:
+            self.stdout.write(self.style.WARNING(
+                f"⚠️  TaskAccess inconsistente. {summary} (use --rebuild para corrigir)"
+            ))
+
+    def _diff(self, tasks):
+        expected = {
+            (row.user_id, row.task_id): row
+            for row in TaskAccess.objects.expected_rows(tasks)
+        }
+        actual = {
+            (row.user_id, row.task_id): row
+            for row in TaskAccess.objects.filter(task__in=tasks)
+        }
+        missing = [row for key, row in expected.items() if key not in actual]
+        extra = [row for key, row in actual.items() if key not in expected]
+        stale = []
+        for key, row in actual.items():
+            wanted = expected.get(key)
+            if wanted is None:
+                continue
+            fields = ('role',) + ACCESS_SYNCED_FIELDS
+            if any(getattr(row, field) != getattr(wanted, field) for field in fields):
+                stale.append((row, wanted))
+        return missing, extra, stale
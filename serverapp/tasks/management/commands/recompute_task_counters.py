@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+
+from core.transactions import write_atomic
+from tasks.counters import COUNTER_COLUMNS, expected_counters
+from tasks.models import TaskCounter
+
+
+class Command(BaseCommand):
+    help = "Recalcula do zero os contadores por usuário (TaskCounter) a partir de TaskAccess"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Apenas verifica os contadores, sem gravar'
+        )
+
+    def handle(self, *args, **options):
+        with write_atomic():
+            expected = expected_counters()
+            current = {
+                row.pop('user_id'): row
+                for row in TaskCounter.objects.values('user_id', *COUNTER_COLUMNS)
+            }
+            zeros = dict.fromkeys(COUNTER_COLUMNS, 0)
+            drifted = [
+                user_id for user_id in set(expected) | set(current)
+                if expected.get(user_id, zeros) != current.get(user_id, zeros)
+            ]
+            if drifted and not options['check']:
+                TaskCounter.objects.all().delete()
+                TaskCounter.objects.bulk_create([
+                    TaskCounter(user_id=user_id, **values) for user_id, values in expected.items()
+                ])
+        summary = f"Usuários: {len(expected)} | Divergentes: {len(drifted)}"
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS(f"✅ Contadores consistentes. {summary}"))
+        elif options['check']:
+            self.stdout.write(self.style.WARNING(
+                f"⚠️  Contadores divergentes. {summary} (execute sem --check para corrigir)"
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"✅ Contadores recalculados. {summary}"))
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-16 22:40
+
+from django.db import migrations, models
+
+
+PRIORITY_RANKS = {'low': 1, 'medium': 2, 'high': 3, 'urgent': 4}
+
+
+def backfill_priority_rank(apps, schema_editor):
+    Task = apps.get_model('tasks', 'Task')
+    for priority, rank in PRIORITY_RANKS.items():
+        Task.objects.filter(priority=priority).update(priority_rank=rank)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0002_task_shared_with'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='priority_rank',
+            field=models.PositiveSmallIntegerField(default=2, editable=False, help_text='Numeric priority level used for ordering (low=1 ... urgent=4)'),
+        ),
+        migrations.RunPython(backfill_priority_rank, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['owner', 'priority_rank', 'created_at'], name='tasks_task_owner_i_e18fea_idx'),
+        ),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 4.2.7 on 2026-10-16 22:44
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+SYNCED_FIELDS = ('created_at', 'title', 'priority', 'priority_rank', 'status', 'due_date')
+
+
+def backfill_task_access(apps, schema_editor):
+    Task = apps.get_model('tasks', 'Task')
+    TaskAccess = apps.get_model('tasks', 'TaskAccess')
+    Through = Task.shared_with.through
+    last_id = 0
+    while True:
+        tasks = list(Task.objects.filter(id__gt=last_id).order_by('id')[:2000])
+        if not tasks:
+            break
+        last_id = tasks[-1].id
+        shared = Through.objects.filter(task_id__in=[task.id for task in tasks]).values_list('task_id', 'user_id')
+        shared_by_task = {}
+        for task_id, user_id in shared:
+            shared_by_task.setdefault(task_id, []).append(user_id)
+        rows = []
+        for task in tasks:
+            values = {field: getattr(task, field) for field in SYNCED_FIELDS}
+            rows.append(TaskAccess(user_id=task.owner_id, task_id=task.id, role='owner', **values))
+            for user_id in shared_by_task.get(task.id, []):
+                if user_id != task.owner_id:
+                    rows.append(TaskAccess(user_id=user_id, task_id=task.id, role='shared', **values))
+        TaskAccess.objects.bulk_create(rows, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('tasks', '0003_task_priority_rank'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskAccess',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('role', models.CharField(choices=[('owner', 'Owner'), ('shared', 'Shared')], max_length=10)),
+                ('created_at', models.DateTimeField()),
+                ('title', models.CharField(max_length=200)),
+                ('priority', models.CharField(max_length=10)),
+                ('priority_rank', models.PositiveSmallIntegerField()),
+                ('status', models.CharField(max_length=15)),
+                ('due_date', models.DateTimeField(blank=True, null=True)),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='access_entries', to='tasks.task')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='task_access', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'created_at'], name='tasks_taska_user_id_5ed178_idx'), models.Index(fields=['user', 'priority_rank', 'created_at'], name='tasks_taska_user_id_d9a07e_idx'), models.Index(fields=['user', 'due_date'], name='tasks_taska_user_id_272207_idx'), models.Index(fields=['user', 'title'], name='tasks_taska_user_id_a79682_idx'), models.Index(fields=['user', 'status'], name='tasks_taska_user_id_5a0b35_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='taskaccess',
+            constraint=models.UniqueConstraint(fields=('user', 'task'), name='tasks_taskaccess_user_task_uniq'),
+        ),
+        migrations.RunPython(backfill_task_access, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,101 @@
+from django.db import DatabaseError, migrations, transaction
+
+# SQL copiado de tasks/search.py: a migração cria o índice como ele era nesta
+# versão, mesmo que o módulo mude depois
+CREATE_FTS_SQL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS tasks_task_fts USING fts5(
+        title, description, tags, users,
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3 4 5 6 7 8'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_task_fts_ai AFTER INSERT ON tasks_task BEGIN
+        INSERT INTO tasks_task_fts(rowid, title, description, tags, users)
+        VALUES (new.id, new.title, new.description, new.tags,
+                (SELECT group_concat('u' || user_id, ' ') FROM tasks_taskaccess WHERE task_id = new.id));
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_task_fts_ad AFTER DELETE ON tasks_task BEGIN
+        DELETE FROM tasks_task_fts WHERE rowid = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_task_fts_au AFTER UPDATE OF title, description, tags ON tasks_task
+    WHEN old.title IS NOT new.title
+        OR old.description IS NOT new.description
+        OR old.tags IS NOT new.tags
+    BEGIN
+        UPDATE tasks_task_fts SET title = new.title, description = new.description, tags = new.tags
+        WHERE rowid = new.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_task_fts_access_ai AFTER INSERT ON tasks_taskaccess BEGIN
+        UPDATE tasks_task_fts SET users = (SELECT group_concat('u' || user_id, ' ') FROM tasks_taskaccess WHERE task_id = new.task_id)
+        WHERE rowid = new.task_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_task_fts_access_ad AFTER DELETE ON tasks_taskaccess BEGIN
+        UPDATE tasks_task_fts SET users = (SELECT group_concat('u' || user_id, ' ') FROM tasks_taskaccess WHERE task_id = old.task_id)
+        WHERE rowid = old.task_id;
+    END
+    """,
+]
+
+REBUILD_FTS_SQL = [
+    "DELETE FROM tasks_task_fts",
+    """
+    INSERT INTO tasks_task_fts(rowid, title, description, tags, users)
+    SELECT id, title, description, tags, (SELECT group_concat('u' || user_id, ' ') FROM tasks_taskaccess WHERE task_id = tasks_task.id)
+    FROM tasks_task
+    """,
+]
+
+DROP_FTS_SQL = [
+    "DROP TRIGGER IF EXISTS tasks_task_fts_ai",
+    "DROP TRIGGER IF EXISTS tasks_task_fts_ad",
+    "DROP TRIGGER IF EXISTS tasks_task_fts_au",
+    "DROP TRIGGER IF EXISTS tasks_task_fts_access_ai",
+    "DROP TRIGGER IF EXISTS tasks_task_fts_access_ad",
+    "DROP TABLE IF EXISTS tasks_task_fts",
+]
+
+
+def create_fts_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite':
+        return
+    try:
+        with transaction.atomic(using=connection.alias):
+            with connection.cursor() as cursor:
+                for statement in CREATE_FTS_SQL:
+                    cursor.execute(statement)
+                for statement in REBUILD_FTS_SQL:
+                    cursor.execute(statement)
+    except DatabaseError:
+        # SQLite compilado sem FTS5: a busca continua usando title__icontains
+        pass
+
+
+def drop_fts_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for statement in DROP_FTS_SQL:
+            cursor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0004_taskaccess'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts_index, drop_fts_index),
+    ]
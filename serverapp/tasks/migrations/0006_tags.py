@@ -0,0 +1,66 @@
+# Generated by Django 4.2.7 on 2026-10-16 23:36
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_tags(apps, schema_editor):
+    Task = apps.get_model('tasks', 'Task')
+    Tag = apps.get_model('tasks', 'Tag')
+    TaskTag = apps.get_model('tasks', 'TaskTag')
+    tag_ids = {}
+    last_id = 0
+    while True:
+        tasks = list(Task.objects.filter(id__gt=last_id).exclude(tags='').order_by('id').values_list('id', 'tags')[:2000])
+        if not tasks:
+            break
+        last_id = tasks[-1][0]
+        names_by_task = {
+            task_id: {tag.strip().lower() for tag in tags.split(',') if tag.strip()}
+            for task_id, tags in tasks
+        }
+        missing = set().union(*names_by_task.values()) - set(tag_ids)
+        if missing:
+            Tag.objects.bulk_create([Tag(name=name) for name in missing], ignore_conflicts=True)
+            tag_ids.update(Tag.objects.filter(name__in=missing).values_list('name', 'id'))
+        TaskTag.objects.bulk_create([
+            TaskTag(task_id=task_id, tag_id=tag_ids[name])
+            for task_id, names in names_by_task.items()
+            for name in names
+        ], ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0005_task_fts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='Normalized (lowercase) tag name', max_length=200, unique=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='TaskTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='task_tags', to='tasks.tag')),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='task_tags', to='tasks.task')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['tag', 'task'], name='tasks_taskt_tag_id_57069b_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='tasktag',
+            constraint=models.UniqueConstraint(fields=('task', 'tag'), name='tasks_tasktag_task_tag_uniq'),
+        ),
+        migrations.RunPython(backfill_tags, migrations.RunPython.noop),
+    ]
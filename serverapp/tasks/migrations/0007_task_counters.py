@@ -0,0 +1,181 @@
+# Generated by Django 4.2.7 on 2026-10-17 00:15
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+# SQL copiado de tasks/search.py e tasks/counters.py: a migração cria os triggers
+# como eles eram nesta versão, mesmo que os módulos mudem depois
+FTS_TABLE = 'tasks_task_fts'
+
+CREATE_FTS_TRIGGERS_SQL = [
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_task_fts_ai AFTER INSERT ON tasks_task BEGIN
+        INSERT INTO tasks_task_fts(rowid, title, description, tags, users)
+        VALUES (new.id, new.title, new.description, new.tags,
+                (SELECT group_concat('u' || user_id, ' ') FROM tasks_taskaccess WHERE task_id = new.id));
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_task_fts_ad AFTER DELETE ON tasks_task BEGIN
+        DELETE FROM tasks_task_fts WHERE rowid = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_task_fts_au AFTER UPDATE OF title, description, tags ON tasks_task
+    WHEN old.title IS NOT new.title
+        OR old.description IS NOT new.description
+        OR old.tags IS NOT new.tags
+    BEGIN
+        UPDATE tasks_task_fts SET title = new.title, description = new.description, tags = new.tags
+        WHERE rowid = new.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_task_fts_access_ai AFTER INSERT ON tasks_taskaccess BEGIN
+        UPDATE tasks_task_fts SET users = (SELECT group_concat('u' || user_id, ' ') FROM tasks_taskaccess WHERE task_id = new.task_id)
+        WHERE rowid = new.task_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_task_fts_access_ad AFTER DELETE ON tasks_taskaccess BEGIN
+        UPDATE tasks_task_fts SET users = (SELECT group_concat('u' || user_id, ' ') FROM tasks_taskaccess WHERE task_id = old.task_id)
+        WHERE rowid = old.task_id;
+    END
+    """,
+]
+
+DROP_FTS_TRIGGERS_SQL = [
+    "DROP TRIGGER IF EXISTS tasks_task_fts_ai",
+    "DROP TRIGGER IF EXISTS tasks_task_fts_ad",
+    "DROP TRIGGER IF EXISTS tasks_task_fts_au",
+    "DROP TRIGGER IF EXISTS tasks_task_fts_access_ai",
+    "DROP TRIGGER IF EXISTS tasks_task_fts_access_ad",
+]
+
+CREATE_COUNTER_TRIGGERS_SQL = [
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_taskcounter_access_ai AFTER INSERT ON tasks_taskaccess BEGIN
+        INSERT OR IGNORE INTO tasks_taskcounter(user_id, total, owned, shared, completed, status_pending, status_in_progress, status_completed, status_cancelled, priority_low, priority_medium, priority_high, priority_urgent)
+        VALUES (new.user_id, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0);
+        UPDATE tasks_taskcounter SET total = total + 1, owned = owned + (new.role = 'owner'), shared = shared + (new.role = 'shared'), completed = completed + (new.is_completed = 1), status_pending = status_pending + (new.status = 'pending'), status_in_progress = status_in_progress + (new.status = 'in_progress'), status_completed = status_completed + (new.status = 'completed'), status_cancelled = status_cancelled + (new.status = 'cancelled'), priority_low = priority_low + (new.priority = 'low'), priority_medium = priority_medium + (new.priority = 'medium'), priority_high = priority_high + (new.priority = 'high'), priority_urgent = priority_urgent + (new.priority = 'urgent') WHERE user_id = new.user_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_taskcounter_access_ad AFTER DELETE ON tasks_taskaccess BEGIN
+        UPDATE tasks_taskcounter SET total = total - 1, owned = owned - (old.role = 'owner'), shared = shared - (old.role = 'shared'), completed = completed - (old.is_completed = 1), status_pending = status_pending - (old.status = 'pending'), status_in_progress = status_in_progress - (old.status = 'in_progress'), status_completed = status_completed - (old.status = 'completed'), status_cancelled = status_cancelled - (old.status = 'cancelled'), priority_low = priority_low - (old.priority = 'low'), priority_medium = priority_medium - (old.priority = 'medium'), priority_high = priority_high - (old.priority = 'high'), priority_urgent = priority_urgent - (old.priority = 'urgent') WHERE user_id = old.user_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_taskcounter_access_au AFTER UPDATE OF is_completed, priority, role, status ON tasks_taskaccess
+    WHEN old.is_completed IS NOT new.is_completed OR old.priority IS NOT new.priority OR old.role IS NOT new.role OR old.status IS NOT new.status
+    BEGIN
+        UPDATE tasks_taskcounter SET owned = owned - (old.role = 'owner') + (new.role = 'owner'), shared = shared - (old.role = 'shared') + (new.role = 'shared'), completed = completed - (old.is_completed = 1) + (new.is_completed = 1), status_pending = status_pending - (old.status = 'pending') + (new.status = 'pending'), status_in_progress = status_in_progress - (old.status = 'in_progress') + (new.status = 'in_progress'), status_completed = status_completed - (old.status = 'completed') + (new.status = 'completed'), status_cancelled = status_cancelled - (old.status = 'cancelled') + (new.status = 'cancelled'), priority_low = priority_low - (old.priority = 'low') + (new.priority = 'low'), priority_medium = priority_medium - (old.priority = 'medium') + (new.priority = 'medium'), priority_high = priority_high - (old.priority = 'high') + (new.priority = 'high'), priority_urgent = priority_urgent - (old.priority = 'urgent') + (new.priority = 'urgent') WHERE user_id = new.user_id;
+    END
+    """,
+]
+
+REBUILD_COUNTERS_SQL = [
+    "DELETE FROM tasks_taskcounter",
+    """
+    INSERT INTO tasks_taskcounter(user_id, total, owned, shared, completed, status_pending, status_in_progress, status_completed, status_cancelled, priority_low, priority_medium, priority_high, priority_urgent)
+    SELECT user_id, SUM(1), SUM((tasks_taskaccess.role = 'owner')), SUM((tasks_taskaccess.role = 'shared')), SUM((tasks_taskaccess.is_completed = 1)), SUM((tasks_taskaccess.status = 'pending')), SUM((tasks_taskaccess.status = 'in_progress')), SUM((tasks_taskaccess.status = 'completed')), SUM((tasks_taskaccess.status = 'cancelled')), SUM((tasks_taskaccess.priority = 'low')), SUM((tasks_taskaccess.priority = 'medium')), SUM((tasks_taskaccess.priority = 'high')), SUM((tasks_taskaccess.priority = 'urgent'))
+    FROM tasks_taskaccess
+    GROUP BY user_id
+    """,
+]
+
+DROP_COUNTER_TRIGGERS_SQL = [
+    "DROP TRIGGER IF EXISTS tasks_taskcounter_access_ai",
+    "DROP TRIGGER IF EXISTS tasks_taskcounter_access_ad",
+    "DROP TRIGGER IF EXISTS tasks_taskcounter_access_au",
+]
+
+
+def _run_fts_statements(schema_editor, statements):
+    # O SQLite recria tasks_taskaccess no AddField abaixo e não aceita renomear a
+    # tabela com triggers do FTS apontando para ela: saem antes e voltam depois
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+        if cursor.fetchone() is None:
+            return
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def drop_fts_triggers(apps, schema_editor):
+    _run_fts_statements(schema_editor, DROP_FTS_TRIGGERS_SQL)
+
+
+def create_fts_triggers(apps, schema_editor):
+    _run_fts_statements(schema_editor, CREATE_FTS_TRIGGERS_SQL)
+
+
+def backfill_is_completed(apps, schema_editor):
+    Task = apps.get_model('tasks', 'Task')
+    TaskAccess = apps.get_model('tasks', 'TaskAccess')
+    source = Task.objects.filter(pk=models.OuterRef('task_id')).values('is_completed')[:1]
+    TaskAccess.objects.update(is_completed=models.Subquery(source))
+
+
+def create_counter_triggers(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for statement in CREATE_COUNTER_TRIGGERS_SQL + REBUILD_COUNTERS_SQL:
+            cursor.execute(statement)
+
+
+def drop_counter_triggers(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for statement in DROP_COUNTER_TRIGGERS_SQL:
+            cursor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('tasks', '0006_tags'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_fts_triggers, create_fts_triggers),
+        migrations.CreateModel(
+            name='TaskCounter',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='task_counter', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('total', models.IntegerField(default=0)),
+                ('owned', models.IntegerField(default=0)),
+                ('shared', models.IntegerField(default=0)),
+                ('completed', models.IntegerField(default=0)),
+                ('status_pending', models.IntegerField(default=0)),
+                ('status_in_progress', models.IntegerField(default=0)),
+                ('status_completed', models.IntegerField(default=0)),
+                ('status_cancelled', models.IntegerField(default=0)),
+                ('priority_low', models.IntegerField(default=0)),
+                ('priority_medium', models.IntegerField(default=0)),
+                ('priority_high', models.IntegerField(default=0)),
+                ('priority_urgent', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='taskaccess',
+            name='is_completed',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddIndex(
+            model_name='taskaccess',
+            index=models.Index(fields=['user', 'is_completed', 'due_date'], name='tasks_taska_user_id_ab32ee_idx'),
+        ),
+        migrations.RunPython(backfill_is_completed, migrations.RunPython.noop),
+        migrations.RunPython(create_fts_triggers, drop_fts_triggers),
+        migrations.RunPython(create_counter_triggers, drop_counter_triggers),
+    ]
@@ -0,0 +1,179 @@
+# Generated by Django 4.2.7 on 2026-10-17 00:24
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+# SQL copiado de tasks/rollups.py: a migração cria os triggers como eles eram
+# nesta versão, mesmo que o módulo mude depois
+CREATE_ROLLUP_TRIGGERS_SQL = [
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_taskdailyrollup_task_ai AFTER INSERT ON tasks_task BEGIN
+        INSERT OR IGNORE INTO tasks_taskdailyrollup(user_id, day, created, completed, cancelled, backlog)
+        SELECT new.owner_id, date(new.created_at, 'localtime'), 0, 0, 0, COALESCE((
+            SELECT backlog FROM tasks_taskdailyrollup
+            WHERE user_id = new.owner_id AND day < date(new.created_at, 'localtime') ORDER BY day DESC LIMIT 1
+        ), 0)
+        WHERE new.created_at IS NOT NULL;
+        UPDATE tasks_taskdailyrollup
+        SET created = created + 1 * (day = date(new.created_at, 'localtime')), backlog = backlog + 1
+        WHERE user_id = new.owner_id AND day >= date(new.created_at, 'localtime');
+        INSERT OR IGNORE INTO tasks_taskdailyrollup(user_id, day, created, completed, cancelled, backlog)
+        SELECT new.owner_id, date(new.completed_at, 'localtime'), 0, 0, 0, COALESCE((
+            SELECT backlog FROM tasks_taskdailyrollup
+            WHERE user_id = new.owner_id AND day < date(new.completed_at, 'localtime') ORDER BY day DESC LIMIT 1
+        ), 0)
+        WHERE new.completed_at IS NOT NULL;
+        UPDATE tasks_taskdailyrollup
+        SET completed = completed + 1 * (day = date(new.completed_at, 'localtime')), backlog = backlog + -1
+        WHERE user_id = new.owner_id AND day >= date(new.completed_at, 'localtime');
+        INSERT OR IGNORE INTO tasks_taskdailyrollup(user_id, day, created, completed, cancelled, backlog)
+        SELECT new.owner_id, date(new.cancelled_at, 'localtime'), 0, 0, 0, COALESCE((
+            SELECT backlog FROM tasks_taskdailyrollup
+            WHERE user_id = new.owner_id AND day < date(new.cancelled_at, 'localtime') ORDER BY day DESC LIMIT 1
+        ), 0)
+        WHERE new.cancelled_at IS NOT NULL;
+        UPDATE tasks_taskdailyrollup
+        SET cancelled = cancelled + 1 * (day = date(new.cancelled_at, 'localtime')), backlog = backlog + -1
+        WHERE user_id = new.owner_id AND day >= date(new.cancelled_at, 'localtime');
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_taskdailyrollup_task_ad AFTER DELETE ON tasks_task BEGIN
+        UPDATE tasks_taskdailyrollup
+        SET created = created + -1 * (day = date(old.created_at, 'localtime')), backlog = backlog + -1
+        WHERE user_id = old.owner_id AND day >= date(old.created_at, 'localtime');
+        UPDATE tasks_taskdailyrollup
+        SET completed = completed + -1 * (day = date(old.completed_at, 'localtime')), backlog = backlog + 1
+        WHERE user_id = old.owner_id AND day >= date(old.completed_at, 'localtime');
+        UPDATE tasks_taskdailyrollup
+        SET cancelled = cancelled + -1 * (day = date(old.cancelled_at, 'localtime')), backlog = backlog + 1
+        WHERE user_id = old.owner_id AND day >= date(old.cancelled_at, 'localtime');
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_taskdailyrollup_task_au AFTER UPDATE OF owner_id, created_at, completed_at, cancelled_at ON tasks_task
+    WHEN old.owner_id IS NOT new.owner_id OR old.created_at IS NOT new.created_at OR old.completed_at IS NOT new.completed_at OR old.cancelled_at IS NOT new.cancelled_at
+    BEGIN
+        UPDATE tasks_taskdailyrollup
+        SET created = created + -1 * (day = date(old.created_at, 'localtime')), backlog = backlog + -1
+        WHERE user_id = old.owner_id AND day >= date(old.created_at, 'localtime');
+        UPDATE tasks_taskdailyrollup
+        SET completed = completed + -1 * (day = date(old.completed_at, 'localtime')), backlog = backlog + 1
+        WHERE user_id = old.owner_id AND day >= date(old.completed_at, 'localtime');
+        UPDATE tasks_taskdailyrollup
+        SET cancelled = cancelled + -1 * (day = date(old.cancelled_at, 'localtime')), backlog = backlog + 1
+        WHERE user_id = old.owner_id AND day >= date(old.cancelled_at, 'localtime');
+
+        INSERT OR IGNORE INTO tasks_taskdailyrollup(user_id, day, created, completed, cancelled, backlog)
+        SELECT new.owner_id, date(new.created_at, 'localtime'), 0, 0, 0, COALESCE((
+            SELECT backlog FROM tasks_taskdailyrollup
+            WHERE user_id = new.owner_id AND day < date(new.created_at, 'localtime') ORDER BY day DESC LIMIT 1
+        ), 0)
+        WHERE new.created_at IS NOT NULL;
+        UPDATE tasks_taskdailyrollup
+        SET created = created + 1 * (day = date(new.created_at, 'localtime')), backlog = backlog + 1
+        WHERE user_id = new.owner_id AND day >= date(new.created_at, 'localtime');
+        INSERT OR IGNORE INTO tasks_taskdailyrollup(user_id, day, created, completed, cancelled, backlog)
+        SELECT new.owner_id, date(new.completed_at, 'localtime'), 0, 0, 0, COALESCE((
+            SELECT backlog FROM tasks_taskdailyrollup
+            WHERE user_id = new.owner_id AND day < date(new.completed_at, 'localtime') ORDER BY day DESC LIMIT 1
+        ), 0)
+        WHERE new.completed_at IS NOT NULL;
+        UPDATE tasks_taskdailyrollup
+        SET completed = completed + 1 * (day = date(new.completed_at, 'localtime')), backlog = backlog + -1
+        WHERE user_id = new.owner_id AND day >= date(new.completed_at, 'localtime');
+        INSERT OR IGNORE INTO tasks_taskdailyrollup(user_id, day, created, completed, cancelled, backlog)
+        SELECT new.owner_id, date(new.cancelled_at, 'localtime'), 0, 0, 0, COALESCE((
+            SELECT backlog FROM tasks_taskdailyrollup
+            WHERE user_id = new.owner_id AND day < date(new.cancelled_at, 'localtime') ORDER BY day DESC LIMIT 1
+        ), 0)
+        WHERE new.cancelled_at IS NOT NULL;
+        UPDATE tasks_taskdailyrollup
+        SET cancelled = cancelled + 1 * (day = date(new.cancelled_at, 'localtime')), backlog = backlog + -1
+        WHERE user_id = new.owner_id AND day >= date(new.cancelled_at, 'localtime');
+    END
+    """,
+]
+
+DROP_ROLLUP_TRIGGERS_SQL = [
+    "DROP TRIGGER IF EXISTS tasks_taskdailyrollup_task_ai",
+    "DROP TRIGGER IF EXISTS tasks_taskdailyrollup_task_ad",
+    "DROP TRIGGER IF EXISTS tasks_taskdailyrollup_task_au",
+]
+
+REBUILD_ROLLUPS_SQL = [
+    "DELETE FROM tasks_taskdailyrollup",
+    """
+    INSERT INTO tasks_taskdailyrollup(user_id, day, created, completed, cancelled, backlog)
+    SELECT user_id, day, SUM(created), SUM(completed), SUM(cancelled),
+           SUM(SUM(created) - SUM(completed) - SUM(cancelled)) OVER (PARTITION BY user_id ORDER BY day)
+    FROM (
+        SELECT owner_id AS user_id, date(created_at, 'localtime') AS day, 1 AS created, 0 AS completed, 0 AS cancelled
+        FROM tasks_task
+        UNION ALL
+        SELECT owner_id, date(completed_at, 'localtime'), 0, 1, 0 FROM tasks_task WHERE completed_at IS NOT NULL
+        UNION ALL
+        SELECT owner_id, date(cancelled_at, 'localtime'), 0, 0, 1 FROM tasks_task WHERE cancelled_at IS NOT NULL
+    )
+    GROUP BY user_id, day
+    """,
+]
+
+
+def backfill_cancelled_at(apps, schema_editor):
+    # Não há registro de quando a tarefa foi cancelada; a última alteração é a melhor aproximação
+    Task = apps.get_model('tasks', 'Task')
+    Task.objects.filter(status='cancelled', cancelled_at__isnull=True).update(cancelled_at=models.F('updated_at'))
+
+
+def create_rollups(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for statement in CREATE_ROLLUP_TRIGGERS_SQL + REBUILD_ROLLUPS_SQL:
+            cursor.execute(statement)
+
+
+def drop_rollup_triggers(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for statement in DROP_ROLLUP_TRIGGERS_SQL:
+            cursor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('tasks', '0007_task_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='cancelled_at',
+            field=models.DateTimeField(blank=True, help_text='When the task was cancelled', null=True),
+        ),
+        migrations.CreateModel(
+            name='TaskDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('created', models.IntegerField(default=0)),
+                ('completed', models.IntegerField(default=0)),
+                ('cancelled', models.IntegerField(default=0)),
+                ('backlog', models.IntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='task_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='taskdailyrollup',
+            constraint=models.UniqueConstraint(fields=('user', 'day'), name='tasks_taskdailyrollup_user_day_uniq'),
+        ),
+        migrations.RunPython(backfill_cancelled_at, migrations.RunPython.noop),
+        migrations.RunPython(create_rollups, drop_rollup_triggers),
+    ]
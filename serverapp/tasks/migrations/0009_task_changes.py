@@ -0,0 +1,109 @@
+# Generated by Django 4.2.7 on 2026-10-17 00:32
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+# SQL copiado de tasks/changes.py: a migração cria os triggers como eles eram
+# nesta versão, mesmo que o módulo mude depois
+CREATE_CHANGE_TRIGGERS_SQL = [
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_taskchange_access_ai AFTER INSERT ON tasks_taskaccess BEGIN
+        DELETE FROM tasks_taskchange WHERE (user_id, task_id) IN (SELECT new.user_id, new.task_id);
+        INSERT INTO tasks_taskchange(user_id, task_id, deleted) SELECT *, 0 FROM (SELECT new.user_id, new.task_id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_taskchange_access_ad AFTER DELETE ON tasks_taskaccess BEGIN
+        DELETE FROM tasks_taskchange WHERE (user_id, task_id) IN (SELECT old.user_id, old.task_id);
+        INSERT INTO tasks_taskchange(user_id, task_id, deleted) SELECT *, 1 FROM (SELECT old.user_id, old.task_id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_taskchange_task_au AFTER UPDATE ON tasks_task BEGIN
+        DELETE FROM tasks_taskchange WHERE (user_id, task_id) IN (SELECT user_id, task_id FROM tasks_taskaccess WHERE task_id = new.id);
+        INSERT INTO tasks_taskchange(user_id, task_id, deleted) SELECT *, 0 FROM (SELECT user_id, task_id FROM tasks_taskaccess WHERE task_id = new.id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_taskchange_shared_ai AFTER INSERT ON tasks_task_shared_with BEGIN
+        DELETE FROM tasks_taskchange WHERE (user_id, task_id) IN (SELECT user_id, task_id FROM tasks_taskaccess WHERE task_id = new.task_id AND role = 'owner');
+        INSERT INTO tasks_taskchange(user_id, task_id, deleted) SELECT *, 0 FROM (SELECT user_id, task_id FROM tasks_taskaccess WHERE task_id = new.task_id AND role = 'owner');
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_taskchange_shared_ad AFTER DELETE ON tasks_task_shared_with BEGIN
+        DELETE FROM tasks_taskchange WHERE (user_id, task_id) IN (SELECT user_id, task_id FROM tasks_taskaccess WHERE task_id = old.task_id AND role = 'owner');
+        INSERT INTO tasks_taskchange(user_id, task_id, deleted) SELECT *, 0 FROM (SELECT user_id, task_id FROM tasks_taskaccess WHERE task_id = old.task_id AND role = 'owner');
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_taskchange_user_ad AFTER DELETE ON auth_user BEGIN
+        DELETE FROM tasks_taskchange WHERE user_id = old.id;
+    END
+    """,
+]
+
+DROP_CHANGE_TRIGGERS_SQL = [
+    "DROP TRIGGER IF EXISTS tasks_taskchange_access_ai",
+    "DROP TRIGGER IF EXISTS tasks_taskchange_access_ad",
+    "DROP TRIGGER IF EXISTS tasks_taskchange_task_au",
+    "DROP TRIGGER IF EXISTS tasks_taskchange_shared_ai",
+    "DROP TRIGGER IF EXISTS tasks_taskchange_shared_ad",
+    "DROP TRIGGER IF EXISTS tasks_taskchange_user_ad",
+]
+
+SEED_CHANGES_SQL = [
+    "DELETE FROM tasks_taskchange",
+    """
+    INSERT INTO tasks_taskchange(user_id, task_id, deleted)
+    SELECT user_id, task_id, 0 FROM tasks_taskaccess ORDER BY task_id, user_id
+    """,
+]
+
+
+def create_changes(apps, schema_editor):
+    # Tarefas já visíveis entram no feed como alterações, para a sincronização inicial
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for statement in CREATE_CHANGE_TRIGGERS_SQL + SEED_CHANGES_SQL:
+            cursor.execute(statement)
+
+
+def drop_change_triggers(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for statement in DROP_CHANGE_TRIGGERS_SQL:
+            cursor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('tasks', '0008_task_daily_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task_id', models.BigIntegerField()),
+                ('deleted', models.BooleanField(default=False)),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='task_changes', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'id'], name='tasks_taskc_user_id_28e0a1_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='taskchange',
+            constraint=models.UniqueConstraint(fields=('user', 'task_id'), name='tasks_taskchange_user_task_uniq'),
+        ),
+        migrations.RunPython(create_changes, drop_change_triggers),
+    ]
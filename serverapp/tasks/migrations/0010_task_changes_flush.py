@@ -0,0 +1,33 @@
+from django.db import migrations
+
+# SQL copiado de tasks/changes.py: a migração recria o trigger como ele era nesta
+# versão, mesmo que o módulo mude depois
+DROP_ACCESS_DELETE_TRIGGER_SQL = "DROP TRIGGER IF EXISTS tasks_taskchange_access_ad"
+
+ACCESS_DELETE_TRIGGER_SQL = """
+    CREATE TRIGGER IF NOT EXISTS tasks_taskchange_access_ad AFTER DELETE ON tasks_taskaccess BEGIN
+        DELETE FROM tasks_taskchange WHERE (user_id, task_id) IN (SELECT old.user_id, old.task_id WHERE EXISTS (SELECT 1 FROM auth_user WHERE id = old.user_id));
+        INSERT INTO tasks_taskchange(user_id, task_id, deleted) SELECT *, 1 FROM (SELECT old.user_id, old.task_id WHERE EXISTS (SELECT 1 FROM auth_user WHERE id = old.user_id));
+    END
+    """
+
+
+def recreate_access_delete_trigger(apps, schema_editor):
+    # CREATE TRIGGER IF NOT EXISTS não substitui o trigger criado pela 0009
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(DROP_ACCESS_DELETE_TRIGGER_SQL)
+        cursor.execute(ACCESS_DELETE_TRIGGER_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0009_task_changes'),
+    ]
+
+    operations = [
+        migrations.RunPython(recreate_access_delete_trigger, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-17 01:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0010_task_changes_flush'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='taskaccess',
+            name='tasks_taska_user_id_5ed178_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='taskaccess',
+            name='tasks_taska_user_id_5a0b35_idx',
+        ),
+        migrations.AddIndex(
+            model_name='taskaccess',
+            index=models.Index(fields=['user', 'created_at', 'task_id'], name='tasks_taska_user_id_a01acd_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='taskaccess',
+            index=models.Index(fields=['user', 'status', 'due_date'], name='tasks_taska_user_id_851ade_idx'),
+        ),
+    ]
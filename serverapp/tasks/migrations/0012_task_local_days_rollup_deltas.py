@@ -0,0 +1,156 @@
+from django.db import migrations, models
+from django.utils import timezone
+
+# SQL copiado de tasks/rollups.py: a migração cria os triggers como eles eram
+# nesta versão, mesmo que o módulo mude depois. Os da 0008 (dia calculado pelo
+# SQLite com 'localtime' e backlog acumulado) têm os mesmos nomes.
+CREATE_ROLLUP_TRIGGERS_SQL = [
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_taskdailyrollup_task_ai AFTER INSERT ON tasks_task BEGIN
+        INSERT OR IGNORE INTO tasks_taskdailyrollup(user_id, day, created, completed, cancelled)
+        SELECT new.owner_id, new.created_day, 0, 0, 0 WHERE new.created_day IS NOT NULL;
+        UPDATE tasks_taskdailyrollup SET created = created + 1
+        WHERE user_id = new.owner_id AND day = new.created_day;
+        INSERT OR IGNORE INTO tasks_taskdailyrollup(user_id, day, created, completed, cancelled)
+        SELECT new.owner_id, new.completed_day, 0, 0, 0 WHERE new.completed_day IS NOT NULL;
+        UPDATE tasks_taskdailyrollup SET completed = completed + 1
+        WHERE user_id = new.owner_id AND day = new.completed_day;
+        INSERT OR IGNORE INTO tasks_taskdailyrollup(user_id, day, created, completed, cancelled)
+        SELECT new.owner_id, new.cancelled_day, 0, 0, 0 WHERE new.cancelled_day IS NOT NULL;
+        UPDATE tasks_taskdailyrollup SET cancelled = cancelled + 1
+        WHERE user_id = new.owner_id AND day = new.cancelled_day;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_taskdailyrollup_task_ad AFTER DELETE ON tasks_task BEGIN
+        UPDATE tasks_taskdailyrollup SET created = created + -1
+        WHERE user_id = old.owner_id AND day = old.created_day;
+        UPDATE tasks_taskdailyrollup SET completed = completed + -1
+        WHERE user_id = old.owner_id AND day = old.completed_day;
+        UPDATE tasks_taskdailyrollup SET cancelled = cancelled + -1
+        WHERE user_id = old.owner_id AND day = old.cancelled_day;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_taskdailyrollup_task_au AFTER UPDATE OF owner_id, created_day, completed_day, cancelled_day ON tasks_task
+    WHEN old.owner_id IS NOT new.owner_id OR old.created_day IS NOT new.created_day OR old.completed_day IS NOT new.completed_day OR old.cancelled_day IS NOT new.cancelled_day
+    BEGIN
+        UPDATE tasks_taskdailyrollup SET created = created + -1
+        WHERE user_id = old.owner_id AND day = old.created_day;
+        UPDATE tasks_taskdailyrollup SET completed = completed + -1
+        WHERE user_id = old.owner_id AND day = old.completed_day;
+        UPDATE tasks_taskdailyrollup SET cancelled = cancelled + -1
+        WHERE user_id = old.owner_id AND day = old.cancelled_day;
+
+        INSERT OR IGNORE INTO tasks_taskdailyrollup(user_id, day, created, completed, cancelled)
+        SELECT new.owner_id, new.created_day, 0, 0, 0 WHERE new.created_day IS NOT NULL;
+        UPDATE tasks_taskdailyrollup SET created = created + 1
+        WHERE user_id = new.owner_id AND day = new.created_day;
+        INSERT OR IGNORE INTO tasks_taskdailyrollup(user_id, day, created, completed, cancelled)
+        SELECT new.owner_id, new.completed_day, 0, 0, 0 WHERE new.completed_day IS NOT NULL;
+        UPDATE tasks_taskdailyrollup SET completed = completed + 1
+        WHERE user_id = new.owner_id AND day = new.completed_day;
+        INSERT OR IGNORE INTO tasks_taskdailyrollup(user_id, day, created, completed, cancelled)
+        SELECT new.owner_id, new.cancelled_day, 0, 0, 0 WHERE new.cancelled_day IS NOT NULL;
+        UPDATE tasks_taskdailyrollup SET cancelled = cancelled + 1
+        WHERE user_id = new.owner_id AND day = new.cancelled_day;
+    END
+    """,
+]
+
+DROP_ROLLUP_TRIGGERS_SQL = [
+    "DROP TRIGGER IF EXISTS tasks_taskdailyrollup_task_ai",
+    "DROP TRIGGER IF EXISTS tasks_taskdailyrollup_task_ad",
+    "DROP TRIGGER IF EXISTS tasks_taskdailyrollup_task_au",
+]
+
+REBUILD_ROLLUPS_SQL = [
+    "DELETE FROM tasks_taskdailyrollup",
+    """
+    INSERT INTO tasks_taskdailyrollup(user_id, day, created, completed, cancelled)
+    SELECT user_id, day, SUM(created), SUM(completed), SUM(cancelled)
+    FROM (
+        SELECT owner_id AS user_id, created_day AS day, 1 AS created, 0 AS completed, 0 AS cancelled
+        FROM tasks_task WHERE created_day IS NOT NULL
+        UNION ALL
+        SELECT owner_id, completed_day, 0, 1, 0 FROM tasks_task WHERE completed_day IS NOT NULL
+        UNION ALL
+        SELECT owner_id, cancelled_day, 0, 0, 1 FROM tasks_task WHERE cancelled_day IS NOT NULL
+    )
+    GROUP BY user_id, day
+    """,
+]
+
+LOCAL_DAY_FIELDS = {
+    'created_at': 'created_day',
+    'completed_at': 'completed_day',
+    'cancelled_at': 'cancelled_day',
+}
+
+BACKFILL_CHUNK_SIZE = 2000
+
+
+def _run(schema_editor, statements):
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def drop_rollup_triggers(apps, schema_editor):
+    _run(schema_editor, DROP_ROLLUP_TRIGGERS_SQL)
+
+
+def backfill_local_days(apps, schema_editor):
+    # Dias no fuso do Django (TIME_ZONE), não no do processo
+    Task = apps.get_model('tasks', 'Task')
+    tasks = Task.objects.using(schema_editor.connection.alias).order_by('id')
+    last_id = 0
+    while True:
+        chunk = list(tasks.filter(id__gt=last_id).only('id', *LOCAL_DAY_FIELDS)[:BACKFILL_CHUNK_SIZE])
+        if not chunk:
+            break
+        last_id = chunk[-1].id
+        for task in chunk:
+            for source, day_field in LOCAL_DAY_FIELDS.items():
+                value = getattr(task, source)
+                setattr(task, day_field, timezone.localdate(value) if value else None)
+        Task.objects.using(schema_editor.connection.alias).bulk_update(chunk, list(LOCAL_DAY_FIELDS.values()))
+
+
+def create_rollups(apps, schema_editor):
+    _run(schema_editor, REBUILD_ROLLUPS_SQL + CREATE_ROLLUP_TRIGGERS_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0011_taskaccess_query_plan_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_rollup_triggers, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name='task',
+            name='created_day',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='completed_day',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='cancelled_day',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.RemoveField(
+            model_name='taskdailyrollup',
+            name='backlog',
+        ),
+        migrations.RunPython(backfill_local_days, migrations.RunPython.noop),
+        migrations.RunPython(create_rollups, drop_rollup_triggers),
+    ]
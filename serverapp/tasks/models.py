@@ -1,6 +1,211 @@
+from datetime import datetime
+
 from django.db import models
 from django.contrib.auth.models import User
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 from core.models import UserOwnedModel
+from core.transactions import write_atomic
+from .cache import bump_task_visibility, bump_visibility, users_with_access
+from .events import publish_task_event
+
+PRIORITY_RANKS = {
+    'low': 1,
+    'medium': 2,
+    'high': 3,
+    'urgent': 4,
+}
+
+
+def priority_rank_for(priority):
+    return PRIORITY_RANKS.get(priority, PRIORITY_RANKS['medium'])
+
+
+def normalize_tag(name):
+    return name.strip().lower()
+
+
+# Colunas de Task copiadas para TaskAccess (filtros e ordenações da listagem)
+ACCESS_SYNCED_FIELDS = ('created_at', 'title', 'priority', 'priority_rank', 'status', 'due_date', 'is_completed')
+
+# Instante -> dia local (TIME_ZONE) gravado ao lado, usado pelos rollups diários
+LOCAL_DAY_FIELDS = {
+    'created_at': 'created_day',
+    'completed_at': 'completed_day',
+    'cancelled_at': 'cancelled_day',
+}
+
+
+def local_day(value):
+    return timezone.localdate(value) if value else None
+
+
+class LocalDateField(models.DateField):
+    # Dia de outro campo no fuso do Django, recalculado a cada INSERT/UPDATE pelo
+    # ORM (depois do auto_now_add do campo de origem). Os triggers do SQLite só
+    # conhecem o fuso do processo, então o dia não pode ser calculado por eles.
+    def __init__(self, *args, source=None, **kwargs):
+        self.source = source
+        kwargs.setdefault('null', True)
+        kwargs.setdefault('blank', True)
+        kwargs.setdefault('editable', False)
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        # Nas migrações é um DateField comum
+        name, _, args, kwargs = super().deconstruct()
+        return name, 'django.db.models.DateField', args, kwargs
+
+    def pre_save(self, model_instance, add):
+        value = local_day(getattr(model_instance, self.source))
+        setattr(model_instance, self.attname, value)
+        return value
+
+
+def sync_local_days(task_ids, sources=tuple(LOCAL_DAY_FIELDS)):
+    # Recalcula os dias locais a partir dos instantes já gravados, só nas tarefas
+    # em que mudaram (ex.: após um update() com expressão ou trocar TIME_ZONE)
+    day_fields = [LOCAL_DAY_FIELDS[source] for source in sources]
+    stale = {}
+    rows = Task._base_manager.filter(pk__in=task_ids).values_list('pk', *sources, *day_fields)
+    for pk, *values in rows:
+        days = tuple(local_day(value) for value in values[:len(sources)])
+        if days != tuple(values[len(sources):]):
+            stale.setdefault(days, []).append(pk)
+    for days, pks in stale.items():
+        Task._base_manager.filter(pk__in=pks).update(**dict(zip(day_fields, days)))
+    return sum(len(pks) for pks in stale.values())
+
+
+def _with_local_days(fields):
+    return [LOCAL_DAY_FIELDS[field] for field in fields if field in LOCAL_DAY_FIELDS]
+
+
+# Toda escrita em tasks_task ou em shared_with acontece em uma transação de escrita
+# (write_atomic) junto com a manutenção de TaskAccess/TaskTag: uma falha no meio (ex.:
+# "database is locked") ou uma escrita concorrente não deixa o índice de visibilidade
+# diferente das tarefas. Invalidação do cache e eventos já esperam o commit.
+class TaskQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        for obj in objs:
+            obj.priority_rank = priority_rank_for(obj.priority)
+        with write_atomic():
+            created = super().bulk_create(objs, *args, **kwargs)
+            TaskAccess.objects.add_owners([obj for obj in created if obj.pk])
+            TaskTag.objects.sync([obj for obj in created if obj.pk and obj.tags])
+            bump_visibility(obj.owner_id for obj in created if obj.pk)
+            publish_task_event('created', [obj.pk for obj in created if obj.pk])
+        return created
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        objs = list(objs)
+        fields = list(fields)
+        # bulk_update não aplica auto_now; updated_at alimenta os ETags
+        if 'updated_at' not in fields:
+            now = timezone.now()
+            for obj in objs:
+                obj.updated_at = now
+            fields.append('updated_at')
+        if 'priority' in fields:
+            for obj in objs:
+                obj.priority_rank = priority_rank_for(obj.priority)
+            if 'priority_rank' not in fields:
+                fields.append('priority_rank')
+        for source, day_field in LOCAL_DAY_FIELDS.items():
+            if source in fields:
+                for obj in objs:
+                    setattr(obj, day_field, local_day(getattr(obj, source)))
+                if day_field not in fields:
+                    fields.append(day_field)
+        # O bulk_update do Django chama update() a cada lote interno; o QuerySet
+        # simples evita repetir a manutenção abaixo uma vez por lote
+        with write_atomic():
+            rows = models.QuerySet(self.model, using=self.db).bulk_update(objs, fields, *args, **kwargs)
+            if set(fields) & set(ACCESS_SYNCED_FIELDS):
+                TaskAccess.objects.resync([obj.pk for obj in objs])
+            if 'tags' in fields:
+                TaskTag.objects.sync(objs)
+            bump_task_visibility(obj.pk for obj in objs)
+            publish_task_event('updated', [obj.pk for obj in objs])
+        return rows
+
+    def with_related(self):
+        return self.select_related('owner').with_shared_count()
+
+    def with_shared_count(self):
+        through = self.model.shared_with.through
+        shared_count = through.objects.filter(
+            task_id=models.OuterRef('pk')
+        ).order_by().values('task_id').annotate(count=models.Count('id')).values('count')
+        return self.annotate(shared_count=Coalesce(models.Subquery(shared_count), 0))
+
+    def visible_to(self, user):
+        # Uma linha de TaskAccess por (usuário, tarefa): sem OR nem DISTINCT
+        return self.filter(access_entries__user=user)
+
+    def update(self, **kwargs):
+        if isinstance(kwargs.get('priority'), str) and 'priority_rank' not in kwargs:
+            kwargs['priority_rank'] = priority_rank_for(kwargs['priority'])
+        # Dias locais: calculados aqui para valores; para expressões (F(), ...) são
+        # relidos depois do UPDATE
+        recompute_days = []
+        for source, day_field in LOCAL_DAY_FIELDS.items():
+            if source in kwargs and day_field not in kwargs:
+                if kwargs[source] is None or isinstance(kwargs[source], datetime):
+                    kwargs[day_field] = local_day(kwargs[source])
+                else:
+                    recompute_days.append(source)
+        kwargs.setdefault('updated_at', timezone.now())
+        with write_atomic():
+            task_ids = list(self.values_list('pk', flat=True))
+            rows = super().update(**kwargs)
+            if recompute_days:
+                sync_local_days(task_ids, recompute_days)
+            bump_task_visibility(task_ids)
+            if set(kwargs) & set(ACCESS_SYNCED_FIELDS):
+                TaskAccess.objects.resync(task_ids)
+            if 'tags' in kwargs:
+                TaskTag.objects.sync(Task.objects.filter(pk__in=task_ids).only('pk', 'tags'))
+            publish_task_event('updated', task_ids)
+        return rows
+
+    def delete(self):
+        with write_atomic():
+            task_ids = list(self.values_list('pk', flat=True))
+            user_ids = users_with_access(task_ids)
+            publish_task_event('deleted', task_ids)
+            result = super().delete()
+            bump_visibility(user_ids)
+        return result
+
+    def share_with_users(self, users):
+        # Versão em lote de Task.share_with_user: linhas já existentes são ignoradas
+        through = self.model.shared_with.through
+        with write_atomic():
+            tasks = list(self)
+            pairs = [(task, user) for task in tasks for user in users if user.pk != task.owner_id]
+            through.objects.bulk_create(
+                [through(task_id=task.pk, user_id=user.pk) for task, user in pairs], ignore_conflicts=True
+            )
+            TaskAccess.objects.bulk_create([
+                TaskAccess(user_id=user.pk, task=task, role=TaskAccess.ROLE_SHARED,
+                           **TaskAccess.values_from_task(task))
+                for task, user in pairs
+            ], ignore_conflicts=True)
+            bump_task_visibility(task.pk for task in tasks)
+            publish_task_event('shared', [task.pk for task in tasks])
+
+    def unshare_with_users(self, users):
+        user_ids = [user.pk for user in users]
+        with write_atomic():
+            task_ids = list(self.values_list('pk', flat=True))
+            publish_task_event('unshared', task_ids)
+            self.model.shared_with.through.objects.filter(task_id__in=task_ids, user_id__in=user_ids).delete()
+            TaskAccess.objects.filter(task_id__in=task_ids, user_id__in=user_ids, role=TaskAccess.ROLE_SHARED).delete()
+            bump_visibility(users_with_access(task_ids) | set(user_ids))
+
+
 
 class Task(UserOwnedModel):
     PRIORITY_CHOICES = [
@@ -29,6 +234,11 @@ class Task(UserOwnedModel):
         default='medium',
         help_text="Priority level of the task"
     )
+    priority_rank = models.PositiveSmallIntegerField(
+        default=PRIORITY_RANKS['medium'],
+        editable=False,
+        help_text="Numeric priority level used for ordering (low=1 ... urgent=4)"
+    )
     status = models.CharField(
         max_length=15,
         choices=STATUS_CHOICES,
@@ -49,6 +259,14 @@ class Task(UserOwnedModel):
         default=False,
         help_text="Whether the task is completed"
     )
+    cancelled_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="When the task was cancelled"
+    )
+    created_day = LocalDateField(source='created_at')
+    completed_day = LocalDateField(source='completed_at')
+    cancelled_day = LocalDateField(source='cancelled_at')
     tags = models.CharField(
         max_length=200,
         blank=True,
@@ -60,6 +278,12 @@ class Task(UserOwnedModel):
         blank=True,
         help_text="Users with whom this task is shared"
     )
+
+    # Campos ajustados por apply_completion_rules a partir de `status`
+    COMPLETION_FIELDS = ('is_completed', 'completed_at', 'cancelled_at')
+
+    objects = TaskQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created_at']
         verbose_name = 'Task'
@@ -68,19 +292,56 @@ class Task(UserOwnedModel):
             models.Index(fields=['owner', 'status']),
             models.Index(fields=['owner', 'priority']),
             models.Index(fields=['due_date']),
+            models.Index(fields=['owner', 'priority_rank', 'created_at']),
         ]
     def __str__(self):
         return f"{self.title} ({self.get_status_display()})"
-    def save(self, *args, **kwargs):
+    def apply_completion_rules(self, now=None):
         if self.status == 'completed' and not self.is_completed:
             self.is_completed = True
             if not self.completed_at:
                 from django.utils import timezone
-                self.completed_at = timezone.now()
+                self.completed_at = now or timezone.now()
         elif self.status != 'completed' and self.is_completed:
             self.is_completed = False
             self.completed_at = None
-        super().save(*args, **kwargs)
+        if self.status == 'cancelled' and not self.cancelled_at:
+            from django.utils import timezone
+            self.cancelled_at = now or timezone.now()
+        elif self.status != 'cancelled' and self.cancelled_at:
+            self.cancelled_at = None
+    def save(self, *args, **kwargs):
+        self.apply_completion_rules()
+        self.priority_rank = priority_rank_for(self.priority)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'priority' in update_fields:
+            kwargs['update_fields'] = update_fields = set(update_fields) | {'priority_rank'}
+        if update_fields is not None and _with_local_days(update_fields):
+            kwargs['update_fields'] = update_fields = set(update_fields) | set(_with_local_days(update_fields))
+        created = self._state.adding
+        with write_atomic():
+            super().save(*args, **kwargs)
+            if created:
+                TaskAccess.objects.add_owners([self])
+            elif update_fields is None:
+                TaskAccess.objects.filter(task=self).update(**TaskAccess.values_from_task(self))
+            elif set(update_fields) & set(ACCESS_SYNCED_FIELDS):
+                # Os demais campos da instância podem estar desatualizados: copia do banco
+                TaskAccess.objects.resync([self.pk])
+            if (created and self.tags) or (not created and (update_fields is None or 'tags' in update_fields)):
+                TaskTag.objects.sync([self])
+            if created:
+                bump_visibility([self.owner_id])
+            else:
+                bump_task_visibility([self.pk])
+            publish_task_event('created' if created else 'updated', [self.pk])
+    def delete(self, *args, **kwargs):
+        with write_atomic():
+            user_ids = users_with_access([self.pk])
+            publish_task_event('deleted', [self.pk])
+            result = super().delete(*args, **kwargs)
+            bump_visibility(user_ids)
+        return result
     @property
     def is_overdue(self):
         if not self.due_date or self.is_completed:
@@ -98,17 +359,268 @@ class Task(UserOwnedModel):
         if not self.tags:
             return []
         return [tag.strip() for tag in self.tags.split(',') if tag.strip()]
+    def get_tag_names(self):
+        return {normalize_tag(tag) for tag in self.get_tags_list()}
     def share_with_user(self, user):
         if user != self.owner:
-            self.shared_with.add(user)
+            with write_atomic():
+                self.shared_with.add(user)
+                TaskAccess.objects.add_shared(self, [user])
+                bump_task_visibility([self.pk])
+                publish_task_event('shared', [self.pk])
     def unshare_with_user(self, user):
-        self.shared_with.remove(user)
+        with write_atomic():
+            publish_task_event('unshared', [self.pk])
+            self.shared_with.remove(user)
+            TaskAccess.objects.filter(task=self, user=user, role=TaskAccess.ROLE_SHARED).delete()
+            bump_visibility(users_with_access([self.pk]) | {user.pk})
     def get_shared_users(self):
         return self.shared_with.all()
     def is_shared_with(self, user):
         return self.shared_with.filter(id=user.id).exists()
     def get_all_users_with_access(self):
-        from django.db.models import Q
-        return User.objects.filter(
-            Q(id=self.owner.id) | Q(id__in=self.shared_with.values('id'))
-        ).distinct()
+        return User.objects.filter(task_access__task=self)
+
+
+class TaskAccessQuerySet(models.QuerySet):
+    def add_owners(self, tasks):
+        return self.bulk_create([
+            TaskAccess(user_id=task.owner_id, task=task, role=TaskAccess.ROLE_OWNER,
+                       **TaskAccess.values_from_task(task))
+            for task in tasks
+        ], ignore_conflicts=True)
+
+    def add_shared(self, task, users):
+        # Colunas relidas de tasks_task na transação do chamador: a instância pode ter
+        # sido carregada antes de uma alteração concorrente
+        values = Task._base_manager.filter(pk=task.pk).values(*ACCESS_SYNCED_FIELDS).get()
+        return self.bulk_create([
+            TaskAccess(user=user, task=task, role=TaskAccess.ROLE_SHARED, **values)
+            for user in users
+        ], ignore_conflicts=True)
+
+    def resync(self, task_ids):
+        # Recopia as colunas ordenáveis direto de tasks_task em um único UPDATE
+        source = Task.objects.filter(pk=models.OuterRef('task_id'))
+        return self.filter(task_id__in=task_ids).update(**{
+            field: models.Subquery(source.values(field)[:1])
+            for field in ACCESS_SYNCED_FIELDS
+        })
+
+    def expected_rows(self, tasks):
+        tasks = list(tasks)
+        through = Task.shared_with.through
+        shared = through.objects.filter(task__in=tasks).values_list('task_id', 'user_id')
+        shared_by_task = {}
+        for task_id, user_id in shared:
+            shared_by_task.setdefault(task_id, []).append(user_id)
+        rows = []
+        for task in tasks:
+            values = TaskAccess.values_from_task(task)
+            rows.append(TaskAccess(user_id=task.owner_id, task=task, role=TaskAccess.ROLE_OWNER, **values))
+            for user_id in shared_by_task.get(task.pk, []):
+                if user_id != task.owner_id:
+                    rows.append(TaskAccess(user_id=user_id, task=task, role=TaskAccess.ROLE_SHARED, **values))
+        return rows
+
+
+class TaskAccess(models.Model):
+    ROLE_OWNER = 'owner'
+    ROLE_SHARED = 'shared'
+    ROLE_CHOICES = [
+        (ROLE_OWNER, 'Owner'),
+        (ROLE_SHARED, 'Shared'),
+    ]
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='task_access'
+    )
+    task = models.ForeignKey(
+        Task,
+        on_delete=models.CASCADE,
+        related_name='access_entries'
+    )
+    role = models.CharField(max_length=10, choices=ROLE_CHOICES)
+    created_at = models.DateTimeField()
+    title = models.CharField(max_length=200)
+    priority = models.CharField(max_length=10)
+    priority_rank = models.PositiveSmallIntegerField()
+    status = models.CharField(max_length=15)
+    due_date = models.DateTimeField(null=True, blank=True)
+    is_completed = models.BooleanField(default=False)
+
+    objects = TaskAccessQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'task'], name='tasks_taskaccess_user_task_uniq'),
+        ]
+        indexes = [
+            # task_id desempata a paginação por cursor na ordem padrão sem ordenar em memória
+            models.Index(fields=['user', 'created_at', 'task_id']),
+            models.Index(fields=['user', 'priority_rank', 'created_at']),
+            models.Index(fields=['user', 'due_date']),
+            models.Index(fields=['user', 'title']),
+            # Filtro de atrasadas (status IN (pending, in_progress) AND due_date < agora): um
+            # intervalo em due_date por status. Índice parcial não serve: o Django passa os
+            # valores do IN como parâmetros e o SQLite só usa o índice com literais
+            models.Index(fields=['user', 'status', 'due_date']),
+            # Contagem de atrasadas: um intervalo em due_date dentro de (user, não concluída)
+            models.Index(fields=['user', 'is_completed', 'due_date']),
+        ]
+    def __str__(self):
+        return f"{self.user_id} -> {self.task_id} ({self.role})"
+    @staticmethod
+    def values_from_task(task):
+        return {field: getattr(task, field) for field in ACCESS_SYNCED_FIELDS}
+
+
+class TaskCounter(models.Model):
+    # Totais por usuário mantidos por triggers em tasks_taskaccess (ver tasks/counters.py)
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='task_counter'
+    )
+    total = models.IntegerField(default=0)
+    owned = models.IntegerField(default=0)
+    shared = models.IntegerField(default=0)
+    completed = models.IntegerField(default=0)
+    status_pending = models.IntegerField(default=0)
+    status_in_progress = models.IntegerField(default=0)
+    status_completed = models.IntegerField(default=0)
+    status_cancelled = models.IntegerField(default=0)
+    priority_low = models.IntegerField(default=0)
+    priority_medium = models.IntegerField(default=0)
+    priority_high = models.IntegerField(default=0)
+    priority_urgent = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user_id}: {self.total}"
+
+
+class TaskDailyRollup(models.Model):
+    # Eventos por dia (created_day/completed_day/cancelled_day de Task, no fuso do
+    # Django) das tarefas do usuário, mantidos por triggers em tasks_task (ver
+    # tasks/rollups.py). Só contagens do dia: o backlog é a soma dos dias anteriores.
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='task_rollups'
+    )
+    day = models.DateField()
+    created = models.IntegerField(default=0)
+    completed = models.IntegerField(default=0)
+    cancelled = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'day'], name='tasks_taskdailyrollup_user_day_uniq'),
+        ]
+    def __str__(self):
+        return f"{self.user_id} {self.day}"
+
+
+class TaskChange(models.Model):
+    # Última mudança de cada tarefa na visão de cada usuário, mantida por triggers
+    # (ver tasks/changes.py). O id é a sequência do feed de alterações; `deleted`
+    # marca as lápides de tarefas excluídas ou descompartilhadas.
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='task_changes',
+        db_index=False
+    )
+    task_id = models.BigIntegerField()
+    deleted = models.BooleanField(default=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'task_id'], name='tasks_taskchange_user_task_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'id']),
+        ]
+    def __str__(self):
+        return f"{self.user_id} -> {self.task_id} ({self.id})"
+
+
+class Tag(models.Model):
+    name = models.CharField(
+        max_length=200,
+        unique=True,
+        help_text="Normalized (lowercase) tag name"
+    )
+
+    class Meta:
+        ordering = ['name']
+    def __str__(self):
+        return self.name
+
+
+class TaskTagQuerySet(models.QuerySet):
+    def sync(self, tasks):
+        # Mantém o índice invertido (tag -> tarefas) igual ao campo `tags` de cada tarefa
+        desired = {task.pk: task.get_tag_names() for task in tasks}
+        if not desired:
+            return
+        names = set().union(*desired.values())
+        tag_ids = dict(Tag.objects.filter(name__in=names).values_list('name', 'id'))
+        missing = names - set(tag_ids)
+        if missing:
+            Tag.objects.bulk_create([Tag(name=name) for name in missing], ignore_conflicts=True)
+            tag_ids.update(Tag.objects.filter(name__in=missing).values_list('name', 'id'))
+        wanted = {(task_id, tag_ids[name]) for task_id, task_names in desired.items() for name in task_names}
+        current = {
+            (task_id, tag_id): pk
+            for pk, task_id, tag_id in self.filter(task_id__in=desired).values_list('pk', 'task_id', 'tag_id')
+        }
+        stale = [pk for key, pk in current.items() if key not in wanted]
+        if stale:
+            self.filter(pk__in=stale).delete()
+        added = wanted - set(current)
+        if added:
+            self.bulk_create(
+                [TaskTag(task_id=task_id, tag_id=tag_id) for task_id, tag_id in added],
+                ignore_conflicts=True,
+            )
+
+    def matching_condition(self, names, task_column, match_all=False):
+        # Cada EXISTS é uma busca no índice único (task, tag), sem varrer `tags`
+        names = {normalize_tag(name) for name in names if name.strip()}
+        tag_ids = list(Tag.objects.filter(name__in=names).values_list('id', flat=True))
+        if not tag_ids or (match_all and len(tag_ids) < len(names)):
+            return models.Q(pk__in=[])
+        if match_all:
+            condition = models.Q()
+            for tag_id in tag_ids:
+                condition &= models.Exists(self.filter(task_id=models.OuterRef(task_column), tag_id=tag_id))
+            return condition
+        return models.Q(models.Exists(self.filter(task_id=models.OuterRef(task_column), tag_id__in=tag_ids)))
+
+
+class TaskTag(models.Model):
+    task = models.ForeignKey(
+        Task,
+        on_delete=models.CASCADE,
+        related_name='task_tags'
+    )
+    tag = models.ForeignKey(
+        Tag,
+        on_delete=models.CASCADE,
+        related_name='task_tags'
+    )
+
+    objects = TaskTagQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['task', 'tag'], name='tasks_tasktag_task_tag_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['tag', 'task']),
+        ]
+    def __str__(self):
+        return f"{self.task_id} -> {self.tag_id}"
@@ -0,0 +1,103 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from django.db.models import F, Q
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+# Paginação por cursor sobre linhas de TaskAccess: a chave é (coluna, task_id).
+# Campo usado como chave de ordenação para cada valor aceito em `ordering`
+CURSOR_SORT_FIELDS = {
+    'created_at': 'created_at',
+    'title': 'title',
+    'due_date': 'due_date',
+    'priority': 'priority_rank',
+}
+
+DATETIME_SORT_FIELDS = {'created_at', 'due_date'}
+
+
+def encode_cursor(ordering, value, pk):
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = json.dumps({'o': ordering, 'v': value, 'id': pk}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token, ordering):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        cursor_ordering = payload['o']
+        value = payload['v']
+        pk = int(payload['id'])
+    except (binascii.Error, ValueError, KeyError, TypeError, UnicodeDecodeError):
+        raise InvalidCursor('Cursor inválido')
+    if cursor_ordering != ordering:
+        raise InvalidCursor('Cursor não corresponde à ordenação solicitada')
+    field = CURSOR_SORT_FIELDS[ordering.lstrip('-')]
+    if value is not None and field in DATETIME_SORT_FIELDS:
+        try:
+            value = datetime.fromisoformat(value)
+        except (TypeError, ValueError):
+            raise InvalidCursor('Cursor inválido')
+    return value, pk
+
+
+def order_for_cursor(queryset, ordering):
+    field = CURSOR_SORT_FIELDS[ordering.lstrip('-')]
+    # NULLs sempre no início da ordem crescente e no fim da decrescente,
+    # igual ao padrão do SQLite, para que a condição de busca seja estável.
+    if ordering.startswith('-'):
+        return queryset.order_by(F(field).desc(nulls_last=True), '-task_id')
+    return queryset.order_by(F(field).asc(nulls_first=True), 'task_id')
+
+
+def seek_after(queryset, ordering, value, pk):
+    field = CURSOR_SORT_FIELDS[ordering.lstrip('-')]
+    if ordering.startswith('-'):
+        if value is None:
+            return queryset.filter(**{f'{field}__isnull': True, 'task_id__lt': pk})
+        return queryset.filter(
+            Q(**{f'{field}__lt': value})
+            | Q(**{field: value, 'task_id__lt': pk})
+            | Q(**{f'{field}__isnull': True})
+        )
+    if value is None:
+        return queryset.filter(
+            Q(**{f'{field}__isnull': True, 'task_id__gt': pk})
+            | Q(**{f'{field}__isnull': False})
+        )
+    return queryset.filter(
+        Q(**{f'{field}__gt': value})
+        | Q(**{field: value, 'task_id__gt': pk})
+    )
+
+
+def cursor_page_queryset(queryset, ordering, page_size, token=None):
+    # Uma linha a mais que a página para saber se há próxima
+    queryset = order_for_cursor(queryset, ordering)
+    if token:
+        value, pk = decode_cursor(token, ordering)
+        queryset = seek_after(queryset, ordering, value, pk)
+    return queryset[:page_size + 1]
+
+
+def paginate_by_cursor(queryset, ordering, page_size, token=None):
+    return cursor_page(list(cursor_page_queryset(queryset, ordering, page_size, token)), ordering, page_size)
+
+
+def cursor_page(rows, ordering, page_size):
+    has_next = len(rows) > page_size
+    rows = rows[:page_size]
+    next_cursor = None
+    if has_next and rows:
+        last = rows[-1]
+        field = CURSOR_SORT_FIELDS[ordering.lstrip('-')]
+        next_cursor = encode_cursor(ordering, getattr(last, field), last.task_id)
+    return rows, next_cursor
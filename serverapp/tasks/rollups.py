@@ -0,0 +1,163 @@
+from datetime import timedelta
+
+from django.db import connections
+from django.db.models import Count, F, Sum
+
+ROLLUP_TABLE = 'tasks_taskdailyrollup'
+
+ROLLUP_MAX_DAYS = 366
+
+ROLLUP_CHUNK_SIZE = 5000
+
+# Dia local de Task -> coluna do rollup e efeito no backlog (tarefas em aberto)
+ROLLUP_EVENTS = (
+    ('created_day', 'created', 1),
+    ('completed_day', 'completed', -1),
+    ('cancelled_day', 'cancelled', -1),
+)
+
+ROLLUP_TRACKED_FIELDS = ('owner_id',) + tuple(field for field, _, _ in ROLLUP_EVENTS)
+
+
+def _apply_sql(row, sign):
+    # Cada evento só mexe na linha do próprio dia: O(1) por escrita, qualquer que
+    # seja a idade da tarefa. Os dias vêm prontos do ORM (LocalDateField)
+    statements = []
+    for field, column, _ in ROLLUP_EVENTS:
+        if sign > 0:
+            statements.append(f"""
+        INSERT OR IGNORE INTO {ROLLUP_TABLE}(user_id, day, created, completed, cancelled)
+        SELECT {row}.owner_id, {row}.{field}, 0, 0, 0 WHERE {row}.{field} IS NOT NULL;""")
+        statements.append(f"""
+        UPDATE {ROLLUP_TABLE} SET {column} = {column} + {sign}
+        WHERE user_id = {row}.owner_id AND day = {row}.{field};""")
+    return ''.join(statements)
+
+
+CREATE_ROLLUP_TRIGGERS_SQL = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {ROLLUP_TABLE}_task_ai AFTER INSERT ON tasks_task BEGIN
+        {_apply_sql('new', 1)}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {ROLLUP_TABLE}_task_ad AFTER DELETE ON tasks_task BEGIN
+        {_apply_sql('old', -1)}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {ROLLUP_TABLE}_task_au AFTER UPDATE OF {', '.join(ROLLUP_TRACKED_FIELDS)} ON tasks_task
+    WHEN {' OR '.join(f'old.{field} IS NOT new.{field}' for field in ROLLUP_TRACKED_FIELDS)}
+    BEGIN
+        {_apply_sql('old', -1)}
+        {_apply_sql('new', 1)}
+    END
+    """,
+]
+
+DROP_ROLLUP_TRIGGERS_SQL = [
+    f"DROP TRIGGER IF EXISTS {ROLLUP_TABLE}_task_ai",
+    f"DROP TRIGGER IF EXISTS {ROLLUP_TABLE}_task_ad",
+    f"DROP TRIGGER IF EXISTS {ROLLUP_TABLE}_task_au",
+]
+
+
+def rollups_available(using='default'):
+    return connections[using].vendor == 'sqlite'
+
+
+def ensure_rollup_triggers(using='default'):
+    connection = connections[using]
+    if not rollups_available(using) or ROLLUP_TABLE not in connection.introspection.table_names():
+        return
+    with connection.cursor() as cursor:
+        for statement in CREATE_ROLLUP_TRIGGERS_SQL:
+            cursor.execute(statement)
+
+
+def rebuild_rollups(using='default', chunk_size=None):
+    # Recalcula todo o histórico percorrendo tasks_task por id, um lote por vez;
+    # a memória cresce com os pares (usuário, dia), não com o total de tarefas.
+    # Dias locais desatualizados (ex.: TIME_ZONE alterado) são corrigidos antes.
+    # Deve rodar dentro de uma transação para ler um estado consistente.
+    from .models import Task, sync_local_days
+    chunk_size = chunk_size or ROLLUP_CHUNK_SIZE
+    tasks = Task._base_manager.using(using).order_by('id')
+    deltas = {}
+    last_id = 0
+    while True:
+        ids = list(tasks.filter(id__gt=last_id).values_list('id', flat=True)[:chunk_size])
+        if not ids:
+            break
+        last_id = ids[-1]
+        sync_local_days(ids)
+        chunk = tasks.filter(id__in=ids).values_list('owner_id', *(field for field, _, _ in ROLLUP_EVENTS))
+        for owner_id, *event_days in chunk:
+            for index, day in enumerate(event_days):
+                if day:
+                    deltas.setdefault((owner_id, day), [0] * len(ROLLUP_EVENTS))[index] += 1
+    with connections[using].cursor() as cursor:
+        cursor.execute(f"DELETE FROM {ROLLUP_TABLE}")
+        cursor.executemany(
+            f"INSERT INTO {ROLLUP_TABLE}(user_id, day, created, completed, cancelled) VALUES (%s, %s, %s, %s, %s)",
+            [(user_id, day, *counts) for (user_id, day), counts in sorted(deltas.items())],
+        )
+    return len(deltas)
+
+
+def _backlog_change():
+    change = None
+    for _, column, effect in ROLLUP_EVENTS:
+        term = F(column) * effect
+        change = term if change is None else change + term
+    return change
+
+
+def _rollup_deltas(user, start, end):
+    from .models import TaskDailyRollup
+    rollups = TaskDailyRollup.objects.filter(user=user)
+    base = rollups.filter(day__lt=start).aggregate(backlog=Sum(_backlog_change()))['backlog'] or 0
+    deltas = {
+        day: counts
+        for day, *counts in rollups.filter(day__range=(start, end)).values_list(
+            'day', *(column for _, column, _ in ROLLUP_EVENTS)
+        )
+    }
+    return base, deltas
+
+
+def _live_deltas(user, start, end):
+    # Sem triggers (outros bancos): agrega direto de Task, uma consulta por evento
+    from .models import Task
+    tasks = Task.objects.filter(owner=user).order_by()
+    base = 0
+    deltas = {}
+    for index, (field, _, effect) in enumerate(ROLLUP_EVENTS):
+        base += effect * tasks.filter(**{f'{field}__lt': start}).count()
+        per_day = (
+            tasks.filter(**{f'{field}__range': (start, end)})
+            .values(field).annotate(count=Count('id')).values_list(field, 'count')
+        )
+        for day, count in per_day:
+            deltas.setdefault(day, [0] * len(ROLLUP_EVENTS))[index] = count
+    return base, deltas
+
+
+def daily_series(user, start, end):
+    from .models import TaskDailyRollup
+    if rollups_available(TaskDailyRollup.objects.db):
+        backlog, deltas = _rollup_deltas(user, start, end)
+    else:
+        backlog, deltas = _live_deltas(user, start, end)
+    series = []
+    day = start
+    while day <= end:
+        counts = deltas.get(day) or [0] * len(ROLLUP_EVENTS)
+        point = {'date': day.isoformat()}
+        for count, (_, column, effect) in zip(counts, ROLLUP_EVENTS):
+            point[column] = count
+            backlog += count * effect
+        point['backlog'] = backlog
+        series.append(point)
+        day += timedelta(days=1)
+    return series
@@ -0,0 +1,163 @@
+import re
+
+from django.db import DatabaseError, connections
+
+FTS_TABLE = 'tasks_task_fts'
+
+# Prefixos com índice próprio: buscas por prefixo desses tamanhos não precisam
+# juntar as listas de todos os termos do banco que começam com eles
+FTS_PREFIX_LENGTHS = (2, 3, 4, 5, 6, 7, 8)
+
+# A coluna `users` guarda um token "u<id>" por usuário com acesso à tarefa.
+# Restringir o MATCH a esse token faz o FTS5 percorrer só as tarefas do
+# usuário, então o custo da busca não cresce com o total de tarefas do banco.
+# unicode61 com remove_diacritics ignora acentos ("reuniao" encontra "Reunião").
+CREATE_FTS_TABLE_SQL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, description, tags, users,
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='{' '.join(str(length) for length in FTS_PREFIX_LENGTHS)}'
+    )
+    """,
+]
+
+USERS_FOR_TASK_SQL = (
+    "(SELECT group_concat('u' || user_id, ' ') FROM tasks_taskaccess WHERE task_id = {task_id})"
+)
+
+# Mantém o índice atualizado em qualquer escrita em tasks_task e tasks_taskaccess,
+# inclusive bulk_create, update() e deleções em cascata
+CREATE_FTS_TRIGGERS_SQL = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON tasks_task BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, description, tags, users)
+        VALUES (new.id, new.title, new.description, new.tags,
+                {USERS_FOR_TASK_SQL.format(task_id='new.id')});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON tasks_task BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF title, description, tags ON tasks_task
+    WHEN old.title IS NOT new.title
+        OR old.description IS NOT new.description
+        OR old.tags IS NOT new.tags
+    BEGIN
+        UPDATE {FTS_TABLE} SET title = new.title, description = new.description, tags = new.tags
+        WHERE rowid = new.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_access_ai AFTER INSERT ON tasks_taskaccess BEGIN
+        UPDATE {FTS_TABLE} SET users = {USERS_FOR_TASK_SQL.format(task_id='new.task_id')}
+        WHERE rowid = new.task_id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_access_ad AFTER DELETE ON tasks_taskaccess BEGIN
+        UPDATE {FTS_TABLE} SET users = {USERS_FOR_TASK_SQL.format(task_id='old.task_id')}
+        WHERE rowid = old.task_id;
+    END
+    """,
+]
+
+REBUILD_FTS_SQL = [
+    f"DELETE FROM {FTS_TABLE}",
+    f"""
+    INSERT INTO {FTS_TABLE}(rowid, title, description, tags, users)
+    SELECT id, title, description, tags, {USERS_FOR_TASK_SQL.format(task_id='tasks_task.id')}
+    FROM tasks_task
+    """,
+]
+
+DROP_FTS_TRIGGERS_SQL = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_access_ai",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_access_ad",
+]
+
+DROP_FTS_SQL = DROP_FTS_TRIGGERS_SQL + [f"DROP TABLE IF EXISTS {FTS_TABLE}"]
+
+CREATE_FTS_SQL = CREATE_FTS_TABLE_SQL + CREATE_FTS_TRIGGERS_SQL
+
+_availability = {}
+
+
+def fts_available(using='default'):
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return False
+    key = (using, connection.settings_dict['NAME'])
+    if key not in _availability:
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE]
+                )
+                _availability[key] = cursor.fetchone() is not None
+        except DatabaseError:
+            _availability[key] = False
+    return _availability[key]
+
+
+def ensure_fts_triggers(using='default'):
+    # O SQLite recria tasks_task em algumas migrações (AddField com default),
+    # o que descarta os triggers; eles são recriados após cada migrate.
+    _availability.clear()
+    if not fts_available(using):
+        return
+    with connections[using].cursor() as cursor:
+        for statement in CREATE_FTS_TRIGGERS_SQL:
+            cursor.execute(statement)
+
+
+def build_match_query(search):
+    # Termos completos são buscados exatamente e só o último vira prefixo
+    # (busca enquanto digita), limitado ao maior prefixo indexado. As aspas
+    # evitam que a sintaxe do FTS5 venha do usuário.
+    terms = re.findall(r'\w+', search.lower())
+    if not terms:
+        return ''
+    last = terms[-1][:FTS_PREFIX_LENGTHS[-1]]
+    return ' '.join([f'"{term}"' for term in terms[:-1]] + [f'"{last}"*'])
+
+
+# Pesos do bm25 por coluna (title, description, tags, users): o título vale mais
+# que as tags, que valem mais que a descrição; `users` só filtra por usuário
+FTS_RANK_WEIGHTS = (10.0, 1.0, 4.0, 0.0)
+
+
+# Colunas pesquisadas pelos termos do usuário; sem esse filtro eles também
+# encontrariam os tokens "u<id>" da coluna `users` (ex.: ?search=u1)
+FTS_SEARCH_COLUMNS = ('title', 'description', 'tags')
+
+
+def _match_expression(user, match):
+    return f'users : "u{user.pk}" AND {{{" ".join(FTS_SEARCH_COLUMNS)}}} : ({match})'
+
+
+# Filtra pelo índice FTS5 com um único MATCH, juntando a tabela do índice pelo
+# rowid, e anota `search_rank` com o bm25 (menor = mais relevante). Sem FTS5
+# disponível, mantém o comportamento antigo (`title__icontains`).
+def search_tasks(queryset, search, user, task_column='id'):
+    match = build_match_query(search)
+    if not match or not fts_available(queryset.db):
+        return queryset.filter(title__icontains=search)
+    column = queryset.model._meta.get_field(task_column).column
+    weights = ', '.join(str(weight) for weight in FTS_RANK_WEIGHTS)
+    return queryset.extra(
+        select={'search_rank': f'bm25({FTS_TABLE}, {weights})'},
+        tables=[FTS_TABLE],
+        where=[f'{FTS_TABLE}.rowid = {queryset.model._meta.db_table}.{column}', f'{FTS_TABLE} MATCH %s'],
+        params=[_match_expression(user, match)],
+    )
+
+
+def is_ranked(queryset):
+    return 'search_rank' in queryset.query.extra
@@ -1,3 +1,4 @@
+from django.utils import timezone
 from rest_framework import serializers
 from .models import Task
 
@@ -33,10 +34,16 @@ class TaskSerializer(serializers.ModelSerializer):
     def get_is_shared(self, obj):
         request = self.context.get('request')
         if request and hasattr(request, 'user'):
-            return obj.owner != request.user
+            return obj.owner_id != request.user.id
         return False
     
     def get_shared_count(self, obj):
+        # Usa a anotação de Task.objects.with_related() quando disponível
+        shared_count = getattr(obj, 'shared_count', None)
+        if shared_count is not None:
+            return shared_count
+        if 'shared_with' in getattr(obj, '_prefetched_objects_cache', {}):
+            return len(obj.shared_with.all())
         return obj.shared_with.count()
     
     def validate_tags(self, value):
@@ -100,8 +107,122 @@ class TaskListSerializer(serializers.ModelSerializer):
     def get_is_shared(self, obj):
         request = self.context.get('request')
         if request and hasattr(request, 'user'):
-            return obj.owner != request.user
+            return obj.owner_id != request.user.id
         return False
     
     def get_shared_count(self, obj):
+        # Usa a anotação de Task.objects.with_related() quando disponível
+        shared_count = getattr(obj, 'shared_count', None)
+        if shared_count is not None:
+            return shared_count
+        if 'shared_with' in getattr(obj, '_prefetched_objects_cache', {}):
+            return len(obj.shared_with.all())
         return obj.shared_with.count()
+
+
+# Caminho rápido da listagem: monta os dicts direto de linhas `.values()`, sem
+# instanciar Task nem campos do DRF, com a mesma saída de TaskListSerializer
+TASK_LIST_FIELDS = tuple(TaskListSerializer.Meta.fields)
+
+TASK_LIST_PRESETS = {
+    'compact': ('id', 'title', 'priority', 'status', 'due_date', 'is_completed', 'is_overdue', 'tags_list'),
+}
+
+# Campos cuja saída depende do relógio (ver tasks.cache.next_change_at)
+TASK_LIST_CLOCK_FIELDS = ('is_overdue', 'days_until_due')
+
+TASK_LIST_COLUMNS = {
+    'id': ('id',),
+    'title': ('title',),
+    'description': ('description',),
+    'priority': ('priority',),
+    'status': ('status',),
+    'due_date': ('due_date',),
+    'completed_at': ('completed_at',),
+    'is_completed': ('is_completed',),
+    'tags': ('tags',),
+    'tags_list': ('tags',),
+    'created_at': ('created_at',),
+    'updated_at': ('updated_at',),
+    'owner': ('owner__username',),
+    'owner_info': ('owner_id', 'owner__username', 'owner__first_name', 'owner__last_name', 'owner__email'),
+    'is_shared': ('owner_id',),
+    'shared_count': ('shared_count',),
+    'is_overdue': ('due_date', 'is_completed'),
+    'days_until_due': ('due_date',),
+}
+
+
+def parse_list_fields(value):
+    if not value:
+        return TASK_LIST_FIELDS
+    requested = set()
+    for name in value.split(','):
+        name = name.strip()
+        requested.update(TASK_LIST_PRESETS.get(name, (name,) if name else ()))
+    unknown = requested - set(TASK_LIST_FIELDS)
+    if unknown:
+        raise ValueError(f"Campos inválidos em 'fields': {', '.join(sorted(unknown))}")
+    # Mesma ordem de TaskListSerializer, independente da ordem pedida
+    return tuple(field for field in TASK_LIST_FIELDS if field in requested)
+
+
+def task_list_columns(fields):
+    columns = ['id']
+    for field in fields:
+        columns.extend(column for column in TASK_LIST_COLUMNS[field] if column not in columns)
+    return columns
+
+
+def task_rows_queryset(task_ids, fields):
+    # Só as colunas dos campos pedidos, como dicts; sem ORDER BY, order_task_rows reordena
+    queryset = Task.objects.filter(id__in=task_ids).order_by()
+    if 'shared_count' in fields:
+        queryset = queryset.with_shared_count()
+    return queryset.values(*task_list_columns(fields))
+
+
+def order_task_rows(rows, task_ids):
+    rows = {row['id']: row for row in rows}
+    return [rows[task_id] for task_id in task_ids if task_id in rows]
+
+
+def load_task_rows(task_ids, fields):
+    # Na ordem de task_ids
+    return order_task_rows(task_rows_queryset(task_ids, fields), task_ids)
+
+
+def _datetime(value, tz):
+    # Mesmo formato do DateTimeField do DRF (ISO 8601 no fuso atual, "Z" para UTC)
+    if not value:
+        return None
+    value = value.astimezone(tz).isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+
+def serialize_task_rows(rows, fields, user):
+    tz = timezone.get_current_timezone()
+    now = timezone.now()
+    builders = {
+        'due_date': lambda row: _datetime(row['due_date'], tz),
+        'completed_at': lambda row: _datetime(row['completed_at'], tz),
+        'created_at': lambda row: _datetime(row['created_at'], tz),
+        'updated_at': lambda row: _datetime(row['updated_at'], tz),
+        'tags_list': lambda row: [tag.strip() for tag in row['tags'].split(',') if tag.strip()] if row['tags'] else [],
+        'owner': lambda row: row['owner__username'],
+        'owner_info': lambda row: {
+            'id': row['owner_id'],
+            'username': row['owner__username'],
+            'first_name': row['owner__first_name'],
+            'last_name': row['owner__last_name'],
+            'email': row['owner__email'],
+        },
+        'is_shared': lambda row: row['owner_id'] != user.id,
+        'is_overdue': lambda row: bool(row['due_date']) and not row['is_completed'] and now > row['due_date'],
+        'days_until_due': lambda row: (row['due_date'] - now).days if row['due_date'] else None,
+    }
+    plain = {field: (lambda row, field=field: row[field]) for field in fields if field not in builders}
+    getters = [(field, builders.get(field) or plain[field]) for field in fields]
+    return [{field: getter(row) for field, getter in getters} for row in rows]
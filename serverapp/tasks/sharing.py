@@ -0,0 +1,81 @@
+from django.contrib.auth.models import User
+from rest_framework import status
+
+from authentication.emails import filter_by_email, normalize_email
+from core.transactions import write_atomic
+
+from .models import Task
+
+BULK_SHARE_MAX_PAIRS = 10000
+
+BULK_SHARE_ACTIONS = ('share', 'unshare')
+
+
+def run_bulk_share(owner, action, task_ids, emails, user_ids):
+    # Uma consulta para as tarefas, até duas para os usuários e uma para os pares já
+    # compartilhados; as inserções/remoções são feitas em lote em uma transação
+    tasks = Task.objects.visible_to(owner).filter(id__in=task_ids).in_bulk()
+    task_errors = []
+    owned = []
+    for task_id in dict.fromkeys(task_ids):
+        task = tasks.get(task_id)
+        if task is None:
+            task_errors.append({'task_id': task_id, 'status': status.HTTP_404_NOT_FOUND,
+                                'error': 'Tarefa não encontrada ou você não tem permissão para acessá-la'})
+        elif task.owner_id != owner.id:
+            task_errors.append({'task_id': task_id, 'status': status.HTTP_403_FORBIDDEN,
+                                'error': 'Apenas o proprietário da tarefa pode alterar o compartilhamento'})
+        else:
+            owned.append(task)
+
+    # Emails pelo índice em LOWER(email) (sem diferenciar maiúsculas) e ids pela
+    # chave primária: um OR entre os dois não aproveitaria o índice parcial
+    found = list(filter_by_email(User.objects.all(), emails)) if emails else []
+    if user_ids:
+        found += User.objects.filter(id__in=user_ids)
+    by_id = {user.id: user for user in found}
+    by_email = {normalize_email(user.email): user for user in found if user.email}
+    user_errors = [
+        {'email': email, 'error': 'Usuário não encontrado com este email'}
+        for email in dict.fromkeys(emails) if normalize_email(email) not in by_email
+    ] + [
+        {'user_id': user_id, 'error': 'Usuário não encontrado'}
+        for user_id in dict.fromkeys(user_ids) if user_id not in by_id
+    ]
+    users = list({user.id: user for user in found}.values())
+
+    through = Task.shared_with.through
+    existing = set(
+        through.objects.filter(task_id__in=[task.pk for task in owned], user_id__in=[user.pk for user in users])
+        .values_list('task_id', 'user_id')
+    )
+    results = []
+    summary = dict.fromkeys(
+        ('shared', 'already_shared') if action == 'share' else ('unshared', 'not_shared'), 0
+    )
+    summary['is_owner'] = 0
+    for task in owned:
+        for user in users:
+            if user.pk == task.owner_id:
+                result = 'is_owner'
+            elif action == 'share':
+                result = 'already_shared' if (task.pk, user.pk) in existing else 'shared'
+            else:
+                result = 'unshared' if (task.pk, user.pk) in existing else 'not_shared'
+            summary[result] += 1
+            results.append({'task_id': task.pk, 'user_id': user.pk, 'email': user.email, 'result': result})
+
+    if owned and users:
+        queryset = Task.objects.filter(pk__in=[task.pk for task in owned])
+        with write_atomic():
+            if action == 'share':
+                queryset.share_with_users(users)
+            else:
+                queryset.unshare_with_users(users)
+    return {
+        'action': action,
+        'summary': summary,
+        'results': results,
+        'task_errors': task_errors,
+        'user_errors': user_errors,
+    }
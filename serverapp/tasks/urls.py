@@ -1,13 +1,25 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, views
+
+hot_views = async_views if settings.TASK_ASYNC_VIEWS else views
 
 app_name = 'tasks'
 
 urlpatterns = [
-    path('', views.task_list_create, name='task_list_create'),
-    path('<int:task_id>/', views.task_detail, name='task_detail'),
-    path('<int:task_id>/toggle/', views.task_toggle_complete, name='task_toggle_complete'),
+    path('', hot_views.task_list_create, name='task_list_create'),
+    path('batch/', views.task_batch, name='task_batch'),
+    path('bulk-share/', views.task_bulk_share, name='task_bulk_share'),
+    path('changes/', views.task_changes, name='task_changes'),
+    path('events/token/', views.task_events_token, name='task_events_token'),
+    path('export/', views.task_export, name='task_export'),
+    path('cache-stats/', views.task_cache_stats, name='task_cache_stats'),
+    path('stats/', views.task_stats, name='task_stats'),
+    path('stats/daily/', views.task_daily_stats, name='task_daily_stats'),
+    path('tags/', views.task_tag_counts, name='task_tag_counts'),
+    path('<int:task_id>/', hot_views.task_detail, name='task_detail'),
+    path('<int:task_id>/toggle/', hot_views.task_toggle_complete, name='task_toggle_complete'),
     path('<int:task_id>/share/', views.task_share, name='task_share'),
-    path('<int:task_id>/shared-users/', views.task_shared_users, name='task_shared_users'),
+    path('<int:task_id>/shared-users/', hot_views.task_shared_users, name='task_shared_users'),
     path('<int:task_id>/remove-user/', views.task_remove_user, name='task_remove_user'),
 ]
@@ -1,26 +1,193 @@
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
-from django.db import models
 from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Count
+from django.http import StreamingHttpResponse
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 import logging
+import time
 
-from .models import Task
+from authentication.emails import filter_by_email
+
+from .models import Task, TaskAccess, TaskChange, TaskTag
+from .batch import BATCH_MAX_OPERATIONS, run_batch
+from .cache import (
+    cacheable_list_key,
+    get_cache_stats,
+    get_cached_list,
+    list_cache_key,
+    list_cache_timeout,
+    next_change_at,
+    set_cached_list,
+)
+from .changes import CHANGES_MAX_PAGE_SIZE, CHANGES_PAGE_SIZE, changes_available, read_changes
+from .counters import count_overdue, get_task_counters
+from .export import EXPORT_FORMATS, buffered, csv_lines, iter_task_rows, ndjson_lines, streaming_chunks
+from .etags import if_match_failed, if_none_match, list_etag, task_etag
+from .pagination import InvalidCursor, paginate_by_cursor
+from .rollups import ROLLUP_MAX_DAYS, daily_series
+from .search import is_ranked, search_tasks
+from .sharing import BULK_SHARE_ACTIONS, BULK_SHARE_MAX_PAIRS, run_bulk_share
 from .serializers import (
     TaskSerializer,
     TaskCreateSerializer,
     TaskUpdateSerializer,
-    TaskListSerializer
+    TaskListSerializer,
+    TASK_LIST_CLOCK_FIELDS,
+    load_task_rows,
+    parse_list_fields,
+    serialize_task_rows,
 )
 
 logger = logging.getLogger(__name__)
 
 
+def _filter_tasks(queryset, params, user):
+    status_filter = params.get('status')
+    if status_filter:
+        queryset = queryset.filter(status=status_filter)
+    priority_filter = params.get('priority')
+    if priority_filter:
+        queryset = queryset.filter(priority=priority_filter)
+    search = params.get('search')
+    if search:
+        queryset = search_tasks(queryset, search, user, task_column='task_id')
+    tag_names = [name for value in params.getlist('tag') for name in value.split(',') if name.strip()]
+    if tag_names:
+        match_all = params.get('tag_mode', 'any').lower() == 'all'
+        queryset = queryset.filter(TaskTag.objects.matching_condition(tag_names, 'task_id', match_all))
+    due_date_from = params.get('due_date_from')
+    if due_date_from:
+        try:
+            from datetime import datetime
+            date_from = datetime.strptime(due_date_from, '%Y-%m-%d').date()
+            queryset = queryset.filter(due_date__gte=date_from)
+        except ValueError:
+            pass
+    due_date_to = params.get('due_date_to')
+    if due_date_to:
+        try:
+            from datetime import datetime
+            date_to = datetime.strptime(due_date_to, '%Y-%m-%d').date()
+            queryset = queryset.filter(due_date__lte=date_to)
+        except ValueError:
+            pass
+    overdue_filter = params.get('overdue')
+    if overdue_filter and overdue_filter.lower() == 'true':
+        now = timezone.now().date()
+        queryset = queryset.filter(
+            due_date__lt=now,
+            status__in=['pending', 'in_progress']
+        )
+    return queryset
+
+
+def _not_modified(etag):
+    return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
+
+def _precondition_failed():
+    return Response(
+        {'error': 'A tarefa foi modificada desde a última leitura (If-Match não confere)'},
+        status=status.HTTP_412_PRECONDITION_FAILED
+    )
+
+
+LIST_ORDERINGS = ['created_at', '-created_at', 'title', '-title', 'due_date', '-due_date', 'priority', '-priority']
+
+
+def _list_ordering(params):
+    requested_ordering = params.get('ordering')
+    return requested_ordering, requested_ordering if requested_ordering in LIST_ORDERINGS else '-created_at'
+
+
+def _order_for_pages(queryset, requested_ordering, ordering):
+    if is_ranked(queryset) and requested_ordering in (None, 'relevance'):
+        return queryset.order_by('search_rank', '-created_at')
+    if ordering == 'priority':
+        return queryset.order_by('priority_rank', 'created_at')
+    if ordering == '-priority':
+        return queryset.order_by('-priority_rank', '-created_at')
+    return queryset.order_by(ordering)
+
+
+def _cursor_page_data(rows, fields, user, next_cursor):
+    return {
+        'next': f"?pagination=cursor&cursor={next_cursor}" if next_cursor else None,
+        'next_cursor': next_cursor,
+        'results': serialize_task_rows(rows, fields, user)
+    }
+
+
+def _numbered_page_data(rows, fields, user, page_obj):
+    return {
+        'count': page_obj.paginator.count,
+        'next': f"?page={page_obj.next_page_number()}" if page_obj.has_next() else None,
+        'previous': f"?page={page_obj.previous_page_number()}" if page_obj.has_previous() else None,
+        'results': serialize_task_rows(rows, fields, user)
+    }
+
+
+def _list_etag(request, cache_key, rows, fields, data=None):
+    # O ETag sai da chave do cache (usuário, parâmetros e versão de visibilidade),
+    # ou do conteúdo sem ela, e do próximo instante em que campos dependentes do
+    # relógio mudam
+    due_dates = [row['due_date'] for row in rows] if set(fields) & set(TASK_LIST_CLOCK_FIELDS) else []
+    change_at = next_change_at(due_dates, date_filtered=request.GET.get('overdue', '').lower() == 'true')
+    return list_etag(cache_key, change_at, data), change_at
+
+
+def _list_page_response(request, cache_key, rows, fields, build_response_data):
+    cache_key = cacheable_list_key(cache_key)
+    response_data = None if cache_key is not None else build_response_data()
+    etag, change_at = _list_etag(request, cache_key, rows, fields, response_data)
+    if if_none_match(request, etag):
+        return _not_modified(etag)
+    if response_data is None:
+        response_data = build_response_data()
+    set_cached_list(cache_key, {'etag': etag, 'data': response_data}, list_cache_timeout(change_at))
+    return Response(response_data, headers={'ETag': etag, 'X-Cache': 'MISS'})
+
+
+def _toggle_completion(task):
+    if task.is_completed:
+        task.status = 'pending'
+        task.is_completed = False
+        task.completed_at = None
+    else:
+        task.status = 'completed'
+        task.is_completed = True
+        task.completed_at = timezone.now()
+
+
+def _user_info(user):
+    return {
+        'id': user.id,
+        'first_name': user.first_name,
+        'last_name': user.last_name,
+        'email': user.email
+    }
+
+
+def _shared_users_data(task, shared_users, is_owner):
+    return {
+        'shared_users': [_user_info(user) for user in shared_users],
+        'owner': dict(_user_info(task.owner), username=task.owner.username),
+        'current_user_is_owner': is_owner,
+        'task_info': {
+            'id': task.id,
+            'title': task.title,
+            'description': task.description
+        }
+    }
+
+
 @swagger_auto_schema(
     methods=['get'],
     operation_summary="Listar tarefas do usuário",
@@ -28,14 +195,23 @@ logger = logging.getLogger(__name__)
     manual_parameters=[
         openapi.Parameter('status', openapi.IN_QUERY, description="Filtrar por status (pending, in_progress, completed, cancelled)", type=openapi.TYPE_STRING),
         openapi.Parameter('priority', openapi.IN_QUERY, description="Filtrar por prioridade (low, medium, high, urgent)", type=openapi.TYPE_STRING),
-        openapi.Parameter('search', openapi.IN_QUERY, description="Buscar no título da tarefa", type=openapi.TYPE_STRING),
-        openapi.Parameter('ordering', openapi.IN_QUERY, description="Ordenação (-created_at, title, due_date, priority)", type=openapi.TYPE_STRING),
+        openapi.Parameter('search', openapi.IN_QUERY, description="Buscar no título, descrição e tags (ignora acentos e aceita prefixos); sem 'ordering' os resultados vêm por relevância", type=openapi.TYPE_STRING),
+        openapi.Parameter('ordering', openapi.IN_QUERY, description="Ordenação (-created_at, title, due_date, priority, relevance)", type=openapi.TYPE_STRING),
+        openapi.Parameter('tag', openapi.IN_QUERY, description="Filtrar por tags (separadas por vírgula ou parâmetro repetido; ignora maiúsculas)", type=openapi.TYPE_STRING),
+        openapi.Parameter('tag_mode', openapi.IN_QUERY, description="'any' (padrão) retorna tarefas com qualquer uma das tags; 'all' exige todas", type=openapi.TYPE_STRING),
         openapi.Parameter('due_date_from', openapi.IN_QUERY, description="Filtrar tarefas com vencimento a partir desta data (YYYY-MM-DD)", type=openapi.TYPE_STRING, format=openapi.FORMAT_DATE),
         openapi.Parameter('due_date_to', openapi.IN_QUERY, description="Filtrar tarefas com vencimento até esta data (YYYY-MM-DD)", type=openapi.TYPE_STRING, format=openapi.FORMAT_DATE),
         openapi.Parameter('overdue', openapi.IN_QUERY, description="Filtrar apenas tarefas atrasadas (true/false)", type=openapi.TYPE_BOOLEAN),
+        openapi.Parameter('fields', openapi.IN_QUERY, description="Campos retornados, separados por vírgula (ex.: id,title,status) ou o preset 'compact'", type=openapi.TYPE_STRING),
+        openapi.Parameter('page', openapi.IN_QUERY, description="Número da página (modo paginado por páginas)", type=openapi.TYPE_INTEGER),
+        openapi.Parameter('page_size', openapi.IN_QUERY, description="Quantidade de itens por página (máximo 1000)", type=openapi.TYPE_INTEGER),
+        openapi.Parameter('pagination', openapi.IN_QUERY, description="Use 'cursor' para paginação por cursor (sem OFFSET e sem contagem total)", type=openapi.TYPE_STRING),
+        openapi.Parameter('cursor', openapi.IN_QUERY, description="Token opaco retornado em 'next_cursor' para buscar a próxima página", type=openapi.TYPE_STRING),
+        openapi.Parameter('include_count', openapi.IN_QUERY, description="No modo cursor, inclui a contagem total em 'count' (true/false)", type=openapi.TYPE_BOOLEAN),
     ],
     responses={
         200: TaskListSerializer(many=True),
+        304: openapi.Response(description="Lista não modificada (If-None-Match confere com o ETag)"),
         401: openapi.Response(description="Token inválido ou expirado")
     },
     tags=['Tarefas'],
@@ -58,75 +234,42 @@ logger = logging.getLogger(__name__)
 @permission_classes([IsAuthenticated])
 def task_list_create(request):
     if request.method == 'GET':
-        from django.db.models import Q
-        queryset = Task.objects.filter(
-            Q(owner=request.user) | Q(shared_with=request.user)
-        ).distinct()
-        status_filter = request.GET.get('status')
-        if status_filter:
-            queryset = queryset.filter(status=status_filter)
-        priority_filter = request.GET.get('priority')
-        if priority_filter:
-            queryset = queryset.filter(priority=priority_filter)
-        search = request.GET.get('search')
-        if search:
-            queryset = queryset.filter(title__icontains=search)
-        due_date_from = request.GET.get('due_date_from')
-        if due_date_from:
-            try:
-                from datetime import datetime
-                date_from = datetime.strptime(due_date_from, '%Y-%m-%d').date()
-                queryset = queryset.filter(due_date__gte=date_from)
-            except ValueError:
-                pass
-        due_date_to = request.GET.get('due_date_to')
-        if due_date_to:
+        cache_key = list_cache_key(request.user.id, request.GET)
+        cached = get_cached_list(cache_key)
+        if cached is not None:
+            if if_none_match(request, cached['etag']):
+                return _not_modified(cached['etag'])
+            return Response(cached['data'], headers={'ETag': cached['etag'], 'X-Cache': 'HIT'})
+        try:
+            fields = parse_list_fields(request.GET.get('fields'))
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        queryset = _filter_tasks(TaskAccess.objects.filter(user=request.user), request.GET, request.user)
+        requested_ordering, ordering = _list_ordering(request.GET)
+        page_size = min(int(request.GET.get('page_size', 20)), 1000)
+        cursor = request.GET.get('cursor')
+        if cursor or request.GET.get('pagination') == 'cursor':
             try:
-                from datetime import datetime
-                date_to = datetime.strptime(due_date_to, '%Y-%m-%d').date()
-                queryset = queryset.filter(due_date__lte=date_to)
-            except ValueError:
-                pass
-        overdue_filter = request.GET.get('overdue')
-        if overdue_filter and overdue_filter.lower() == 'true':
-            from datetime import datetime
-            now = timezone.now().date()
-            queryset = queryset.filter(
-                due_date__lt=now,
-                status__in=['pending', 'in_progress']
-            )
-        ordering = request.GET.get('ordering', '-created_at')
-        valid_orderings = ['created_at', '-created_at', 'title', '-title', 
-                          'due_date', '-due_date', 'priority', '-priority']
-        if ordering in valid_orderings:
-            if ordering == 'priority' or ordering == '-priority':
-                priority_order = {
-                    'urgent': 4, 'high': 3, 'medium': 2, 'low': 1
-                }
-                queryset = sorted(queryset, 
-                                key=lambda x: priority_order.get(x.priority, 2),
-                                reverse=ordering.startswith('-'))
-                task_ids = [task.id for task in queryset]
-                queryset = Task.objects.filter(id__in=task_ids)
-                if ordering.startswith('-'):
-                    task_ids.reverse()
-                preserved = models.Case(*[models.When(pk=pk, then=pos) for pos, pk in enumerate(task_ids)])
-                queryset = queryset.order_by(preserved)
-            else:
-                queryset = queryset.order_by(ordering)
+                page, next_cursor = paginate_by_cursor(queryset, ordering, page_size, cursor)
+            except InvalidCursor as e:
+                return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            rows = load_task_rows([access.task_id for access in page], fields)
+
+            def build_response_data():
+                response_data = _cursor_page_data(rows, fields, request.user, next_cursor)
+                if request.GET.get('include_count', '').lower() == 'true':
+                    response_data['count'] = queryset.count()
+                return response_data
+            return _list_page_response(request, cache_key, rows, fields, build_response_data)
+        queryset = _order_for_pages(queryset, requested_ordering, ordering)
         from django.core.paginator import Paginator
-        page_size = min(int(request.GET.get('page_size', 20)), 1000)
         paginator = Paginator(queryset, page_size)
         page_number = request.GET.get('page', 1)
         page_obj = paginator.get_page(page_number)
-        serializer = TaskListSerializer(page_obj, many=True, context={'request': request})
-        response_data = {
-            'count': paginator.count,
-            'next': f"?page={page_obj.next_page_number()}" if page_obj.has_next() else None,
-            'previous': f"?page={page_obj.previous_page_number()}" if page_obj.has_previous() else None,
-            'results': serializer.data
-        }
-        return Response(response_data)
+        rows = load_task_rows([access.task_id for access in page_obj], fields)
+        return _list_page_response(
+            request, cache_key, rows, fields, lambda: _numbered_page_data(rows, fields, request.user, page_obj)
+        )
     elif request.method == 'POST':
         serializer = TaskCreateSerializer(data=request.data)
         if serializer.is_valid():
@@ -136,12 +279,206 @@ def task_list_create(request):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+@swagger_auto_schema(
+    method='get',
+    operation_summary="Exportar tarefas",
+    operation_description="Exporta todas as tarefas visíveis ao usuário em NDJSON ou CSV, via resposta em streaming (memória constante). Aceita os mesmos filtros e o parâmetro 'fields' da listagem.",
+    manual_parameters=[
+        openapi.Parameter('export_format', openapi.IN_QUERY, description="Formato da exportação: 'ndjson' (padrão) ou 'csv'", type=openapi.TYPE_STRING),
+        openapi.Parameter('fields', openapi.IN_QUERY, description="Campos exportados, separados por vírgula, ou o preset 'compact'", type=openapi.TYPE_STRING),
+        openapi.Parameter('status', openapi.IN_QUERY, description="Filtrar por status", type=openapi.TYPE_STRING),
+        openapi.Parameter('priority', openapi.IN_QUERY, description="Filtrar por prioridade", type=openapi.TYPE_STRING),
+        openapi.Parameter('search', openapi.IN_QUERY, description="Buscar no título, descrição e tags", type=openapi.TYPE_STRING),
+        openapi.Parameter('tag', openapi.IN_QUERY, description="Filtrar por tags (separadas por vírgula)", type=openapi.TYPE_STRING),
+        openapi.Parameter('overdue', openapi.IN_QUERY, description="Apenas tarefas atrasadas (true/false)", type=openapi.TYPE_BOOLEAN),
+    ],
+    responses={
+        200: openapi.Response(description="Arquivo NDJSON ou CSV"),
+        400: openapi.Response(description="Formato ou campos inválidos"),
+        401: openapi.Response(description="Token inválido ou expirado")
+    },
+    tags=['Tarefas'],
+    security=[{'Bearer': []}]
+)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def task_export(request):
+    # 'format' é reservado pelo DRF para a negociação de conteúdo, daí 'export_format'
+    export_format = request.GET.get('export_format', 'ndjson').lower()
+    if export_format not in EXPORT_FORMATS:
+        return Response(
+            {'error': f"Formato inválido: use {' ou '.join(EXPORT_FORMATS)}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    try:
+        fields = parse_list_fields(request.GET.get('fields'))
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    queryset = _filter_tasks(TaskAccess.objects.filter(user=request.user), request.GET, request.user)
+    rows = iter_task_rows(queryset, fields, request.user)
+    content_type, extension = EXPORT_FORMATS[export_format]
+    lines = csv_lines(rows, fields) if export_format == 'csv' else ndjson_lines(rows)
+    response = StreamingHttpResponse(streaming_chunks(request, buffered(lines)), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="tasks.{extension}"'
+    # Evita que um proxy (nginx) acumule a resposta inteira antes de repassar
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@swagger_auto_schema(
+    method='get',
+    operation_summary="Feed de alterações",
+    operation_description=(
+        "Tarefas criadas ou alteradas e lápides de tarefas excluídas ou descompartilhadas desde o token `since`, "
+        "em ordem de sequência. Sem `since` retorna todas as tarefas visíveis (sincronização inicial). "
+        "Use `next_since` na próxima chamada e repita enquanto `has_more` for verdadeiro."
+    ),
+    manual_parameters=[
+        openapi.Parameter('since', openapi.IN_QUERY, description="Token de sincronização (next_since da chamada anterior)", type=openapi.TYPE_INTEGER),
+        openapi.Parameter('limit', openapi.IN_QUERY, description=f"Alterações por página (padrão: {CHANGES_PAGE_SIZE}, máximo: {CHANGES_MAX_PAGE_SIZE})", type=openapi.TYPE_INTEGER),
+        openapi.Parameter('fields', openapi.IN_QUERY, description="Campos das tarefas, separados por vírgula, ou o preset 'compact'", type=openapi.TYPE_STRING),
+    ],
+    responses={
+        200: openapi.Response(description="Tarefas alteradas ('changes'), ids excluídos ('deleted') e o próximo token"),
+        400: openapi.Response(description="Token, limite ou campos inválidos"),
+        401: openapi.Response(description="Token inválido ou expirado"),
+        501: openapi.Response(description="Feed indisponível neste banco de dados")
+    },
+    tags=['Tarefas'],
+    security=[{'Bearer': []}]
+)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def task_changes(request):
+    if not changes_available(TaskChange.objects.db):
+        return Response(
+            {'error': 'Feed de alterações disponível apenas com SQLite'},
+            status=status.HTTP_501_NOT_IMPLEMENTED
+        )
+    try:
+        since = int(request.GET.get('since') or 0)
+        limit = int(request.GET.get('limit') or CHANGES_PAGE_SIZE)
+    except ValueError:
+        return Response({'error': "'since' e 'limit' devem ser inteiros"}, status=status.HTTP_400_BAD_REQUEST)
+    if since < 0 or not 1 <= limit <= CHANGES_MAX_PAGE_SIZE:
+        return Response(
+            {'error': f"'since' não pode ser negativo e 'limit' deve estar entre 1 e {CHANGES_MAX_PAGE_SIZE}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    try:
+        fields = parse_list_fields(request.GET.get('fields'))
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    # Feed e tarefas lidos na mesma transação: uma escrita concorrente fica inteira
+    # nesta página ou na próxima
+    with transaction.atomic():
+        changes = read_changes(request.user, since, limit)
+        rows = load_task_rows(changes['updated'], fields)
+    return Response({
+        'changes': serialize_task_rows(rows, fields, request.user),
+        'deleted': changes['deleted'],
+        'next_since': changes['next_since'],
+        'has_more': changes['has_more'],
+    })
+
+
+@swagger_auto_schema(
+    method='post',
+    operation_summary="Token do stream de eventos",
+    operation_description=(
+        "Gera um token de uso exclusivo do stream (`GET /api/tasks/events/?token=`), válido por "
+        "TASK_EVENTS_TOKEN_SECONDS. O `EventSource` não envia cabeçalhos, e o token de acesso não é aceito na "
+        "URL, onde ficaria nos logs. O stream fecha com `event: expired` quando o token de acesso usado aqui "
+        "expira ou o usuário é desativado"
+    ),
+    responses={
+        200: openapi.Response(
+            description="Token do stream",
+            schema=openapi.Schema(
+                type=openapi.TYPE_OBJECT,
+                properties={
+                    'token': openapi.Schema(type=openapi.TYPE_STRING),
+                    'expires_in': openapi.Schema(type=openapi.TYPE_INTEGER, description="Segundos para abrir o stream"),
+                }
+            )
+        ),
+        401: openapi.Response(description="Token inválido ou expirado")
+    },
+    tags=['Tarefas'],
+    security=[{'Bearer': []}]
+)
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def task_events_token(request):
+    from authentication.tokens import StreamToken
+    token = StreamToken.for_access_token(request.user, request.auth)
+    return Response({'token': str(token), 'expires_in': max(int(token['exp'] - time.time()), 0)})
+
+
+@swagger_auto_schema(
+    method='post',
+    operation_summary="Operações em lote",
+    operation_description=(
+        "Cria, atualiza e exclui várias tarefas em uma única requisição e transação. "
+        "Cada operação é validada com as mesmas regras dos endpoints individuais e tem seu próprio resultado. "
+        "Com 'atomic' verdadeiro, nada é aplicado se alguma operação for inválida."
+    ),
+    request_body=openapi.Schema(
+        type=openapi.TYPE_OBJECT,
+        required=['operations'],
+        properties={
+            'operations': openapi.Schema(
+                type=openapi.TYPE_ARRAY,
+                description=f"Até {BATCH_MAX_OPERATIONS} operações",
+                items=openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        'op': openapi.Schema(type=openapi.TYPE_STRING, enum=['create', 'update', 'delete']),
+                        'id': openapi.Schema(type=openapi.TYPE_INTEGER, description="ID da tarefa (update/delete)"),
+                        'data': openapi.Schema(type=openapi.TYPE_OBJECT, description="Campos da tarefa (create/update)"),
+                    }
+                )
+            ),
+            'atomic': openapi.Schema(type=openapi.TYPE_BOOLEAN, description="Tudo ou nada (padrão: false)"),
+        }
+    ),
+    responses={
+        200: openapi.Response(description="Resultado de cada operação, na ordem enviada"),
+        400: openapi.Response(description="Lote inválido, ou lote atômico com operações inválidas"),
+        401: openapi.Response(description="Token inválido ou expirado")
+    },
+    tags=['Tarefas'],
+    security=[{'Bearer': []}]
+)
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def task_batch(request):
+    operations = request.data.get('operations') if isinstance(request.data, dict) else None
+    if not isinstance(operations, list) or not operations:
+        return Response(
+            {'error': "Envie uma lista 'operations' com pelo menos uma operação"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if len(operations) > BATCH_MAX_OPERATIONS:
+        return Response(
+            {'error': f'Máximo de {BATCH_MAX_OPERATIONS} operações por lote'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    atomic = request.data.get('atomic') in (True, 'true', 'True', '1')
+    results, applied = run_batch(request.user, operations, atomic=atomic)
+    return Response(
+        {'applied': applied, 'results': results},
+        status=status.HTTP_200_OK if applied else status.HTTP_400_BAD_REQUEST
+    )
+
+
 @swagger_auto_schema(
     methods=['get'],
     operation_summary="Obter detalhes da tarefa",
     operation_description="Retorna detalhes completos de uma tarefa específica",
     responses={
         200: TaskSerializer,
+        304: openapi.Response(description="Tarefa não modificada (If-None-Match confere com o ETag)"),
         404: openapi.Response(description="Tarefa não encontrada"),
         401: openapi.Response(description="Token inválido ou expirado")
     },
@@ -157,6 +494,7 @@ def task_list_create(request):
         200: TaskSerializer,
         400: openapi.Response(description="Dados inválidos"),
         404: openapi.Response(description="Tarefa não encontrada"),
+        412: openapi.Response(description="If-Match não confere com o ETag atual"),
         401: openapi.Response(description="Token inválido ou expirado")
     },
     tags=['Tarefas'],
@@ -171,6 +509,7 @@ def task_list_create(request):
         200: TaskSerializer,
         400: openapi.Response(description="Dados inválidos"),
         404: openapi.Response(description="Tarefa não encontrada"),
+        412: openapi.Response(description="If-Match não confere com o ETag atual"),
         401: openapi.Response(description="Token inválido ou expirado")
     },
     tags=['Tarefas'],
@@ -183,6 +522,7 @@ def task_list_create(request):
     responses={
         204: openapi.Response(description="Tarefa excluída com sucesso"),
         404: openapi.Response(description="Tarefa não encontrada"),
+        412: openapi.Response(description="If-Match não confere com o ETag atual"),
         401: openapi.Response(description="Token inválido ou expirado")
     },
     tags=['Tarefas'],
@@ -191,26 +531,28 @@ def task_list_create(request):
 @api_view(['GET', 'PUT', 'PATCH', 'DELETE'])
 @permission_classes([IsAuthenticated])
 def task_detail(request, task_id):
-    from django.db.models import Q
     try:
-        task = Task.objects.get(
-            Q(id=task_id) & (Q(owner=request.user) | Q(shared_with=request.user))
-        )
+        task = Task.objects.with_related().visible_to(request.user).get(id=task_id)
     except Task.DoesNotExist:
         return Response(
             {'error': 'Tarefa não encontrada ou você não tem permissão para acessá-la'}, 
             status=status.HTTP_404_NOT_FOUND
         )
-    is_owner = task.owner == request.user
+    is_owner = task.owner_id == request.user.id
+    etag = task_etag(task, request.user)
     if request.method == 'GET':
+        if if_none_match(request, etag):
+            return _not_modified(etag)
         serializer = TaskSerializer(task, context={'request': request})
-        return Response(serializer.data)
+        return Response(serializer.data, headers={'ETag': etag})
     elif request.method in ['PUT', 'PATCH']:
         if not is_owner:
             return Response(
                 {'error': 'Apenas o proprietário da tarefa pode modificá-la'}, 
                 status=status.HTTP_403_FORBIDDEN
             )
+        if if_match_failed(request, etag):
+            return _precondition_failed()
         serializer = TaskUpdateSerializer(
             task,
             data=request.data,
@@ -219,7 +561,7 @@ def task_detail(request, task_id):
         if serializer.is_valid():
             task = serializer.save()
             response_serializer = TaskSerializer(task, context={'request': request})
-            return Response(response_serializer.data)
+            return Response(response_serializer.data, headers={'ETag': task_etag(task, request.user)})
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     elif request.method == 'DELETE':
         if not is_owner:
@@ -227,6 +569,8 @@ def task_detail(request, task_id):
                 {'error': 'Apenas o proprietário da tarefa pode deletá-la'}, 
                 status=status.HTTP_403_FORBIDDEN
             )
+        if if_match_failed(request, etag):
+            return _precondition_failed()
         task.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
@@ -238,6 +582,7 @@ def task_detail(request, task_id):
     responses={
         200: TaskSerializer,
         404: openapi.Response(description="Tarefa não encontrada"),
+        412: openapi.Response(description="If-Match não confere com o ETag atual"),
         401: openapi.Response(description="Token inválido ou expirado")
     },
     tags=['Tarefas'],
@@ -246,33 +591,25 @@ def task_detail(request, task_id):
 @api_view(['PATCH'])
 @permission_classes([IsAuthenticated])
 def task_toggle_complete(request, task_id):
-    from django.db.models import Q
     try:
-        task = Task.objects.get(
-            Q(id=task_id) & (Q(owner=request.user) | Q(shared_with=request.user))
-        )
+        task = Task.objects.with_related().visible_to(request.user).get(id=task_id)
     except Task.DoesNotExist:
         return Response(
             {'error': 'Tarefa não encontrada ou você não tem permissão para acessá-la'}, 
             status=status.HTTP_404_NOT_FOUND
         )
-    is_owner = task.owner == request.user
+    is_owner = task.owner_id == request.user.id
     if not is_owner:
         return Response(
             {'error': 'Apenas o proprietário da tarefa pode alterar o status de conclusão'}, 
             status=status.HTTP_403_FORBIDDEN
         )
-    if task.is_completed:
-        task.status = 'pending'
-        task.is_completed = False
-        task.completed_at = None
-    else:
-        task.status = 'completed'
-        task.is_completed = True
-        task.completed_at = timezone.now()
+    if if_match_failed(request, task_etag(task, request.user)):
+        return _precondition_failed()
+    _toggle_completion(task)
     task.save()
     serializer = TaskSerializer(task, context={'request': request})
-    return Response(serializer.data)
+    return Response(serializer.data, headers={'ETag': task_etag(task, request.user)})
 
 
 @swagger_auto_schema(
@@ -290,6 +627,8 @@ def task_toggle_complete(request, task_id):
                     'pending_tasks': openapi.Schema(type=openapi.TYPE_INTEGER, description="Tarefas pendentes"),
                     'in_progress_tasks': openapi.Schema(type=openapi.TYPE_INTEGER, description="Tarefas em progresso"),
                     'overdue_tasks': openapi.Schema(type=openapi.TYPE_INTEGER, description="Tarefas em atraso"),
+                    'owned_tasks': openapi.Schema(type=openapi.TYPE_INTEGER, description="Tarefas próprias"),
+                    'shared_tasks': openapi.Schema(type=openapi.TYPE_INTEGER, description="Tarefas compartilhadas com o usuário"),
                     'completion_rate': openapi.Schema(type=openapi.TYPE_NUMBER, description="Taxa de conclusão (%)"),
                     'priority_breakdown': openapi.Schema(
                         type=openapi.TYPE_OBJECT,
@@ -311,40 +650,146 @@ def task_toggle_complete(request, task_id):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def task_stats(request):
-    from django.db.models import Q
-    user_tasks = Task.objects.filter(
-        Q(owner=request.user) | Q(shared_with=request.user)
-    ).distinct()
-    total_tasks = user_tasks.count()
-    completed_tasks = user_tasks.filter(is_completed=True).count()
-    pending_tasks = user_tasks.filter(status='pending').count()
-    in_progress_tasks = user_tasks.filter(status='in_progress').count()
-    overdue_tasks = sum(1 for task in user_tasks if task.is_overdue)
-    high_priority = user_tasks.filter(priority='high').count()
-    medium_priority = user_tasks.filter(priority='medium').count()
-    low_priority = user_tasks.filter(priority='low').count()
-    urgent_priority = user_tasks.filter(priority='urgent').count()
-    owned_tasks = user_tasks.filter(owner=request.user).count()
-    shared_tasks = user_tasks.filter(shared_with=request.user).exclude(owner=request.user).count()
+    # Totais vêm de TaskCounter (uma linha por usuário); só as atrasadas dependem
+    # do relógio e saem de um intervalo no índice (user, is_completed, due_date)
+    counters = get_task_counters(request.user)
+    total_tasks = counters['total']
+    completed_tasks = counters['completed']
     stats = {
         'total_tasks': total_tasks,
         'completed_tasks': completed_tasks,
-        'pending_tasks': pending_tasks,
-        'in_progress_tasks': in_progress_tasks,
-        'overdue_tasks': overdue_tasks,
-        'owned_tasks': owned_tasks,
-        'shared_tasks': shared_tasks,
+        'pending_tasks': counters['status_pending'],
+        'in_progress_tasks': counters['status_in_progress'],
+        'overdue_tasks': count_overdue(request.user),
+        'owned_tasks': counters['owned'],
+        'shared_tasks': counters['shared'],
         'completion_rate': (completed_tasks / total_tasks * 100) if total_tasks > 0 else 0,
         'priority_breakdown': {
-            'urgent': urgent_priority,
-            'high': high_priority,
-            'medium': medium_priority,
-            'low': low_priority,
+            'urgent': counters['priority_urgent'],
+            'high': counters['priority_high'],
+            'medium': counters['priority_medium'],
+            'low': counters['priority_low'],
         }
     }
     return Response(stats)
 
 
+@swagger_auto_schema(
+    method='get',
+    operation_summary="Série diária das tarefas",
+    operation_description=(
+        "Tarefas criadas, concluídas e canceladas por dia e o backlog (tarefas em aberto) ao fim de cada dia, "
+        "para as tarefas do usuário. Lida dos rollups diários: um intervalo de um ano lê no máximo uma linha por dia."
+    ),
+    manual_parameters=[
+        openapi.Parameter('start', openapi.IN_QUERY, description="Data inicial (AAAA-MM-DD, padrão: 29 dias antes do fim)", type=openapi.TYPE_STRING),
+        openapi.Parameter('end', openapi.IN_QUERY, description="Data final (AAAA-MM-DD, padrão: hoje)", type=openapi.TYPE_STRING),
+    ],
+    responses={
+        200: openapi.Response(description="Série diária"),
+        400: openapi.Response(description="Datas inválidas"),
+        401: openapi.Response(description="Token inválido ou expirado")
+    },
+    tags=['Estatísticas'],
+    security=[{'Bearer': []}]
+)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def task_daily_stats(request):
+    from datetime import date, timedelta
+    try:
+        end = date.fromisoformat(request.GET['end']) if request.GET.get('end') else timezone.localdate()
+        start = date.fromisoformat(request.GET['start']) if request.GET.get('start') else end - timedelta(days=29)
+    except ValueError:
+        return Response({'error': 'Datas inválidas: use o formato AAAA-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
+    if start > end:
+        return Response({'error': 'A data inicial deve ser anterior à final'}, status=status.HTTP_400_BAD_REQUEST)
+    if (end - start).days >= ROLLUP_MAX_DAYS:
+        return Response(
+            {'error': f'Intervalo máximo de {ROLLUP_MAX_DAYS} dias'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    return Response({
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'series': daily_series(request.user, start, end),
+    })
+
+
+@swagger_auto_schema(
+    methods=['get'],
+    operation_summary="Contagem de tarefas por tag",
+    operation_description="Retorna as tags das tarefas visíveis ao usuário com a quantidade de tarefas de cada uma",
+    responses={
+        200: openapi.Response(
+            description="Tags e contagens",
+            schema=openapi.Schema(
+                type=openapi.TYPE_ARRAY,
+                items=openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        'name': openapi.Schema(type=openapi.TYPE_STRING, description="Tag (minúsculas)"),
+                        'count': openapi.Schema(type=openapi.TYPE_INTEGER, description="Quantidade de tarefas"),
+                    }
+                )
+            )
+        ),
+        401: openapi.Response(description="Token inválido ou expirado")
+    },
+    tags=['Tarefas'],
+    security=[{'Bearer': []}]
+)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def task_tag_counts(request):
+    counts = (
+        TaskTag.objects.filter(task__access_entries__user=request.user)
+        .values('tag__name')
+        .annotate(count=Count('id'))
+        .order_by('-count', 'tag__name')
+    )
+    return Response([{'name': row['tag__name'], 'count': row['count']} for row in counts])
+
+
+@swagger_auto_schema(
+    methods=['get'],
+    operation_summary="Estatísticas do cache da listagem",
+    operation_description=(
+        "Retorna os contadores de acertos e falhas do cache de respostas da listagem de tarefas e, em `auth`, "
+        "os dos caches de tokens e usuários da autenticação do processo que atendeu (apenas administradores)"
+    ),
+    responses={
+        200: openapi.Response(
+            description="Contadores do cache",
+            schema=openapi.Schema(
+                type=openapi.TYPE_OBJECT,
+                properties={
+                    'enabled': openapi.Schema(
+                        type=openapi.TYPE_BOOLEAN,
+                        description="Falso com vários processos e um cache local (locmem): o cache da listagem fica desativado",
+                    ),
+                    'hits': openapi.Schema(type=openapi.TYPE_INTEGER, description="Respostas servidas do cache"),
+                    'misses': openapi.Schema(type=openapi.TYPE_INTEGER, description="Respostas recalculadas"),
+                    'hit_rate': openapi.Schema(type=openapi.TYPE_NUMBER, description="Taxa de acerto (%)"),
+                    'auth': openapi.Schema(
+                        type=openapi.TYPE_OBJECT,
+                        description="Caches da autenticação neste processo: 'tokens' e 'users', cada um com hits, misses, hit_rate e size",
+                    ),
+                }
+            )
+        ),
+        403: openapi.Response(description="Usuário não é administrador")
+    },
+    tags=['Estatísticas'],
+    security=[{'Bearer': []}]
+)
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def task_cache_stats(request):
+    from core.authentication import auth_cache_stats
+    return Response(dict(get_cache_stats(), auth=auth_cache_stats()))
+
+
 @swagger_auto_schema(
     methods=['get'],
     operation_summary="Listar usuários compartilhados de uma tarefa",
@@ -378,45 +823,16 @@ def task_stats(request):
 @api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated])
 def task_shared_users(request, task_id):
-    from django.db.models import Q
     try:
-        task = Task.objects.get(
-            Q(id=task_id) & (Q(owner=request.user) | Q(shared_with=request.user))
-        )
+        task = Task.objects.select_related('owner').visible_to(request.user).get(id=task_id)
     except Task.DoesNotExist:
         return Response(
             {'error': 'Tarefa não encontrada ou você não tem permissão para acessá-la'}, 
             status=status.HTTP_404_NOT_FOUND
         )
-    is_owner = task.owner == request.user
+    is_owner = task.owner_id == request.user.id
     if request.method == 'GET':
-        shared_users_queryset = task.get_shared_users()
-        shared_users = [
-            {
-                'id': user.id,
-                'first_name': user.first_name,
-                'last_name': user.last_name,
-                'email': user.email
-            }
-            for user in shared_users_queryset
-        ]
-        response_data = {
-            'shared_users': shared_users,
-            'owner': {
-                'id': task.owner.id,
-                'first_name': task.owner.first_name,
-                'last_name': task.owner.last_name,
-                'email': task.owner.email,
-                'username': task.owner.username
-            },
-            'current_user_is_owner': is_owner,
-            'task_info': {
-                'id': task.id,
-                'title': task.title,
-                'description': task.description
-            }
-        }
-        return Response(response_data)
+        return Response(_shared_users_data(task, task.get_shared_users(), is_owner))
     elif request.method == 'POST':
         if not is_owner:
             return Response(
@@ -430,7 +846,7 @@ def task_shared_users(request, task_id):
                 status=status.HTTP_400_BAD_REQUEST
             )
         try:
-            user_to_share = get_object_or_404(User, email=email)
+            user_to_share = filter_by_email(User.objects.all(), [email]).get()
             if user_to_share == task.owner:
                 return Response(
                     {'error': 'Não é possível compartilhar a tarefa com o próprio dono'}, 
@@ -444,12 +860,7 @@ def task_shared_users(request, task_id):
             task.share_with_user(user_to_share)
             return Response({
                 'message': f'Tarefa compartilhada com {email} com sucesso',
-                'user': {
-                    'id': user_to_share.id,
-                    'first_name': user_to_share.first_name,
-                    'last_name': user_to_share.last_name,
-                    'email': user_to_share.email
-                }
+                'user': _user_info(user_to_share)
             })
         except User.DoesNotExist:
             return Response(
@@ -485,17 +896,14 @@ def task_shared_users(request, task_id):
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def task_remove_user(request, task_id):
-    from django.db.models import Q
     try:
-        task = Task.objects.get(
-            Q(id=task_id) & (Q(owner=request.user) | Q(shared_with=request.user))
-        )
+        task = Task.objects.visible_to(request.user).get(id=task_id)
     except Task.DoesNotExist:
         return Response(
             {'error': 'Tarefa não encontrada ou você não tem permissão para acessá-la'}, 
             status=status.HTTP_404_NOT_FOUND
         )
-    is_owner = task.owner == request.user
+    is_owner = task.owner_id == request.user.id
     if not is_owner:
         return Response(
             {'error': 'Apenas o proprietário da tarefa pode remover usuários do compartilhamento'}, 
@@ -525,6 +933,68 @@ def task_remove_user(request, task_id):
         )
 
 
+@swagger_auto_schema(
+    method='post',
+    operation_summary="Compartilhamento em lote",
+    operation_description=(
+        "Compartilha (ou remove o compartilhamento de) várias tarefas com vários usuários em uma única chamada. "
+        "Devolve o resultado de cada par tarefa/usuário, além das tarefas e usuários que não puderam ser usados."
+    ),
+    request_body=openapi.Schema(
+        type=openapi.TYPE_OBJECT,
+        required=['task_ids'],
+        properties={
+            'action': openapi.Schema(type=openapi.TYPE_STRING, enum=list(BULK_SHARE_ACTIONS), description="Padrão: share"),
+            'task_ids': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_INTEGER)),
+            'emails': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_STRING)),
+            'user_ids': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_INTEGER)),
+        }
+    ),
+    responses={
+        200: openapi.Response(description="Resultado por par tarefa/usuário"),
+        400: openapi.Response(description="Parâmetros inválidos"),
+        401: openapi.Response(description="Token inválido ou expirado")
+    },
+    tags=['Compartilhamento'],
+    security=[{'Bearer': []}]
+)
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def task_bulk_share(request):
+    data = request.data if isinstance(request.data, dict) else {}
+    action = data.get('action', 'share')
+    if action not in BULK_SHARE_ACTIONS:
+        return Response(
+            {'error': f"Ação inválida: use {' ou '.join(BULK_SHARE_ACTIONS)}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    task_ids = data.get('task_ids')
+    emails = data.get('emails') or []
+    user_ids = data.get('user_ids') or []
+    if not isinstance(task_ids, list) or not task_ids or not all(isinstance(value, int) for value in task_ids):
+        return Response(
+            {'error': "Envie uma lista 'task_ids' com os IDs das tarefas"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if not isinstance(emails, list) or not all(isinstance(value, str) for value in emails) \
+            or not isinstance(user_ids, list) or not all(isinstance(value, int) for value in user_ids):
+        return Response(
+            {'error': "'emails' deve ser uma lista de emails e 'user_ids' uma lista de IDs"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if not emails and not user_ids:
+        return Response(
+            {'error': "Informe ao menos um usuário em 'emails' ou 'user_ids'"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if len(set(task_ids)) * (len(set(emails)) + len(set(user_ids))) > BULK_SHARE_MAX_PAIRS:
+        return Response(
+            {'error': f'Máximo de {BULK_SHARE_MAX_PAIRS} pares tarefa/usuário por chamada'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    return Response(run_bulk_share(request.user, action, task_ids, emails, user_ids))
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def task_share(request, task_id):
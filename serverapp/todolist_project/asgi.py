@@ -4,4 +4,13 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'todolist_project.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Importado depois do django.setup() feito por get_asgi_application()
+from tasks.events import EVENTS_PATH, task_events_app  # noqa: E402
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'http' and scope['path'] == EVENTS_PATH:
+        return await task_events_app(scope, receive, send)
+    return await django_application(scope, receive, send)
@@ -2,6 +2,8 @@ import os
 from pathlib import Path
 from datetime import timedelta
 from dotenv import load_dotenv
+from corsheaders.defaults import default_headers
+import dj_database_url
 
 load_dotenv()
 
@@ -45,6 +47,8 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.replica_routing_middleware',
+    'core.middleware.PasswordHashingBusyMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -69,12 +73,50 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'todolist_project.wsgi.application'
 
+# SQLite com WAL (leitores não bloqueiam o escritor), PRAGMAs aplicados a cada
+# conexão nova e BEGIN IMMEDIATE só nas transações de escrita (write_atomic);
+# transaction.atomic() continua DEFERRED (core/backends/sqlite3)
+SQLITE_OPTIONS = {
+    'transaction_mode': os.getenv('SQLITE_TRANSACTION_MODE', 'DEFERRED'),
+    'write_transaction_mode': os.getenv('SQLITE_WRITE_TRANSACTION_MODE', 'IMMEDIATE'),
+    'pragmas': {
+        'journal_mode': os.getenv('SQLITE_JOURNAL_MODE', 'WAL'),
+        'synchronous': os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL'),
+        'busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT', '5000')),
+        'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024))),
+        # Negativo = KiB por conexão
+        'cache_size': int(os.getenv('SQLITE_CACHE_SIZE', '-20000')),
+        'temp_store': os.getenv('SQLITE_TEMP_STORE', 'MEMORY'),
+    },
+}
+
+
+def database_from_url(url):
+    config = dj_database_url.parse(
+        url,
+        # Segundos que uma conexão é reaproveitada entre requisições (0 = uma por requisição)
+        conn_max_age=int(os.getenv('DB_CONN_MAX_AGE', '60')),
+        conn_health_checks=os.getenv('DB_CONN_HEALTH_CHECKS', 'True').lower() == 'true',
+    )
+    if config['ENGINE'] == 'django.db.backends.sqlite3':
+        config.update(ENGINE='core.backends.sqlite3', OPTIONS=SQLITE_OPTIONS)
+    return config
+
+
+# Primário em DATABASE_URL e réplicas de leitura em DATABASE_REPLICA_URLS
+# (separadas por vírgula), ex.: sqlite:////app/data/replica1.sqlite3
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    'default': database_from_url(os.getenv('DATABASE_URL', f"sqlite:///{BASE_DIR / 'db.sqlite3'}")),
 }
+DATABASE_REPLICAS = []
+for index, url in enumerate(filter(None, os.getenv('DATABASE_REPLICA_URLS', '').split(',')), start=1):
+    DATABASES[f'replica{index}'] = dict(database_from_url(url.strip()), TEST={'MIRROR': 'default'})
+    DATABASE_REPLICAS.append(f'replica{index}')
+
+# Leituras de tarefas vão para as réplicas; escritas e quem acabou de escrever
+# (por DATABASE_REPLICA_STICKY_SECONDS) ficam no primário
+DATABASE_ROUTERS = ['core.routers.PrimaryReplicaRouter']
+DATABASE_REPLICA_STICKY_SECONDS = int(os.getenv('DATABASE_REPLICA_STICKY_SECONDS', '5'))
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -91,6 +133,29 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Login por email pelo índice único em LOWER(email) (authentication/backends.py); o
+# ModelBackend atende o login por username do admin
+AUTHENTICATION_BACKENDS = [
+    'authentication.backends.EmailBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
+# pbkdf2_sha256 com no máximo PASSWORD_HASHING_CONCURRENCY hashes ao mesmo tempo por
+# processo (authentication/hashers.py; 0 desativa o limite), calculados na thread da
+# requisição. Sem vaga, a requisição recebe 503 na hora, sem esperar
+# (core.middleware.PasswordHashingBusyMiddleware), em qualquer view (Tests/bench_login.py).
+# Senhas com outra contagem de iterações são refeitas com PASSWORD_HASH_ITERATIONS no
+# próximo login.
+PASSWORD_HASHERS = [
+    'authentication.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+PASSWORD_HASH_ITERATIONS = int(os.getenv('PASSWORD_HASH_ITERATIONS', '600000'))
+PASSWORD_HASHING_CONCURRENCY = int(os.getenv('PASSWORD_HASHING_CONCURRENCY', '2'))
+
 LANGUAGE_CODE = 'pt-br'
 
 TIME_ZONE = 'America/Sao_Paulo'
@@ -115,9 +180,42 @@ MEDIA_ROOT = BASE_DIR / 'media'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'todolist'),
+    }
+}
+
+# Processos que atendem a aplicação ao mesmo tempo (o comando serve usa --workers).
+# Com mais de um, o cache da listagem só fica ativo com um cache compartilhado:
+# com locmem cada processo teria as próprias versões de visibilidade
+WEB_PROCESSES = int(os.getenv('WEB_PROCESSES', '1'))
+
+# Tempo (segundos) das respostas da listagem de tarefas em cache; a invalidação
+# é feita pela versão de visibilidade de cada usuário, não pelo tempo
+TASK_LIST_CACHE_TIMEOUT = int(os.getenv('TASK_LIST_CACHE_TIMEOUT', '300'))
+
+# Eventos em tempo real (SSE em /api/tasks/events/, servido pela aplicação ASGI).
+# O broker padrão só alcança as conexões do próprio processo; com vários workers
+# use tasks.events.ChangeFeedBroker, que lê o feed de alterações a cada
+# TASK_EVENTS_POLL_INTERVAL (s). Mensagens pendentes por conexão antes de um
+# cliente lento receber `resync`; intervalo do heartbeat (s)
+TASK_EVENTS_BROKER = os.getenv('TASK_EVENTS_BROKER', 'tasks.events.InProcessBroker')
+TASK_EVENTS_POLL_INTERVAL = float(os.getenv('TASK_EVENTS_POLL_INTERVAL', '1'))
+# Validade (s) do token de uso exclusivo do stream, o único aceito em ?token=
+TASK_EVENTS_TOKEN_SECONDS = int(os.getenv('TASK_EVENTS_TOKEN_SECONDS', '30'))
+TASK_EVENTS_QUEUE_SIZE = int(os.getenv('TASK_EVENTS_QUEUE_SIZE', '100'))
+TASK_EVENTS_HEARTBEAT = int(os.getenv('TASK_EVENTS_HEARTBEAT', '25'))
+
+# Versões assíncronas da listagem, detalhe, alternância e usuários compartilhados
+# (tasks/async_views.py). Só compensam servindo pela aplicação ASGI; sob WSGI
+# cada requisição assíncrona ganharia um event loop próprio.
+TASK_ASYNC_VIEWS = os.getenv('TASK_ASYNC_VIEWS', 'False').lower() == 'true'
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'core.authentication.JWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -129,11 +227,20 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Cache em memória (por processo) de core.authentication.JWTAuthentication: tokens
+# já verificados, até expirarem, e usuários por AUTH_USER_CACHE_SECONDS (0 desativa).
+# Um usuário desativado em outro processo é recusado em até AUTH_USER_CACHE_SECONDS.
+AUTH_TOKEN_CACHE_SIZE = int(os.getenv('AUTH_TOKEN_CACHE_SIZE', '10000'))
+AUTH_USER_CACHE_SIZE = int(os.getenv('AUTH_USER_CACHE_SIZE', '1000'))
+AUTH_USER_CACHE_SECONDS = int(os.getenv('AUTH_USER_CACHE_SECONDS', '30'))
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
+    # Refresh de uso único sem a consulta extra à blacklist (authentication/tokens.py)
+    'TOKEN_REFRESH_SERIALIZER': 'authentication.serializers.TokenRefreshSerializer',
 }
 
 CORS_ALLOWED_ORIGINS = [
@@ -143,6 +250,10 @@ CORS_ALLOWED_ORIGINS = [
 
 CORS_ALLOW_CREDENTIALS = True
 
+# Requisições condicionais (ETag / If-None-Match / If-Match) a partir do webapp
+CORS_ALLOW_HEADERS = list(default_headers) + ['if-match', 'if-none-match']
+CORS_EXPOSE_HEADERS = ['ETag']
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,